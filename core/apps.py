@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        # Cache invalidation and search indexing receivers; connected here rather
+        # than on import so they are live in every process, whatever it imports
+        from core.services import catalogue, gamification, material_loader, quiz_engine, search
+
+        for module in (catalogue, gamification, material_loader, quiz_engine, search):
+            module.connect_signals()
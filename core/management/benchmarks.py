@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import override_settings
+
+from core.services.content_cache import ContentCache
+from core.services.gamification import BadgeIndex
+from core.services.gamification_events import GamificationEvents
+from core.services.leaderboard import Leaderboard
+
+# Redis/Celery backed services replaced by in-process ones, for tests and benchmarks
+LOCAL_SERVICES = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'GAMIFICATION_EVENTS': {'BACKEND': 'eager'},
+    'LEADERBOARD': {'BACKEND': 'locmem'},
+    'CONTENT_CACHE': {'BACKEND': 'locmem'},
+    'INGESTION_BACKEND': 'eager',
+}
+
+
+def reset_local_services() -> None:
+    """Drop every process-level service and index so the next use rebuilds it from settings."""
+    cache.clear()
+    GamificationEvents.set_queue(None)
+    Leaderboard.set_backend(None, loaded=False)
+    ContentCache.set_backend(None)
+    # Badges from another database (or a rolled-back test) would still be indexed
+    BadgeIndex.invalidate()
+
+
+@contextmanager
+def throwaway_database():
+    """Run the block against a freshly migrated test database and in-process services.
+
+    Benchmarks write thousands of rows and cache entries keyed by primary key;
+    doing that in the configured database and the shared Redis cache would
+    leave rows behind and serve benchmark data for real ids. The database
+    named by ``DATABASES['default']['TEST']`` is created before the block and
+    destroyed after it, so the database user needs permission to create it.
+    """
+    old_name = connection.settings_dict['NAME']
+    with override_settings(**LOCAL_SERVICES):
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        reset_local_services()
+        try:
+            yield
+        finally:
+            reset_local_services()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,119 @@
+import re
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import (
+    ContentFingerprint,
+    IngestionJob,
+    Note,
+    PastPaper,
+    Progress,
+    ScrapedContent,
+    StudyMaterial,
+    UserBadge,
+    UserProgress,
+    UserXP,
+    XPLedgerEntry
+)
+from core.services.catalogue import KeysetPaginator, PastPaperCatalogue
+from core.services.gamification import BadgeIndex, GamificationService
+from core.services.refresher import MaterialRefresher
+
+# SQLite reports "SCAN <table>" both for a full table scan and for a full walk
+# of an index ("SCAN <table> USING INDEX ..."); PostgreSQL reports "Seq Scan on <table>"
+SEQ_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+    'postgresql': re.compile(r'^\s*(?:->\s*)?Sort\b', re.MULTILINE),
+}
+
+
+def catalogue_page(queryset, cursor_values=None):
+    paginator = KeysetPaginator(queryset, PastPaperCatalogue.ORDERING, PastPaperCatalogue.PAGE_SIZE)
+    queryset = paginator.queryset
+    if cursor_values:
+        queryset = queryset.filter(paginator._after(cursor_values))
+    return queryset[:paginator.page_size + 1]
+
+
+def hot_queries(user):
+    """(name, queryset, scan expected) for each hot lookup.
+
+    A scan is expected where the query loads a whole (small) table or walks
+    an index in order and stops at a LIMIT.
+    """
+    return [
+        ('progress stats', GamificationService.progress_stats_queryset(user), False),
+        ('user XP total', UserXP.objects.filter(user_id=user.pk).values_list('total_xp', flat=True), False),
+        ('earned badges', UserBadge.objects.filter(user=user, badge_id__in=[1, 2]).values_list('badge_id'), False),
+        ('completed milestones', UserProgress.objects.filter(user=user, completed=True), False),
+        ('milestone claim', UserProgress.objects.filter(user=user, study_material_id=1, milestone_id=1), False),
+        ('idempotency key lookup', XPLedgerEntry.objects.filter(user=user, idempotency_key='key'), False),
+        ('quiz progress', Progress.objects.filter(user=user), False),
+        ('notes list', Note.objects.filter(user=user).order_by('-updated_at'), False),
+        ('past papers first page', catalogue_page(PastPaper.objects.all()), True),
+        ('past papers later page', catalogue_page(PastPaper.objects.all(), ['Physics', 2015, 100]), False),
+        ('past papers by subject', catalogue_page(PastPaper.objects.filter(subject='Physics')), False),
+        ('study material detail', StudyMaterial.objects.filter(pk=1), False),
+        ('ingestion job status', IngestionJob.objects.filter(pk=uuid.uuid4(), user=user), False),
+        ('badge index load', BadgeIndex.queryset(), True),
+        ('near-duplicate candidates', ContentFingerprint.objects.filter(bands__bucket__in=[1, 2]).distinct(), False),
+        ('stale pages to refresh', MaterialRefresher.stale()[:50], False),
+        ('stored copy of a URL', ScrapedContent.objects.filter(url='https://example.com', source_type='webpage'), False),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot queries and flag sequential scans (SQLite and PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not just flagged ones')
+        parser.add_argument('--no-seqscan', action='store_true',
+                            help='PostgreSQL: disable seq scans while planning, to check an index is usable '
+                                 'even when the planner prefers scanning a small table')
+        parser.add_argument('--fail', action='store_true', help='Exit with an error if anything is flagged')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SEQ_SCAN_PATTERNS:
+            raise CommandError(f"Query plan audit supports SQLite and PostgreSQL, not {vendor}")
+
+        # Any user id gives the same plan; nothing is read from this instance
+        user = User(pk=1)
+        flagged = 0
+        with transaction.atomic():
+            if options['no_seqscan'] and vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset, scan_expected in hot_queries(user):
+                plan = queryset.explain()
+                scans = sorted(set(SEQ_SCAN_PATTERNS[vendor].findall(plan)))
+                sorts = bool(SORT_PATTERNS[vendor].search(plan))
+                problems = []
+                if scans and not scan_expected:
+                    problems.append(f"sequential scan of {', '.join(scans)}")
+                if sorts and not scan_expected:
+                    problems.append('sort without a supporting index')
+
+                if problems:
+                    flagged += 1
+                    self.stdout.write(self.style.WARNING(f"FLAG {name}: {'; '.join(problems)}"))
+                else:
+                    self.stdout.write(f"ok   {name}{' (scan expected)' if scan_expected and scans else ''}")
+                if problems or options['verbose_plans']:
+                    for line in plan.splitlines():
+                        self.stdout.write(f"       {line}")
+
+        if flagged and options['fail']:
+            raise CommandError(f"{flagged} hot queries need an index")
+        if flagged:
+            self.stdout.write(self.style.WARNING(f"{flagged} hot queries flagged."))
+        else:
+            self.stdout.write(self.style.SUCCESS('No unexpected sequential scans.'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import ContentFingerprint, ScrapedContent
+from core.services.near_duplicates import NearDuplicateIndex
+
+
+class Command(BaseCommand):
+    help = 'Fingerprint existing ScrapedContent rows for near-duplicate detection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Drop every fingerprint first, e.g. after changing NEAR_DUPLICATES')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            deleted, _ = ContentFingerprint.objects.all().delete()
+            self.stdout.write(f"Dropped {deleted} fingerprint rows")
+
+        pending = ScrapedContent.objects.filter(fingerprint__isnull=True).order_by('id')
+        total = pending.count()
+        done = indexed = 0
+        last_id = 0
+        while True:
+            # Keyset by id, so each batch is an index range read however far along we are
+            batch = list(pending.filter(id__gt=last_id).select_related('blob')[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                indexed += NearDuplicateIndex.add_many(
+                    (row.id, NearDuplicateIndex.signature(row.raw_content)) for row in batch
+                )
+            last_id = batch[-1].id
+            done += len(batch)
+            self.stdout.write(f"{done}/{total} rows")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Fingerprinted {indexed} rows; {done - indexed} had no text to fingerprint."
+        ))
@@ -0,0 +1,99 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services import distractors
+from core.services.distractors import DistractorIndex, QuizQuestionBuilder
+
+TOPICS = [
+    'array stack queue pointer memory index'.split(),
+    'tree graph node edge path traversal'.split(),
+    'hash key value bucket collision table'.split(),
+    'sorting search binary complexity merge pivot'.split(),
+]
+COMMON_WORDS = 'uses stores returns every each item first last element'.split()
+
+
+class Command(BaseCommand):
+    help = 'Time distractor selection as documents grow and compare option similarity with positional picks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[500, 2000, 10000, 50000],
+                            help='Sentences per synthetic document')
+        parser.add_argument('--pairwise-max', type=int, default=2000,
+                            help='Largest size at which the all-pairs baseline is also timed')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def build_sentences(self, count, rng):
+        sentences = []
+        for _ in range(count):
+            topic = rng.choice(TOPICS)
+            words = [rng.choice(topic if rng.random() < 0.6 else COMMON_WORDS) for _ in range(rng.randint(6, 18))]
+            sentences.append(' '.join(words).capitalize())
+        return sentences
+
+    def pairwise(self, index):
+        # Every sentence against every other, which is what a naive nearest-neighbour pass does
+        for i in range(len(index.candidates)):
+            index.similarities(i)
+
+    def mean_similarity(self, index, answer, options):
+        similarities = index.similarities(answer)
+        rows = {text: row for row, text in enumerate(index.candidates)}
+        values = [similarities[rows[option]] for option in options if option in rows]
+        return sum(values) / len(values) if values else 0.0
+
+    def check_paths_agree(self, sentences):
+        # The vectorized and pure Python paths must score identically
+        vectorized = DistractorIndex(sentences)
+        saved, distractors.np = distractors.np, None
+        try:
+            python = DistractorIndex(sentences)
+        finally:
+            distractors.np = saved
+        if not vectorized.vectorized:
+            return
+        for i in range(0, len(sentences), max(1, len(sentences) // 20)):
+            expected, actual = python.similarities(i), vectorized.similarities(i)
+            if any(abs(a - b) > 1e-9 for a, b in zip(expected, actual)):
+                raise CommandError(f"Vectorized similarities differ from the Python path for sentence {i}")
+            if python.distractors(i) != vectorized.distractors(i):
+                raise CommandError(f"Vectorized distractors differ from the Python path for sentence {i}")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.check_paths_agree(self.build_sentences(500, rng))
+
+        self.stdout.write(f"{'sentences':>10} {'questions':>10} {'all pairs':>11} {'similarity (picked / positional)':>34}")
+        for size in options['sizes']:
+            sentences = self.build_sentences(size, rng)
+
+            started = time.perf_counter()
+            questions = QuizQuestionBuilder.build(sentences, [])
+            elapsed = time.perf_counter() - started
+
+            pairwise = '-'
+            if size <= options['pairwise_max']:
+                index = DistractorIndex(sentences)
+                started = time.perf_counter()
+                self.pairwise(index)
+                pairwise = f"{(time.perf_counter() - started) * 1000:9.0f}ms"
+
+            index = DistractorIndex(sentences)
+            picked = positional = 0.0
+            for question in questions:
+                answer = sentences.index(question['correct_answer'])
+                wrong = [question[f'option{n}'] for n in range(1, 5)
+                         if question[f'option{n}'] not in ('', question['correct_answer'])]
+                picked += self.mean_similarity(index, answer, wrong)
+                # What generate_quiz_questions used to offer: the next three sentences
+                positional += self.mean_similarity(index, answer, [sentences[(answer + k) % size] for k in (1, 2, 3)])
+            count = max(len(questions), 1)
+
+            self.stdout.write(
+                f"{size:>10} {elapsed * 1000:8.0f}ms {pairwise:>11} "
+                f"{picked / count:>19.3f} / {positional / count:.3f}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Vectorized and Python paths agree.'))
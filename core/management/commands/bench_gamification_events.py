@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.benchmarks import throwaway_database
+from core.models import XPLedgerEntry
+from core.services.gamification import GamificationService
+from core.services.gamification_events import GamificationEvents, InMemoryEventQueue
+
+
+class Command(BaseCommand):
+    help = ('Measure gamification events/sec applied one by one vs in per-user batches '
+            '(in a throwaway database)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def make_events(self, users, count, rng):
+        actions = list(GamificationService.XP_REWARDS)
+        return [(rng.choice(users), rng.choice(actions)) for _ in range(count)]
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.run(options)
+        self.stdout.write(self.style.SUCCESS('Batched and queued totals match.'))
+
+    def run(self, options):
+        GamificationService.initialize_badges()
+        rng = random.Random(options['seed'])
+        groups = {
+            name: [User.objects.create_user(username=f'bench-events-{name}-{i}') for i in range(options['users'])]
+            for name in ('sync', 'batched', 'queued')
+        }
+        events = self.make_events(range(options['users']), options['events'], rng)
+        results = {}
+
+        users = groups['sync']
+        started = time.perf_counter()
+        for index, action_type in events:
+            GamificationService.award_xp(users[index], action_type)
+        results['one by one'] = time.perf_counter() - started
+
+        users = groups['batched']
+        payloads = [
+            {'user_id': users[index].pk, 'action_type': action_type,
+             'amount': GamificationService.XP_REWARDS[action_type]}
+            for index, action_type in events
+        ]
+        started = time.perf_counter()
+        for offset in range(0, len(payloads), options['batch_size']):
+            GamificationEvents.apply_batch(payloads[offset:offset + options['batch_size']])
+        results['batched'] = time.perf_counter() - started
+
+        # End to end through the in-process queue: publish, then wait for the consumer
+        users = groups['queued']
+        GamificationEvents.set_queue(InMemoryEventQueue(
+            GamificationEvents.apply_batch,
+            batch_size=options['batch_size'],
+            batch_window=0.05
+        ))
+        started = time.perf_counter()
+        for index, action_type in events:
+            GamificationEvents.publish(users[index], action_type)
+        published = time.perf_counter() - started
+        GamificationEvents.drain()
+        results['queued'] = time.perf_counter() - started
+
+        for name, elapsed in results.items():
+            self.stdout.write(
+                f"{name:12} {len(events) / elapsed:10.0f} events/s  "
+                f"{results['one by one'] / elapsed:5.2f}x"
+            )
+        self.stdout.write(f"publish only {len(events) / published:10.0f} events/s (request path)")
+
+        totals = {
+            name: sorted(GamificationService.get_user_xp(user) for user in users)
+            for name, users in groups.items()
+        }
+        if not totals['sync'] == totals['batched'] == totals['queued']:
+            raise CommandError('Batched XP totals differ from applying events one by one')
+        ledger = XPLedgerEntry.objects.filter(user__in=groups['queued']).count()
+        if ledger != len(events):
+            raise CommandError(f"Queued run wrote {ledger} ledger entries for {len(events)} events")
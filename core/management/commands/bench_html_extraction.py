@@ -0,0 +1,109 @@
+import os
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.content_scraper import ContentScraper
+
+SAMPLE_WORDS = (
+    'array stack queue tree graph node pointer memory index key value hash '
+    'algorithm complexity sorting search binary recursion dynamic programming'
+).split()
+
+# Page chrome shared by the synthetic pages: heavy navigation, sidebars and
+# scripts around the article, as on the real tutorial sites
+CHROME = '''<header><div class="logo">Logo</div><nav>{nav}</nav></header>
+<script>window.dataLayer = window.dataLayer || []; {script}</script>
+<style>.x {{ color: red; }}</style>
+<aside class="sidebar"><ul>{sidebar}</ul></aside>'''
+
+LAYOUTS = {
+    'geeksforgeeks.org': '<div class="main_wrapper"><article><h1>{title}</h1>{body}</article>'
+                         '<div class="related"><a href="/r">Related</a></div></div>',
+    'javatpoint.com': '<table><tr><td><div id="city" class="content"><h1>{title}</h1>{body}</div></td></tr></table>',
+    'tutorialspoint.com': '<div id="mainContent" class="tutorial-content main-content"><h1>{title}</h1>{body}</div>',
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare webpage extraction backends for speed and identical output'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', help='Directory of saved pages laid out as <domain>/<name>.html')
+        parser.add_argument('--pages', type=int, default=30, help='Synthetic pages per supported domain')
+        parser.add_argument('--paragraphs', type=int, default=150, help='Paragraphs per synthetic page')
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def synthetic_corpus(self, pages, paragraphs, seed):
+        rng = random.Random(seed)
+
+        def sentence():
+            return ' '.join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(6, 18))).capitalize() + '.'
+
+        corpus = []
+        for domain, layout in LAYOUTS.items():
+            for i in range(pages):
+                body = ''.join(
+                    f"<h2>Section {p}</h2><p>{sentence()} <b>{rng.choice(SAMPLE_WORDS)}</b> {sentence()}</p>"
+                    f"<pre><code>for x in range({p}): print(x)</code></pre>"
+                    if p % 5 == 0 else f"<p>{sentence()} {sentence()}</p>"
+                    for p in range(paragraphs)
+                )
+                chrome = CHROME.format(
+                    nav=''.join(f'<a href="/t{n}">Topic {n}</a>' for n in range(150)),
+                    script='var x = "<div>";' * 50,
+                    sidebar=''.join(f'<li><a href="/s{n}">Side {n}</a></li>' for n in range(100))
+                )
+                html = (f"<!DOCTYPE html><html><head><title>{domain} &amp; page {i}</title></head><body>"
+                        f"{chrome}{layout.format(title=f'Page {i}', body=body)}"
+                        f"<footer>Copyright</footer><script>track();</script></body></html>")
+                corpus.append((f"https://www.{domain}/page-{i}/", html))
+        return corpus
+
+    def load_corpus(self, directory):
+        corpus = []
+        for domain in sorted(os.listdir(directory)):
+            domain_dir = os.path.join(directory, domain)
+            if not os.path.isdir(domain_dir):
+                continue
+            for name in sorted(os.listdir(domain_dir)):
+                if name.endswith('.html'):
+                    with open(os.path.join(domain_dir, name), encoding='utf-8', errors='replace') as handle:
+                        corpus.append((f"https://www.{domain}/{name[:-5]}/", handle.read()))
+        if not corpus:
+            raise CommandError(f"No <domain>/<name>.html files found in {directory}")
+        return corpus
+
+    def handle(self, *args, **options):
+        if options['corpus']:
+            corpus = self.load_corpus(options['corpus'])
+        else:
+            corpus = self.synthetic_corpus(options['pages'], options['paragraphs'], options['seed'])
+        size = sum(len(html) for _, html in corpus)
+        self.stdout.write(f"Corpus: {len(corpus)} pages, {size / 1024 / 1024:.1f} MB")
+
+        reference = [ContentScraper.parse_webpage(html, url=url, backend='html.parser') for url, html in corpus]
+        baseline = None
+        for backend in ContentScraper.WEBPAGE_BACKENDS:
+            mismatches = [
+                url for (url, html), expected in zip(corpus, reference)
+                if ContentScraper.parse_webpage(html, url=url, backend=backend) != expected
+            ]
+
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                for url, html in corpus:
+                    ContentScraper.parse_webpage(html, url=url, backend=backend)
+                timings.append(time.perf_counter() - started)
+            per_page = min(timings) / len(corpus) * 1000
+            baseline = baseline or per_page
+
+            self.stdout.write(
+                f"{backend:12} {per_page:8.2f} ms/page  {baseline / per_page:5.2f}x  "
+                f"{'identical output' if not mismatches else f'{len(mismatches)} MISMATCHES'}"
+            )
+            for url in mismatches[:5]:
+                self.stderr.write(f"  differs: {url}")
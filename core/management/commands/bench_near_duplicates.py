@@ -0,0 +1,110 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.benchmarks import throwaway_database
+from core.models import ContentFingerprint, ScrapedContent
+from core.services.near_duplicates import MinHasher, NearDuplicateIndex
+
+SAMPLE_WORDS = (
+    'array stack queue tree graph node pointer memory index key value hash '
+    'important essential crucial algorithm complexity sorting search binary'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Measure near-duplicate lookup latency against a large fingerprint index (in a throwaway database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=100_000, help='Fingerprints in the index')
+        parser.add_argument('--lookups', type=int, default=200)
+        parser.add_argument('--scan-lookups', type=int, default=3,
+                            help='Lookups also timed as a scan over every stored signature')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def random_signature(self, rng, num_perm):
+        return [rng.getrandbits(32) for _ in range(num_perm)]
+
+    def near_copy(self, rng, signature, changed):
+        # A copy that differs in a ``changed`` fraction of positions, i.e. ~1 - changed similar
+        copy = list(signature)
+        for position in rng.sample(range(len(copy)), int(len(copy) * changed)):
+            copy[position] = rng.getrandbits(32)
+        return copy
+
+    def build_index(self, documents, rng, num_perm):
+        signatures = {}
+        batch_size = 5000
+        for offset in range(0, documents, batch_size):
+            rows = [
+                ScrapedContent(title='Near-duplicate bench', raw_content='', source_type='webpage')
+                for _ in range(min(batch_size, documents - offset))
+            ]
+            ScrapedContent.attach_blobs(rows)
+            ScrapedContent.objects.bulk_create(rows)
+            entries = [(row.pk, self.random_signature(rng, num_perm)) for row in rows]
+            NearDuplicateIndex.add_many(entries)
+            signatures.update(entries)
+        return signatures
+
+    def scan(self, signature, threshold):
+        # Baseline without LSH: compare against every stored signature
+        return [
+            scraped_content_id
+            for scraped_content_id, stored in ContentFingerprint.objects.values_list('scraped_content_id', 'signature')
+            if MinHasher.similarity(signature, NearDuplicateIndex.unpack(stored)) >= threshold
+        ]
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        settings = NearDuplicateIndex.get_settings()
+        num_perm, threshold = settings['NUM_PERM'], settings['THRESHOLD']
+
+        text = ' '.join(rng.choice(SAMPLE_WORDS) for _ in range(150_000))
+        started = time.perf_counter()
+        NearDuplicateIndex.signature(text)
+        self.stdout.write(f"Signature of a {len(text) / 1024 / 1024:.1f} MB document: "
+                          f"{(time.perf_counter() - started) * 1000:.0f} ms")
+
+        with throwaway_database():
+            started = time.perf_counter()
+            signatures = self.build_index(options['documents'], rng, num_perm)
+            self.stdout.write(f"Indexed {len(signatures)} fingerprints in {time.perf_counter() - started:.1f} s")
+
+            ids = list(signatures)
+            timings, misses = {'duplicate': [], 'new': []}, 0
+            for i in range(options['lookups']):
+                if i % 2:
+                    expected = rng.choice(ids)
+                    query, kind = self.near_copy(rng, signatures[expected], 0.05), 'duplicate'
+                else:
+                    expected, query, kind = None, self.random_signature(rng, num_perm), 'new'
+                started = time.perf_counter()
+                matches = NearDuplicateIndex.similar(query, threshold)
+                timings[kind].append(time.perf_counter() - started)
+                found = matches[0].scraped_content_id if matches else None
+                if found != expected:
+                    misses += 1
+
+            scans = []
+            for _ in range(options['scan_lookups']):
+                query = self.near_copy(rng, signatures[rng.choice(ids)], 0.05)
+                started = time.perf_counter()
+                self.scan(query, threshold)
+                scans.append(time.perf_counter() - started)
+
+        for kind, values in timings.items():
+            values = sorted(values)
+            if not values:
+                continue
+            self.stdout.write(
+                f"{kind:9} lookups: p50 {statistics.median(values) * 1000:6.2f} ms  "
+                f"p95 {values[int(len(values) * 0.95) - 1] * 1000:6.2f} ms  max {values[-1] * 1000:6.2f} ms"
+            )
+        if scans:
+            self.stdout.write(f"full scan lookups: {statistics.median(scans) * 1000:.0f} ms")
+        if misses:
+            raise CommandError(f"{misses} of {options['lookups']} lookups returned the wrong document")
+        self.stdout.write(self.style.SUCCESS('Every lookup found exactly the expected document.'))
@@ -0,0 +1,62 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.content_processor import ContentProcessor
+
+SAMPLE_WORDS = (
+    'array stack queue tree graph node pointer memory index key value hash '
+    'important essential crucial algorithm complexity sorting search binary'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ContentProcessor with a shared DocumentIndex against per-stage re-scanning'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, default=4.0, help='Size of the synthetic document')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per variant; the best is reported')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def build_document(self, size_bytes, seed):
+        rng = random.Random(seed)
+        paragraphs, size = [], 0
+        while size < size_bytes:
+            sentences = [
+                ' '.join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(6, 24))).capitalize() + rng.choice('.!?')
+                for _ in range(rng.randint(3, 8))
+            ]
+            paragraph = f"{rng.choice(SAMPLE_WORDS)}: " + ' '.join(sentences)
+            paragraphs.append(paragraph)
+            size += len(paragraph) + 2
+        return '\n\n'.join(paragraphs)
+
+    def per_stage(self, content):
+        # Each stage gets raw text and builds its own view of it, as before
+        ContentProcessor.generate_summary(content)
+        ContentProcessor.generate_eli5(content)
+        ContentProcessor.extract_key_concepts(content)
+        ContentProcessor.generate_quiz_questions(content)
+        ContentProcessor.generate_study_milestones(content)
+        ContentProcessor.extract_bookmarked_insights(content)
+        ContentProcessor.estimate_study_duration(content)
+
+    def best_of(self, func, content, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(content)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def handle(self, *args, **options):
+        content = self.build_document(int(options['size_mb'] * 1024 * 1024), options['seed'])
+        self.stdout.write(f"Document: {len(content) / 1024 / 1024:.1f} MB, {len(content.split())} words")
+
+        per_stage = self.best_of(self.per_stage, content, options['repeat'])
+        shared = self.best_of(lambda text: ContentProcessor.process_content(text, 'bench'), content, options['repeat'])
+
+        self.stdout.write(f"Per-stage scanning: {per_stage * 1000:.1f} ms")
+        self.stdout.write(f"Shared index:       {shared * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {per_stage / shared:.2f}x"))
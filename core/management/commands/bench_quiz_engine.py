@@ -0,0 +1,107 @@
+import json
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.management.benchmarks import throwaway_database
+from core.models import Question, Quiz
+from core.services.quiz_engine import QuizEngine
+
+# Query budgets: serving reads the quiz and its questions on a cache miss and
+# nothing once cached; grading is in memory and recording is one upsert
+COLD_SERVE_BUDGET = 2
+WARM_SERVE_BUDGET = 0
+SUBMIT_BUDGET = 1
+
+
+class Command(BaseCommand):
+    help = ('Measure quiz questions served/sec and submissions graded/sec, and check query budgets '
+            '(in a throwaway database)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=20, help='Questions on the benchmark quiz')
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def make_quiz(self, count):
+        quiz = Quiz.objects.create(title='Quiz engine bench', description='Throwaway')
+        Question.objects.bulk_create([
+            Question(
+                quiz=quiz,
+                text=f'Question {i}?',
+                correct_answer=f'Answer {i}',
+                option1=f'Answer {i}',
+                option2=f'Wrong {i}a',
+                option3=f'Wrong {i}b',
+                option4=f'Wrong {i}c'
+            )
+            for i in range(count)
+        ])
+        return quiz
+
+    def naive_payload(self, quiz_id, seed):
+        # What a straightforward view would do: read, shuffle and serialize per request
+        quiz = Quiz.objects.prefetch_related('questions').get(pk=quiz_id)
+        rng = random.Random(f"{quiz_id}:{seed}")
+        questions = []
+        for question in quiz.questions.all():
+            options = QuizEngine.options(question)
+            rng.shuffle(options)
+            questions.append({'id': question.id, 'text': question.text, 'options': options})
+        return json.dumps({'id': quiz.id, 'title': quiz.title, 'description': quiz.description,
+                           'seed': seed, 'questions': questions})
+
+    def check_budgets(self, quiz_id, user):
+        QuizEngine.invalidate(quiz_id)
+        with CaptureQueriesContext(connection) as cold:
+            payload = QuizEngine.payload(quiz_id, seed=1)
+        with CaptureQueriesContext(connection) as warm:
+            QuizEngine.payload(quiz_id, seed=2)
+
+        quiz = json.loads(payload)
+        if payload != self.naive_payload(quiz_id, 1):
+            raise CommandError('Cached payload differs from a freshly serialized one')
+        key = QuizEngine.compiled(quiz_id)['answers']
+        answers = {str(question['id']): key[str(question['id'])] for question in quiz['questions']}
+        # The XP event is published on commit and applied by the event consumer, outside the budget
+        with transaction.atomic(), CaptureQueriesContext(connection) as submit:
+            result = QuizEngine.submit(user, quiz_id, answers)
+        if result.score != 100:
+            raise CommandError(f"Correct answers scored {result.score}%")
+
+        for label, queries, budget in (('cold serve', cold, COLD_SERVE_BUDGET),
+                                       ('warm serve', warm, WARM_SERVE_BUDGET),
+                                       ('submit', submit, SUBMIT_BUDGET)):
+            if len(queries) > budget:
+                for query in queries.captured_queries:
+                    self.stderr.write(f"  {query['sql']}")
+                raise CommandError(f"{label} ran {len(queries)} queries; budget is {budget}")
+        return quiz, answers
+
+    def rate(self, run, requests):
+        started = time.perf_counter()
+        for seed in range(requests):
+            run(seed)
+        return requests / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        with throwaway_database():
+            user = User.objects.create_user(username='bench-quiz-engine')
+            quiz_id = self.make_quiz(options['questions']).id
+
+            quiz, answers = self.check_budgets(quiz_id, user)
+            questions = len(quiz['questions'])
+
+            naive = self.rate(lambda seed: self.naive_payload(quiz_id, seed), requests)
+            cached = self.rate(lambda seed: QuizEngine.payload(quiz_id, seed), requests)
+            graded = self.rate(lambda seed: QuizEngine.grade(quiz_id, answers), requests)
+
+        self.stdout.write(f"{questions} questions per quiz, {requests} requests each")
+        self.stdout.write(f"naive   {naive * questions:12,.0f} questions/s  {naive:10,.0f} quizzes/s")
+        self.stdout.write(f"cached  {cached * questions:12,.0f} questions/s  {cached:10,.0f} quizzes/s")
+        self.stdout.write(f"grading {graded * questions:12,.0f} answers/s    {graded:10,.0f} submissions/s")
+        self.stdout.write(self.style.SUCCESS('Query budgets respected.'))
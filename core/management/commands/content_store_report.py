@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from core.models import ContentBlob, ScrapedContent
+
+
+def _mb(size):
+    return f"{(size or 0) / 1024 / 1024:.1f} MB"
+
+
+class Command(BaseCommand):
+    help = 'Report how much space deduplication and compression save for scraped content'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete blobs no ScrapedContent refers to any more')
+
+    def handle(self, *args, **options):
+        logical = ScrapedContent.objects.aggregate(rows=Count('id'), size=Sum('blob__size'))
+        unique = ContentBlob.objects.aggregate(blobs=Count('content_hash'), size=Sum('size'), stored=Sum('stored_size'))
+        logical_size, unique_size, stored_size = logical['size'] or 0, unique['size'] or 0, unique['stored'] or 0
+
+        self.stdout.write(f"{logical['rows']} scraped documents: {_mb(logical_size)} of text")
+        self.stdout.write(f"{unique['blobs']} distinct texts: {_mb(unique_size)} (deduplication saves {_mb(logical_size - unique_size)})")
+        self.stdout.write(f"Stored compressed: {_mb(stored_size)} (compression saves {_mb(unique_size - stored_size)})")
+        for codec, blobs in ContentBlob.objects.values_list('codec').annotate(Count('content_hash')).order_by('codec'):
+            self.stdout.write(f"  {codec}: {blobs} blobs")
+        if logical_size:
+            self.stdout.write(self.style.SUCCESS(f"Stored size is {100 * stored_size / logical_size:.1f}% of the text."))
+
+        if options['prune']:
+            deleted = ContentBlob.delete_unreferenced()
+            self.stdout.write(f"Deleted {deleted} unreferenced blobs.")
+        else:
+            orphans = ContentBlob.objects.filter(scraped_contents__isnull=True).count()
+            self.stdout.write(f"{orphans} unreferenced blobs (remove with --prune).")
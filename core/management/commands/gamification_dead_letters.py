@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.services.gamification_events import GamificationEvents
+
+
+class Command(BaseCommand):
+    help = 'List gamification events that could not be applied, or publish them again'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requeue', action='store_true', help='Publish every dead-lettered event again')
+
+    def handle(self, *args, **options):
+        if options['requeue']:
+            requeued = GamificationEvents.requeue_dead_letters()
+            self.stdout.write(self.style.SUCCESS(f"Requeued {requeued} events."))
+            return
+
+        dead_letters = GamificationEvents.dead_letters()
+        for record in dead_letters:
+            event = record['event']
+            self.stdout.write(
+                f"user {event.get('user_id')} {event.get('action_type')} +{event.get('amount')} "
+                f"(key {event.get('idempotency_key')}): {record['error']}"
+            )
+        if not dead_letters:
+            self.stdout.write(self.style.SUCCESS('No dead-lettered events.'))
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(dead_letters)} dead-lettered events."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.services.leaderboard import Leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the global, per-material and weekly leaderboards from the XP ledger'
+
+    def handle(self, *args, **options):
+        boards = Leaderboard.rebuild()
+        for board, members in sorted(boards.items()):
+            self.stdout.write(f"{board}: {members} users")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(boards)} leaderboards."))
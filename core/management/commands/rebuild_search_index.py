@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.services.search import SearchIndex
+
+
+class Command(BaseCommand):
+    help = 'Recreate the search documents for every note, study material and past paper'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counts = SearchIndex.rebuild()
+        for kind, indexed in sorted(counts.items()):
+            self.stdout.write(f"{kind}: {indexed} documents")
+        self.stdout.write(self.style.SUCCESS(f"Indexed {sum(counts.values())} documents."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.services.gamification import GamificationService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-user XP totals from the XP ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted totals without fixing them')
+
+    def handle(self, *args, **options):
+        drift = GamificationService.reconcile_xp_totals(dry_run=options['dry_run'])
+        for user_id, totals in sorted(drift.items()):
+            self.stdout.write(f"user {user_id}: stored {totals['stored']} XP, ledger {totals['ledger']} XP")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All XP totals match the ledger.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} totals drifted (dry run, nothing changed)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(drift)} XP totals from the ledger."))
@@ -0,0 +1,54 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.models import ScrapedContent
+from core.services.refresher import MaterialRefresher, RefreshResult
+
+
+class Command(BaseCommand):
+    help = 'Re-scrape stale web pages and update their study materials in place (run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-after-days', type=float, default=None,
+                            help="Refresh pages not checked for this long (default: CONTENT_REFRESH['STALE_AFTER_DAYS'])")
+        parser.add_argument('--limit', type=int, default=None, help='Refresh at most this many pages')
+        parser.add_argument('--page', type=int, action='append', dest='pages',
+                            help='Refresh this ScrapedContent id whatever its age (repeatable)')
+
+    def handle(self, *args, **options):
+        if options['pages']:
+            pages = ScrapedContent.objects.filter(pk__in=options['pages']).order_by('id')
+        else:
+            stale_after = options['stale_after_days']
+            pages = MaterialRefresher.stale(timedelta(days=stale_after) if stale_after is not None else None)
+        # Ids up front: a page that fails keeps its checked_at and would otherwise come round again
+        ids = list(pages.values_list('id', flat=True)[:options['limit']])
+
+        statuses, failed = Counter(), 0
+        for scraped_content in ScrapedContent.objects.filter(pk__in=ids).order_by('checked_at', 'id').iterator():
+            try:
+                result = MaterialRefresher.refresh(scraped_content)
+            except Exception as e:
+                # A network error or a page the parser chokes on must not stop the run
+                failed += 1
+                self.stderr.write(f"  {scraped_content.url}: {e}")
+                continue
+
+            statuses[result.status] += 1
+            if result.status == RefreshResult.UPDATED:
+                rows = ', '.join(
+                    f"{table} {kept} kept/{added} added/{removed} removed"
+                    for table, (kept, added, removed) in sorted(result.rows.items())
+                )
+                self.stdout.write(
+                    f"{scraped_content.url}: {result.segments_changed} sentences changed, "
+                    f"re-ran {', '.join(result.stages)}" + (f"; {rows}" if rows else '')
+                )
+
+        self.stdout.write(
+            f"Checked {len(ids)} pages: {statuses[RefreshResult.UPDATED]} updated, "
+            f"{statuses[RefreshResult.UNCHANGED]} unchanged, "
+            f"{statuses[RefreshResult.NOT_MODIFIED]} not modified, {failed} failed."
+        )
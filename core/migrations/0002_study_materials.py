@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:53
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Badge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('icon_url', models.URLField()),
+                ('xp_requirement', models.IntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScrapedContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField()),
+                ('title', models.CharField(max_length=200)),
+                ('raw_content', models.TextField()),
+                ('source_type', models.CharField(choices=[('webpage', 'Web Page'), ('pdf', 'PDF Document')], max_length=50)),
+                ('scraped_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudyMaterial',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('summary', models.TextField()),
+                ('eli5_explanation', models.TextField(help_text="Explain Like I'm 5 version")),
+                ('study_duration', models.IntegerField(help_text='Estimated study duration in minutes')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('scraped_content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.scrapedcontent')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='KeyConcept',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('concept', models.CharField(max_length=200)),
+                ('definition', models.TextField()),
+                ('study_material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='key_concepts', to='core.studymaterial')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BookmarkedInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField()),
+                ('importance_level', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('study_material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.studymaterial')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudyMilestone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('order', models.IntegerField()),
+                ('xp_reward', models.IntegerField()),
+                ('study_material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='milestones', to='core.studymaterial')),
+            ],
+            options={
+                'ordering': ['order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserBadge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('earned_at', models.DateTimeField(auto_now_add=True)),
+                ('badge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.badge')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'badge')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed', models.BooleanField()),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('xp_earned', models.IntegerField()),
+                ('milestone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.studymilestone')),
+                ('study_material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.studymaterial')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'study_material', 'milestone')},
+            },
+        ),
+    ]
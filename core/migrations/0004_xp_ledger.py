@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_ledger(apps, schema_editor):
+    """Seed the ledger from the XP already recorded on UserProgress rows."""
+    UserProgress = apps.get_model('core', 'UserProgress')
+    XPLedgerEntry = apps.get_model('core', 'XPLedgerEntry')
+    UserXP = apps.get_model('core', 'UserXP')
+
+    progress = UserProgress.objects.filter(xp_earned__gt=0).iterator(chunk_size=2000)
+    batch = []
+    for row in progress:
+        batch.append(XPLedgerEntry(
+            user_id=row.user_id,
+            action_type='complete_milestone',
+            amount=row.xp_earned,
+            study_material_id=row.study_material_id,
+            milestone_id=row.milestone_id
+        ))
+        if len(batch) >= 2000:
+            XPLedgerEntry.objects.bulk_create(batch)
+            batch = []
+    XPLedgerEntry.objects.bulk_create(batch)
+
+    totals = XPLedgerEntry.objects.values('user_id').annotate(total=Sum('amount'))
+    UserXP.objects.bulk_create(
+        [UserXP(user_id=row['user_id'], total_xp=row['total']) for row in totals],
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0003_ingestionjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserXP',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='xp_total', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_xp', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='XPLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action_type', models.CharField(max_length=50)),
+                ('amount', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('milestone', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.studymilestone')),
+                ('study_material', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.studymaterial')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='xp_ledger', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_xp_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='badge',
+            index=models.Index(fields=['xp_requirement'], name='badge_xp_requirement_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', '-updated_at'], name='note_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pastpaper',
+            index=models.Index(fields=['subject', 'year'], name='pastpaper_subject_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprogress',
+            index=models.Index(fields=['user', 'completed'], name='userprogress_user_done_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='badge',
+            constraint=models.CheckConstraint(condition=models.Q(('xp_requirement__gte', 0)), name='badge_xp_requirement_gte_0'),
+        ),
+        migrations.AddConstraint(
+            model_name='userprogress',
+            constraint=models.CheckConstraint(condition=models.Q(('xp_earned__gte', 0)), name='userprogress_xp_earned_gte_0'),
+        ),
+    ]
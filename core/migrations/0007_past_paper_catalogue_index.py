@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pastpaper',
+            name='pastpaper_subject_year_idx',
+        ),
+        migrations.AddIndex(
+            model_name='pastpaper',
+            index=models.Index(fields=['subject', '-year', '-id'], name='pastpaper_catalogue_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# External-content FTS5 table over core_searchdocument; the triggers keep it in
+# step with every INSERT, UPDATE and DELETE, including bulk ORM writes
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE core_searchdocument_fts USING fts5(
+        title, body,
+        content='core_searchdocument', content_rowid='id',
+        tokenize='porter unicode61', prefix='2 3'
+    )""",
+    """CREATE TRIGGER core_searchdocument_fts_insert AFTER INSERT ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER core_searchdocument_fts_delete AFTER DELETE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER core_searchdocument_fts_update AFTER UPDATE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO core_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS core_searchdocument_fts_insert',
+    'DROP TRIGGER IF EXISTS core_searchdocument_fts_delete',
+    'DROP TRIGGER IF EXISTS core_searchdocument_fts_update',
+    'DROP TABLE IF EXISTS core_searchdocument_fts',
+]
+
+# Titles weigh more than bodies when ranking
+POSTGRES_FORWARD = [
+    """ALTER TABLE core_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED""",
+    'CREATE INDEX core_searchdocument_vector_idx ON core_searchdocument USING GIN (search_vector)',
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS core_searchdocument_vector_idx',
+    'ALTER TABLE core_searchdocument DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD})
+
+
+def drop_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_past_paper_catalogue_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('note', 'Note'), ('material', 'Study Material'), ('past_paper', 'Past Paper')], max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField()),
+                ('url', models.CharField(max_length=500)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_search_documents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='study_material',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='quizzes', to='core.studymaterial'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_quiz_study_material'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentFingerprint',
+            fields=[
+                ('scraped_content', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='core.scrapedcontent')),
+                ('signature', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContentFingerprintBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField()),
+                ('fingerprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='core.contentfingerprint')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='fingerprint_band_bucket_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:41
+
+import hashlib
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 200
+
+
+def compress_existing(apps, schema_editor):
+    """Move every raw_content into a zlib-compressed, hash-keyed ContentBlob."""
+    ScrapedContent = apps.get_model('core', 'ScrapedContent')
+    ContentBlob = apps.get_model('core', 'ContentBlob')
+
+    rows_done = text_bytes = 0
+    last_id = 0
+    while True:
+        rows = list(
+            ScrapedContent.objects.filter(id__gt=last_id).order_by('id').only('id', 'raw_content')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+
+        blobs = {}
+        for row in rows:
+            raw = row.raw_content.encode('utf-8')
+            row.blob_id = hashlib.sha256(raw).hexdigest()
+            text_bytes += len(raw)
+            if row.blob_id not in blobs:
+                data = zlib.compress(raw, 6)
+                blobs[row.blob_id] = ContentBlob(
+                    content_hash=row.blob_id, codec='zlib', data=data, size=len(raw), stored_size=len(data)
+                )
+        ContentBlob.objects.bulk_create(blobs.values(), ignore_conflicts=True)
+        ScrapedContent.objects.bulk_update(rows, ['blob'])
+
+        rows_done += len(rows)
+        last_id = rows[-1].id
+
+    if rows_done:
+        stored = ContentBlob.objects.aggregate(total=models.Sum('stored_size'))['total'] or 0
+        print(
+            f"\n  Compressed {rows_done} ScrapedContent rows: {text_bytes / 1024 / 1024:.1f} MB of text "
+            f"now stored as {stored / 1024 / 1024:.1f} MB in {ContentBlob.objects.count()} blobs"
+        )
+
+
+def restore_raw_content(apps, schema_editor):
+    ScrapedContent = apps.get_model('core', 'ScrapedContent')
+
+    last_id = 0
+    while True:
+        rows = list(ScrapedContent.objects.filter(id__gt=last_id).order_by('id').select_related('blob')[:BATCH_SIZE])
+        if not rows:
+            break
+        for row in rows:
+            # zstd blobs need zstandard installed; the forward migration only writes zlib
+            if row.blob.codec == 'zstd':
+                import zstandard
+                row.raw_content = zstandard.ZstdDecompressor().decompress(bytes(row.blob.data)).decode('utf-8')
+            else:
+                row.raw_content = zlib.decompress(bytes(row.blob.data)).decode('utf-8')
+        ScrapedContent.objects.bulk_update(rows, ['raw_content'])
+        last_id = rows[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_content_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('content_hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('codec', models.CharField(choices=[('zlib', 'zlib'), ('zstd', 'Zstandard')], max_length=10)),
+                ('data', models.BinaryField()),
+                ('size', models.BigIntegerField()),
+                ('stored_size', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='scrapedcontent',
+            name='blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='scraped_contents', to='core.contentblob'),
+        ),
+        migrations.RunPython(compress_existing, restore_raw_content),
+        # A default lets the reverse migration re-add the column before restoring its text
+        migrations.AlterField(
+            model_name='scrapedcontent',
+            name='raw_content',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='scrapedcontent',
+            name='raw_content',
+        ),
+        migrations.AlterField(
+            model_name='scrapedcontent',
+            name='blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='scraped_contents', to='core.contentblob'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def checked_when_scraped(apps, schema_editor):
+    # Existing pages were last checked when they were scraped, so they age from then
+    ScrapedContent = apps.get_model('core', 'ScrapedContent')
+    ScrapedContent.objects.update(checked_at=models.F('scraped_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_content_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapedcontent',
+            name='checked_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(checked_when_scraped, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='scrapedcontent',
+            name='etag',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='scrapedcontent',
+            name='last_modified',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='scrapedcontent',
+            index=models.Index(fields=['url'], name='scrapedcontent_url_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scrapedcontent',
+            index=models.Index(fields=['source_type', 'checked_at'], name='scrapedcontent_checked_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_scraped_content_refresh'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprogress',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='userprogress',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='unique_progress_idempotency_key'),
+        ),
+    ]
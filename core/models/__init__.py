@@ -8,12 +8,22 @@ class PastPaper(models.Model):
     file_url = models.URLField()
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Matches the catalogue's keyset ordering, so every page is an index range read
+            models.Index(fields=['subject', '-year', '-id'], name='pastpaper_catalogue_idx'),
+        ]
+
     def __str__(self):
         return f"{self.subject} - {self.year} - {self.title}"
 
 class Quiz(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
+    # Set for quizzes generated from a study material
+    study_material = models.ForeignKey(
+        'core.StudyMaterial', on_delete=models.CASCADE, null=True, blank=True, related_name='quizzes'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -34,6 +44,7 @@ class Question(models.Model):
 class Progress(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
+    # Percentage of questions answered correctly in the latest attempt
     score = models.IntegerField()
     completed_at = models.DateTimeField(auto_now_add=True)
 
@@ -47,5 +58,27 @@ class Note(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-updated_at'], name='note_user_updated_idx'),
+        ]
+
     def __str__(self):
-        return str(self.title)[:50]
\ No newline at end of file
+        return str(self.title)[:50]
+
+from .content_blobs import ContentBlob
+from .study_materials import (
+    ScrapedContent,
+    StudyMaterial,
+    KeyConcept,
+    StudyMilestone,
+    BookmarkedInsight,
+    UserProgress,
+    Badge,
+    UserBadge,
+    XPLedgerEntry,
+    UserXP
+)
+from .jobs import IngestionJob
+from .search import SearchDocument
+from .fingerprints import ContentFingerprint, ContentFingerprintBand
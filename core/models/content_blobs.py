@@ -0,0 +1,110 @@
+from typing import Dict, Iterable, Optional
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, transaction
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
+DEFAULT_SETTINGS = {
+    'CODEC': 'zlib',
+    'LEVEL': 6,
+}
+
+class ContentBlob(models.Model):
+    """Compressed text shared by every ScrapedContent with the same content.
+
+    Keyed by the SHA-256 of the text, so uploading the same document twice
+    stores it once. The codec is recorded per blob, so changing
+    CONTENT_STORE['CODEC'] only affects blobs written afterwards.
+    """
+    CODEC_ZLIB = 'zlib'
+    CODEC_ZSTD = 'zstd'
+
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    codec = models.CharField(max_length=10, choices=[
+        (CODEC_ZLIB, 'zlib'),
+        (CODEC_ZSTD, 'Zstandard')
+    ])
+    data = models.BinaryField()
+    # Bytes of UTF-8 text before and after compression, for space reports
+    size = models.BigIntegerField()
+    stored_size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.content_hash[:12]} ({self.size} -> {self.stored_size} bytes)"
+
+    @staticmethod
+    def get_settings() -> Dict:
+        return {**DEFAULT_SETTINGS, **getattr(settings, 'CONTENT_STORE', {})}
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def compress(cls, raw: bytes):
+        options = cls.get_settings()
+        if options['CODEC'] == cls.CODEC_ZSTD:
+            if zstandard is None:
+                raise ImproperlyConfigured("CONTENT_STORE['CODEC'] is 'zstd' but zstandard is not installed")
+            return cls.CODEC_ZSTD, zstandard.ZstdCompressor(level=options['LEVEL']).compress(raw)
+        return cls.CODEC_ZLIB, zlib.compress(raw, options['LEVEL'])
+
+    @property
+    def text(self) -> str:
+        data = bytes(self.data)
+        if self.codec == self.CODEC_ZSTD:
+            if zstandard is None:
+                raise ImproperlyConfigured('This blob is zstd-compressed but zstandard is not installed')
+            return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+        return zlib.decompress(data).decode('utf-8')
+
+    @classmethod
+    def build(cls, text: str) -> 'ContentBlob':
+        raw = text.encode('utf-8')
+        codec, data = cls.compress(raw)
+        return cls(
+            content_hash=hashlib.sha256(raw).hexdigest(),
+            codec=codec,
+            data=data,
+            size=len(raw),
+            stored_size=len(data)
+        )
+
+    @classmethod
+    def store_many(cls, texts: Iterable[str]) -> Dict[str, str]:
+        """Store each distinct text once, skipping stored ones; returns {text: content hash}."""
+        hashes, missing = {}, {}
+        for text in texts:
+            if text not in hashes:
+                hashes[text] = cls.hash_text(text)
+        existing = set(cls.objects.filter(content_hash__in=set(hashes.values())).values_list('content_hash', flat=True))
+        for text, content_hash in hashes.items():
+            if content_hash not in existing and content_hash not in missing:
+                missing[content_hash] = cls.build(text)
+        # A concurrent writer may store the same blob first; either copy is identical
+        cls.objects.bulk_create(missing.values(), batch_size=100, ignore_conflicts=True)
+        return hashes
+
+    @classmethod
+    def delete_unreferenced(cls, hashes: Optional[Iterable[str]] = None) -> int:
+        """Delete blobs no ScrapedContent points at, optionally only among ``hashes``; returns how many.
+
+        Candidates are locked and re-checked in the DELETE's transaction, so a
+        blob a concurrent ingestion has just reused for its new row is kept.
+        """
+        referencing = cls._meta.get_field('scraped_contents').related_model.objects.filter(blob=models.OuterRef('pk'))
+        orphans = cls.objects.filter(~models.Exists(referencing))
+        if hashes is not None:
+            orphans = orphans.filter(pk__in=list(hashes))
+        with transaction.atomic():
+            locked = list(orphans.select_for_update().values_list('pk', flat=True))
+            deleted, _ = orphans.filter(pk__in=locked).delete()
+        return deleted
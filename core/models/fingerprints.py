@@ -0,0 +1,26 @@
+from django.db import models
+
+from .study_materials import ScrapedContent
+
+class ContentFingerprint(models.Model):
+    """MinHash signature of one ScrapedContent's text, for near-duplicate lookups."""
+    scraped_content = models.OneToOneField(
+        ScrapedContent, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint'
+    )
+    # NUM_PERM little-endian uint32 minimum hashes
+    signature = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"Fingerprint of {self.scraped_content_id}"
+
+class ContentFingerprintBand(models.Model):
+    """One LSH band of a fingerprint; documents sharing any bucket are candidates."""
+    fingerprint = models.ForeignKey(ContentFingerprint, on_delete=models.CASCADE, related_name='bands')
+    # 64-bit hash of the band number and that band's slice of the signature
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bucket'], name='fingerprint_band_bucket_idx'),
+        ]
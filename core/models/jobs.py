@@ -0,0 +1,57 @@
+import uuid
+
+from django.db import models
+from django.contrib.auth.models import User
+
+from .study_materials import ScrapedContent, StudyMaterial
+
+class IngestionJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_SCRAPING = 'scraping'
+    STATUS_PROCESSING = 'processing'
+    STATUS_PERSISTING = 'persisting'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    # Rough completion percentage reported once each stage has started
+    STAGE_PROGRESS = {
+        STATUS_QUEUED: 0,
+        STATUS_SCRAPING: 10,
+        STATUS_PROCESSING: 40,
+        STATUS_PERSISTING: 80,
+        STATUS_DONE: 100,
+        STATUS_FAILED: 100,
+    }
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Null for jobs started by the crawler rather than a user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    source_type = models.CharField(max_length=50, choices=[
+        ('webpage', 'Web Page'),
+        ('pdf', 'PDF Document')
+    ])
+    url = models.URLField(blank=True)
+    # Uploaded PDFs are written to default storage so any worker can read them
+    pdf_path = models.CharField(max_length=255, blank=True)
+    pdf_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, default=STATUS_QUEUED, choices=[
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_SCRAPING, 'Scraping'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_PERSISTING, 'Persisting'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed')
+    ])
+    progress = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    scraped_content = models.ForeignKey(ScrapedContent, on_delete=models.SET_NULL, null=True, blank=True)
+    study_material = models.ForeignKey(StudyMaterial, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    def __str__(self) -> str:
+        return f"{self.source_type} job {self.id} ({self.status})"
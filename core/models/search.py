@@ -0,0 +1,35 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+class SearchDocument(models.Model):
+    """One searchable row per indexed object.
+
+    The full-text index itself lives outside the ORM: an FTS5 table kept in
+    step by triggers on SQLite, a generated tsvector column with a GIN index
+    on PostgreSQL (see migration 0008).
+    """
+    KIND_NOTE = 'note'
+    KIND_MATERIAL = 'material'
+    KIND_PAST_PAPER = 'past_paper'
+    KIND_CHOICES = [
+        (KIND_NOTE, 'Note'),
+        (KIND_MATERIAL, 'Study Material'),
+        (KIND_PAST_PAPER, 'Past Paper')
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    # Set only for private documents (notes); public documents have no owner
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    title = models.CharField(max_length=200)
+    body = models.TextField()
+    url = models.CharField(max_length=500)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document')
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.object_id} {self.title}"
@@ -1,20 +1,67 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+
+from .content_blobs import ContentBlob
 
 class ScrapedContent(models.Model):
     url = models.URLField()
     title = models.CharField(max_length=200)
-    raw_content = models.TextField()
+    # The text lives compressed in a shared ContentBlob; read it through raw_content
+    blob = models.ForeignKey(ContentBlob, on_delete=models.PROTECT, related_name='scraped_contents')
     source_type = models.CharField(max_length=50, choices=[
         ('webpage', 'Web Page'),
         ('pdf', 'PDF Document')
     ])
     scraped_at = models.DateTimeField(auto_now_add=True)
+    # Validators from the last fetch, sent back when refreshing a web page
+    etag = models.CharField(max_length=200, blank=True, default='')
+    last_modified = models.CharField(max_length=100, blank=True, default='')
+    checked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['url'], name='scrapedcontent_url_idx'),
+            models.Index(fields=['source_type', 'checked_at'], name='scrapedcontent_checked_idx'),
+        ]
 
     def __str__(self) -> str:
         return str(self.title)
 
+    @property
+    def raw_content(self) -> str:
+        """Full extracted text, loaded and decompressed on first access."""
+        if getattr(self, '_raw_content', None) is None:
+            self._raw_content = self.blob.text if self.blob_id else ''
+        return self._raw_content
+
+    @raw_content.setter
+    def raw_content(self, text: str) -> None:
+        self._raw_content = text
+        self._raw_content_changed = True
+
+    def attach_blob(self) -> None:
+        """Point ``blob`` at the stored copy of text set through ``raw_content``."""
+        if getattr(self, '_raw_content_changed', False) or not self.blob_id:
+            self.blob_id = ContentBlob.store_many([self.raw_content])[self.raw_content]
+            self._raw_content_changed = False
+
+    def save(self, *args, **kwargs):
+        # One transaction, so --prune can't delete a reused blob before the row points at it
+        with transaction.atomic():
+            self.attach_blob()
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def attach_blobs(cls, rows) -> None:
+        """attach_blob for many unsaved rows with one blob lookup and insert, for bulk_create."""
+        pending = [row for row in rows if getattr(row, '_raw_content_changed', False) or not row.blob_id]
+        hashes = ContentBlob.store_many(row.raw_content for row in pending)
+        for row in pending:
+            row.blob_id = hashes[row.raw_content]
+            row._raw_content_changed = False
+
 class StudyMaterial(models.Model):
     scraped_content = models.ForeignKey(ScrapedContent, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
@@ -66,9 +113,19 @@ class UserProgress(models.Model):
     completed = models.BooleanField(null=False, default=models.NOT_PROVIDED)
     completed_at = models.DateTimeField(null=True, blank=True)
     xp_earned = models.IntegerField(null=False, default=models.NOT_PROVIDED)
+    # Key of the request that completed the milestone, so a retry finds its award
+    # before the XP event has reached the ledger
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
         unique_together = ['user', 'study_material', 'milestone']
+        indexes = [
+            models.Index(fields=['user', 'completed'], name='userprogress_user_done_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(xp_earned__gte=0), name='userprogress_xp_earned_gte_0'),
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='unique_progress_idempotency_key'),
+        ]
 
 class Badge(models.Model):
     name = models.CharField(max_length=100)
@@ -76,6 +133,14 @@ class Badge(models.Model):
     icon_url = models.URLField()
     xp_requirement = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['xp_requirement'], name='badge_xp_requirement_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(xp_requirement__gte=0), name='badge_xp_requirement_gte_0'),
+        ]
+
     def __str__(self) ->str:
         return str(self.name)
 
@@ -85,4 +150,32 @@ class UserBadge(models.Model):
     earned_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ['user', 'badge']
\ No newline at end of file
+        unique_together = ['user', 'badge']
+
+class XPLedgerEntry(models.Model):
+    """Append-only record of every XP award; UserXP totals are derived from it."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='xp_ledger')
+    action_type = models.CharField(max_length=50)
+    amount = models.IntegerField()
+    study_material = models.ForeignKey(StudyMaterial, on_delete=models.SET_NULL, null=True, blank=True)
+    milestone = models.ForeignKey(StudyMilestone, on_delete=models.SET_NULL, null=True, blank=True)
+    # Client-supplied key that lets a retried request find the award it already made
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='unique_xp_idempotency_key')
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} +{self.amount} ({self.action_type})"
+
+class UserXP(models.Model):
+    """Denormalised running XP total per user, kept in step with the ledger."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='xp_total')
+    total_xp = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.user_id}: {self.total_xp} XP"
@@ -0,0 +1,170 @@
+from typing import Any, Dict, List, Optional, Sequence
+from collections import defaultdict
+from dataclasses import dataclass, field
+import base64
+import binascii
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q, QuerySet
+from django.db.models.signals import post_delete, post_save
+
+from core.models import PastPaper, Quiz
+
+
+@dataclass
+class KeysetPage:
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """Cursor pagination that seeks past the last row instead of using OFFSET.
+
+    ``ordering`` must end in a unique field (normally ``id`` or ``-id``) so
+    every row has a distinct position. The cursor is the ordering values of
+    the last row on the page, so fetching page N costs the same as page 1.
+    """
+
+    def __init__(self, queryset: QuerySet, ordering: Sequence[str], page_size: int):
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = list(ordering)
+        self.fields = [name.lstrip('-') for name in ordering]
+        meta = self.queryset.model._meta
+        self.model_fields = [meta.pk if name == 'pk' else meta.get_field(name) for name in self.fields]
+        self.page_size = page_size
+
+    @staticmethod
+    def encode_cursor(values: Sequence) -> str:
+        # Dates and decimals go in as strings; decode_cursor parses them back
+        return base64.urlsafe_b64encode(json.dumps(list(values), default=str).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> List:
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValueError('Invalid page cursor.')
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise ValueError('Invalid page cursor.')
+        # Cursors come from clients; a tampered value must not reach the query as a wrong type
+        try:
+            return [self._coerce(model_field, value) for model_field, value in zip(self.model_fields, values)]
+        except ValidationError:
+            raise ValueError('Invalid page cursor.')
+
+    @staticmethod
+    def _coerce(model_field, value):
+        if value is None or isinstance(value, (bool, list, dict)):
+            raise ValidationError('Not a scalar value.')
+        value = model_field.to_python(value)
+        model_field.run_validators(value)
+        return value
+
+    def _after(self, values: Sequence) -> Q:
+        # (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z), with < for descending fields
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**{f"{self.fields[position]}__{lookup}": values[position]})
+            for earlier in range(position):
+                step &= Q(**{self.fields[earlier]: values[earlier]})
+            condition |= step
+        # Redundant with the OR above, but gives the planner a range to seek to in the index
+        first = self.ordering[0]
+        bound = Q(**{f"{self.fields[0]}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+        return bound & condition
+
+    def page(self, cursor: Optional[str] = None) -> KeysetPage:
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+
+        # One extra row tells us whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        items = rows[:self.page_size]
+        next_cursor = None
+        if len(rows) > self.page_size:
+            last = items[-1]
+            next_cursor = self.encode_cursor([getattr(last, name) for name in self.fields])
+        return KeysetPage(items=items, next_cursor=next_cursor)
+
+
+class PastPaperCatalogue:
+    """Filtered, keyset-paginated past papers with subject and year facets.
+
+    Facet counts come from one ``GROUP BY subject, year`` query that is cached
+    until a paper is saved or deleted; counts for any filter combination are
+    derived from it in Python.
+    """
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    ORDERING = ('subject', '-year', '-id')
+    FACETS_CACHE_KEY = 'past_paper_facets'
+    FACETS_CACHE_TTL = 10 * 60
+
+    @classmethod
+    def facet_rows(cls) -> List[Dict]:
+        rows = cache.get(cls.FACETS_CACHE_KEY)
+        if rows is None:
+            rows = list(
+                PastPaper.objects.order_by().values('subject', 'year').annotate(count=Count('id'))
+            )
+            cache.set(cls.FACETS_CACHE_KEY, rows, cls.FACETS_CACHE_TTL)
+        return rows
+
+    @classmethod
+    def invalidate_facets(cls, **kwargs) -> None:
+        cache.delete(cls.FACETS_CACHE_KEY)
+
+    @classmethod
+    def facets(cls, subject: Optional[str] = None, year: Optional[int] = None) -> Dict:
+        """Subject counts under the year filter, year counts under the subject filter."""
+        subjects, years = defaultdict(int), defaultdict(int)
+        total = 0
+        for row in cls.facet_rows():
+            if year is None or row['year'] == year:
+                subjects[row['subject']] += row['count']
+            if subject is None or row['subject'] == subject:
+                years[row['year']] += row['count']
+                if year is None or row['year'] == year:
+                    total += row['count']
+        return {
+            'subjects': [{'value': value, 'count': count} for value, count in sorted(subjects.items())],
+            'years': [{'value': value, 'count': count} for value, count in sorted(years.items(), reverse=True)],
+            'total': total
+        }
+
+    @classmethod
+    def page(cls, subject: Optional[str] = None, year: Optional[int] = None,
+             cursor: Optional[str] = None, page_size: Optional[int] = None) -> KeysetPage:
+        queryset = PastPaper.objects.all()
+        if subject:
+            queryset = queryset.filter(subject=subject)
+        if year is not None:
+            queryset = queryset.filter(year=year)
+        page_size = min(page_size or cls.PAGE_SIZE, cls.MAX_PAGE_SIZE)
+        return KeysetPaginator(queryset, cls.ORDERING, page_size).page(cursor)
+
+
+class QuizCatalogue:
+    """Newest-first, keyset-paginated quizzes."""
+    PAGE_SIZE = 30
+    MAX_PAGE_SIZE = 100
+    ORDERING = ('-id',)
+
+    @classmethod
+    def page(cls, cursor: Optional[str] = None, page_size: Optional[int] = None) -> KeysetPage:
+        page_size = min(page_size or cls.PAGE_SIZE, cls.MAX_PAGE_SIZE)
+        return KeysetPaginator(Quiz.objects.all(), cls.ORDERING, page_size).page(cursor)
+
+
+def connect_signals():
+    """Drop the cached facet counts when past papers change; called from CoreConfig.ready()."""
+    post_save.connect(PastPaperCatalogue.invalidate_facets, sender=PastPaper, dispatch_uid='past_paper_facets_save')
+    post_delete.connect(PastPaperCatalogue.invalidate_facets, sender=PastPaper, dispatch_uid='past_paper_facets_delete')
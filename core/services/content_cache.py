@@ -0,0 +1,301 @@
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+
+from core.models import ScrapedContent
+from core.services.content_scraper import ContentScraper
+
+DEFAULT_SETTINGS = {
+    'BACKEND': 'locmem',
+    'TTL': 24 * 60 * 60,
+    'MAX_ENTRIES': 256,
+    # Web pages younger than this are served without asking the origin
+    'REVALIDATE_AFTER': 10 * 60,
+    'REDIS_URL': 'redis://localhost:6379/1',
+    'KEY_PREFIX': 'examprep:content:',
+}
+
+# Query parameters that never change the content of a tutorial page. Matched
+# by exact name, so e.g. ``reference`` or ``refid`` are kept
+TRACKING_PARAMS = frozenset({
+    'ref', 'referrer', 'ref_src', 'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid',
+    'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+})
+TRACKING_PARAM_PREFIXES = ('utm_',)
+
+
+class LocalMemoryCacheBackend:
+    """Per-process LRU cache with a TTL on every entry."""
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return json.loads(value)
+
+    def set(self, key: str, value: Dict) -> None:
+        # Stored serialised so callers can't mutate cached entries in place
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, json.dumps(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCacheBackend:
+    """Redis-backed cache shared by every web and worker process.
+
+    Entries expire through Redis TTLs. A sorted set of last-access times
+    keeps the entry count under ``max_entries`` by evicting the least
+    recently used keys. ``client`` can be any object implementing the
+    handful of redis-py commands used here, so a local stand-in can replace
+    a real server in tests.
+    """
+
+    def __init__(self, ttl: int, max_entries: int, url: str = None,
+                 key_prefix: str = 'examprep:content:', client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.key_prefix = key_prefix
+        self.lru_key = f"{key_prefix}__lru__"
+
+    def get(self, key: str) -> Optional[Dict]:
+        value = self.client.get(self.key_prefix + key)
+        if value is None:
+            self.client.zrem(self.lru_key, key)
+            return None
+        self.client.zadd(self.lru_key, {key: time.time()})
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict) -> None:
+        self.client.set(self.key_prefix + key, json.dumps(value), ex=self.ttl)
+        self.client.zadd(self.lru_key, {key: time.time()})
+
+        overflow = self.client.zcard(self.lru_key) - self.max_entries
+        if overflow > 0:
+            evicted = [k.decode() if isinstance(k, bytes) else k
+                       for k in self.client.zrange(self.lru_key, 0, overflow - 1)]
+            if evicted:
+                self.client.delete(*[self.key_prefix + k for k in evicted])
+                self.client.zrem(self.lru_key, *evicted)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.key_prefix + key)
+        self.client.zrem(self.lru_key, key)
+
+
+class ContentCache:
+    """Cache of scraped text and processed results, keyed by source.
+
+    Web pages are keyed by their normalised URL and revalidated with
+    ETag/Last-Modified once they are older than ``REVALIDATE_AFTER``; PDFs are
+    keyed by the SHA-256 of their bytes. An entry holds the text's hash, not
+    the text: it remembers the ScrapedContent and StudyMaterial created from
+    it, and the text is read back from that ScrapedContent. Only the entry a
+    fetch has just scraped carries ``scraped['content']``, in memory.
+    """
+    _backend = None
+    _backend_lock = threading.Lock()
+
+    @staticmethod
+    def get_settings() -> Dict:
+        return {**DEFAULT_SETTINGS, **getattr(settings, 'CONTENT_CACHE', {})}
+
+    @classmethod
+    def get_backend(cls):
+        with cls._backend_lock:
+            if cls._backend is None:
+                options = cls.get_settings()
+                if options['BACKEND'] == 'redis':
+                    cls._backend = RedisCacheBackend(
+                        ttl=options['TTL'],
+                        max_entries=options['MAX_ENTRIES'],
+                        url=options['REDIS_URL'],
+                        key_prefix=options['KEY_PREFIX']
+                    )
+                else:
+                    cls._backend = LocalMemoryCacheBackend(
+                        ttl=options['TTL'],
+                        max_entries=options['MAX_ENTRIES']
+                    )
+            return cls._backend
+
+    @classmethod
+    def set_backend(cls, backend) -> None:
+        """Swap the backend, e.g. for a Redis stand-in in tests."""
+        with cls._backend_lock:
+            cls._backend = backend
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        parsed = urlparse(url.strip())
+        scheme = parsed.scheme.lower() or 'https'
+        host = (parsed.hostname or '').lower()
+        if parsed.port and (scheme, parsed.port) not in (('http', 80), ('https', 443)):
+            host = f"{host}:{parsed.port}"
+        path = parsed.path.rstrip('/') or '/'
+        query = urlencode(sorted(
+            (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+            if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PARAM_PREFIXES)
+        ))
+        return urlunparse((scheme, host, path, '', query, ''))
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def file_hash(handle, chunk_size: int = 1024 * 1024) -> str:
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+        handle.seek(0)
+        return digest.hexdigest()
+
+    @classmethod
+    def get(cls, key: str) -> Optional[Dict]:
+        return cls.get_backend().get(key)
+
+    @classmethod
+    def set(cls, key: str, entry: Dict) -> None:
+        # The text itself is stored once, in ScrapedContent
+        scraped = {name: value for name, value in entry['scraped'].items() if name != 'content'}
+        cls.get_backend().set(key, {**entry, 'scraped': scraped})
+
+    @classmethod
+    def _get_stored(cls, key: str) -> Optional[Dict]:
+        """The entry for ``key`` if its ScrapedContent, and so its text, still exists."""
+        entry = cls.get(key)
+        if entry is None or not entry.get('scraped_content_id'):
+            # Not stored yet (or the ingest failed): the text has to be fetched again
+            return None
+        if not ScrapedContent.objects.filter(pk=entry['scraped_content_id']).exists():
+            cls.invalidate(key)
+            return None
+        return entry
+
+    @classmethod
+    def update(cls, key: str, **fields) -> None:
+        entry = cls.get(key)
+        if entry is not None:
+            entry.update(fields)
+            cls.set(key, entry)
+
+    @classmethod
+    def invalidate(cls, key: str) -> None:
+        cls.get_backend().delete(key)
+
+    @classmethod
+    def _new_entry(cls, scraped: Dict[str, str]) -> Dict:
+        return {
+            'scraped': {
+                'url': scraped.get('url', ''),
+                'title': scraped['title'],
+                'content': scraped['content'],
+                'source_type': scraped['source_type']
+            },
+            'content_hash': cls.content_hash(scraped['content']),
+            'etag': scraped.get('etag'),
+            'last_modified': scraped.get('last_modified'),
+            'validated_at': time.time(),
+            'processed': None,
+            'scraped_content_id': None,
+            'study_material_id': None
+        }
+
+    @classmethod
+    def fetch_webpage(cls, url: str, page: Optional[Dict[str, str]] = None) -> Tuple[str, Dict, bool]:
+        """Return ``(key, entry, hit)`` for a web page, scraping on a miss.
+
+        ``page`` is the ``ContentScraper.parse_webpage`` output of a page the
+        caller has already fetched, e.g. the crawler. It is compared with the
+        cached entry instead of scraping the page again.
+        """
+        key = f"url:{cls.normalize_url(url)}"
+        entry = cls._get_stored(key)
+        if page is not None:
+            raw_content = dict(page)
+        else:
+            if not ContentScraper.is_supported_domain(url):
+                raise ValueError(
+                    f"Unsupported domain. Please use one of: {', '.join(ContentScraper.SUPPORTED_DOMAINS)}"
+                )
+            if entry and time.time() - entry['validated_at'] < cls.get_settings()['REVALIDATE_AFTER']:
+                return key, entry, True
+
+            raw_content = ContentScraper.scrape_webpage(
+                url,
+                etag=entry['etag'] if entry else None,
+                last_modified=entry['last_modified'] if entry else None
+            )
+            if raw_content is None:
+                # 304 Not Modified: the cached copy is still current
+                entry['validated_at'] = time.time()
+                cls.set(key, entry)
+                return key, entry, True
+
+        raw_content['url'] = url
+        raw_content['content'] = ContentScraper.clean_content(raw_content['content'])
+        if entry and entry['content_hash'] == cls.content_hash(raw_content['content']):
+            # Origin sent no validators but the text hasn't changed
+            entry.update(
+                etag=raw_content.get('etag'),
+                last_modified=raw_content.get('last_modified'),
+                validated_at=time.time()
+            )
+            cls.set(key, entry)
+            return key, entry, True
+
+        entry = cls._new_entry(raw_content)
+        cls.set(key, entry)
+        return key, entry, False
+
+    @classmethod
+    def store_webpage(cls, url: str, raw_content: Dict[str, str], **fields) -> None:
+        """Cache a page scraped outside ``fetch_webpage``, e.g. by the crawler."""
+        entry = cls._new_entry(raw_content)
+        entry.update(fields)
+        cls.set(f"url:{cls.normalize_url(url)}", entry)
+
+    @classmethod
+    def fetch_pdf(cls, pdf_file, **extract_options) -> Tuple[str, Dict, bool]:
+        """Return ``(key, entry, hit)`` for a PDF, extracting it on a miss."""
+        key = f"pdf:{cls.file_hash(pdf_file)}"
+        entry = cls._get_stored(key)
+        if entry:
+            return key, entry, True
+
+        raw_content = ContentScraper.process_content(pdf_file, is_pdf=True, **extract_options)
+        entry = cls._new_entry(raw_content)
+        cls.set(key, entry)
+        return key, entry, False
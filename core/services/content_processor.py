@@ -1,7 +1,13 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from dataclasses import dataclass
 from datetime import datetime
-import re
+
+from core.services.distractors import QuizQuestionBuilder
+from core.services.document_index import DocumentIndex
+from core.services.summarizer import ExtractiveSummarizer
+
+# Stages accept raw text or a DocumentIndex shared across the whole pipeline
+Document = Union[str, DocumentIndex]
 
 @dataclass
 class ProcessedContent:
@@ -15,80 +21,82 @@ class ProcessedContent:
     estimated_duration: int
 
 class ContentProcessor:
+    MAX_KEY_CONCEPTS = 10
+    MAX_MILESTONES = 5
+    MILESTONE_DESCRIPTION_LENGTH = 100
+    MAX_INSIGHTS = 5
+    INSIGHT_KEYWORDS = ('important', 'key', 'essential', 'crucial')
+
     @staticmethod
-    def generate_summary(content: str, max_length: int = 500) -> str:
+    def generate_summary(content: Document, max_length: int = 500) -> str:
         # Split content into sentences and select key ones
-        sentences = re.split(r'[.!?]+', content)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
+        sentences = DocumentIndex.of(content).sentences_longer_than(10)
         
-        # Select most representative sentences
-        summary_sentences = sentences[:5]  # For now, just take first 5 sentences
+        # Select most representative sentences, kept in document order
+        summary_sentences = ExtractiveSummarizer.summarize(sentences, max_length=max_length)
         summary = '. '.join(summary_sentences)
         
         return summary[:max_length] + '...' if len(summary) > max_length else summary
 
     @staticmethod
-    def extract_key_concepts(content: str) -> List[Dict[str, str]]:
+    def parse_concept(line: str) -> Optional[Dict[str, str]]:
+        # Look for lines that might define concepts
+        if ':' in line:
+            parts = line.split(':', 1)
+            if len(parts) == 2 and len(parts[0].strip()) < 50:
+                return {
+                    'concept': parts[0].strip(),
+                    'definition': parts[1].strip()
+                }
+        return None
+
+    @classmethod
+    def extract_key_concepts(cls, content: Document) -> List[Dict[str, str]]:
         # For now, use basic pattern matching to find potential key concepts
         # In production, this would use more sophisticated NLP techniques
         concepts = []
-        lines = content.split('\n')
+        lines = DocumentIndex.of(content).lines
         
         for line in lines:
-            # Look for lines that might define concepts
-            if ':' in line:
-                parts = line.split(':', 1)
-                if len(parts) == 2 and len(parts[0].strip()) < 50:
-                    concepts.append({
-                        'concept': parts[0].strip(),
-                        'definition': parts[1].strip()
-                    })
+            concept = cls.parse_concept(line)
+            if concept:
+                concepts.append(concept)
         
-        return concepts[:10]  # Return up to 10 key concepts
+        return concepts[:cls.MAX_KEY_CONCEPTS]  # Return up to 10 key concepts
 
     @staticmethod
-    def generate_eli5(content: str, max_length: int = 300) -> str:
+    def generate_eli5(content: Document, max_length: int = 300) -> str:
         # Simplified version for now
         # In production, this would use more sophisticated NLP
-        sentences = re.split(r'[.!?]+', content)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
+        sentences = DocumentIndex.of(content).sentences_longer_than(10)
         
         if sentences:
             simple_explanation = sentences[0]  # Take first sentence as base
             return f"Imagine this: {simple_explanation}"
         return "Sorry, couldn't generate a simple explanation."
 
-    @staticmethod
-    def generate_quiz_questions(content: str) -> List[Dict[str, str]]:
-        # Basic implementation - in production would use more sophisticated NLP
-        sentences = re.split(r'[.!?]+', content)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-        
-        questions = []
-        for i, sentence in enumerate(sentences[:5]):  # Generate 5 questions
-            # Very basic question generation
-            question = {
-                'question': f"Which of the following best describes {sentence.split()[0:5]}...?",
-                'correct_answer': sentence,
-                'option1': sentence,
-                'option2': sentences[(i + 1) % len(sentences)],
-                'option3': sentences[(i + 2) % len(sentences)],
-                'option4': sentences[(i + 3) % len(sentences)]
-            }
-            questions.append(question)
-        
-        return questions
+    @classmethod
+    def generate_quiz_questions(cls, content: Document,
+                                key_concepts: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        # Wrong options are the sentences and definitions most similar to the answer
+        document = DocumentIndex.of(content)
+        if key_concepts is None:
+            key_concepts = cls.extract_key_concepts(document)
+        sentences = document.sentences_longer_than(20)
 
-    @staticmethod
-    def generate_study_milestones(content: str) -> List[Dict[str, str]]:
+        return QuizQuestionBuilder.build(sentences, key_concepts, max_questions=5)
+
+    @classmethod
+    def generate_study_milestones(cls, content: Document) -> List[Dict[str, str]]:
         # Split content into logical sections
-        paragraphs = content.split('\n\n')
+        paragraphs = DocumentIndex.of(content).paragraphs
         milestones = []
         
-        for i, para in enumerate(paragraphs[:5], 1):  # Create up to 5 milestones
+        for i, para in enumerate(paragraphs[:cls.MAX_MILESTONES], 1):  # Create up to 5 milestones
             milestone = {
                 'title': f"Milestone {i}",
-                'description': para[:100] + '...' if len(para) > 100 else para,
+                'description': (para[:cls.MILESTONE_DESCRIPTION_LENGTH] + '...'
+                                if len(para) > cls.MILESTONE_DESCRIPTION_LENGTH else para),
                 'order': i,
                 'xp_reward': 10 * i  # Increase XP for later milestones
             }
@@ -96,40 +104,44 @@ class ContentProcessor:
         
         return milestones
 
-    @staticmethod
-    def extract_bookmarked_insights(content: str) -> List[Dict[str, str]]:
-        sentences = re.split(r'[.!?]+', content)
+    @classmethod
+    def is_insight(cls, sentence: str) -> bool:
+        # Look for sentences that might contain key insights
+        return len(sentence) > 20 and any(keyword in sentence.lower() for keyword in cls.INSIGHT_KEYWORDS)
+
+    @classmethod
+    def extract_bookmarked_insights(cls, content: Document) -> List[Dict[str, str]]:
+        sentences = DocumentIndex.of(content).sentences
         insights = []
         
         for sentence in sentences:
-            sentence = sentence.strip()
-            # Look for sentences that might contain key insights
-            if any(keyword in sentence.lower() for keyword in ['important', 'key', 'essential', 'crucial']):
-                if len(sentence) > 20:
-                    insights.append({
-                        'content': sentence,
-                        'importance_level': 5  # High importance for matched keywords
-                    })
+            if cls.is_insight(sentence):
+                insights.append({
+                    'content': sentence,
+                    'importance_level': 5  # High importance for matched keywords
+                })
         
-        return insights[:5]  # Return up to 5 insights
+        return insights[:cls.MAX_INSIGHTS]  # Return up to 5 insights
 
     @staticmethod
-    def estimate_study_duration(content: str) -> int:
+    def estimate_study_duration(content: Document) -> int:
         # Rough estimation based on content length
-        word_count = len(content.split())
+        word_count = DocumentIndex.of(content).word_count
         # Assume average reading speed of 200 words per minute
         minutes = max(5, word_count // 200)
         return minutes
 
     @classmethod
     def process_content(cls, content: str, title: str) -> ProcessedContent:
-        summary = cls.generate_summary(content)
-        eli5 = cls.generate_eli5(content)
-        key_concepts = cls.extract_key_concepts(content)
-        quiz_questions = cls.generate_quiz_questions(content)
-        study_milestones = cls.generate_study_milestones(content)
-        bookmarked_insights = cls.extract_bookmarked_insights(content)
-        estimated_duration = cls.estimate_study_duration(content)
+        # Index the document once and let every stage share it
+        document = DocumentIndex.of(content)
+        summary = cls.generate_summary(document)
+        eli5 = cls.generate_eli5(document)
+        key_concepts = cls.extract_key_concepts(document)
+        quiz_questions = cls.generate_quiz_questions(document, key_concepts)
+        study_milestones = cls.generate_study_milestones(document)
+        bookmarked_insights = cls.extract_bookmarked_insights(document)
+        estimated_duration = cls.estimate_study_duration(document)
         
         return ProcessedContent(
             title=title,
@@ -1,8 +1,39 @@
-import requests
-from bs4 import BeautifulSoup
+import importlib.util
+import math
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from html import unescape
+from io import BytesIO, StringIO
+from bs4 import BeautifulSoup, SoupStrainer
 from pdfminer.high_level import extract_text
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
 from urllib.parse import urlparse
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.services.http_client import ScraperHttpClient
+
+LXML_AVAILABLE = importlib.util.find_spec('lxml') is not None
+
+# Elements that never hold article text
+UNWANTED_TAGS = ['script', 'style', 'nav', 'footer', 'header']
+
+TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title\s*>', re.IGNORECASE | re.DOTALL)
+
+
+def _extract_page_range(pdf_path: str, first_page: int, last_page: int) -> str:
+    # Runs in a worker process, so it has to be a picklable module-level function.
+    # Takes a path so each task pickles a few bytes instead of the whole PDF
+    return extract_text(pdf_path, page_numbers=range(first_page, last_page))
+
 
 class ContentScraper:
     SUPPORTED_DOMAINS = [
@@ -11,53 +42,294 @@ class ContentScraper:
         'tutorialspoint.com'
     ]
 
+    # Limits applied when PDFs are streamed page by page; None disables a limit.
+    # The cleaned text is still held in full (hashing, near-duplicate checks,
+    # summarising and storage all need the whole document), so PDF_MAX_BYTES
+    # also caps that text and with it the memory a streamed PDF can take
+    PDF_MAX_PAGES = 1000
+    PDF_MAX_BYTES = 20 * 1024 * 1024
+
+    # Webpage extraction backends:
+    #   'html.parser' - full parse with the standard library parser
+    #   'lxml'        - full parse with lxml (falls back to html.parser)
+    #   'strainer'    - build only the site's article container using
+    #                   DOMAIN_EXTRACTION_RULES, else behave like 'lxml'
+    WEBPAGE_BACKENDS = ('html.parser', 'lxml', 'strainer')
+    WEBPAGE_BACKEND = 'strainer'
+
+    # Where each supported site keeps its tutorial text
+    DOMAIN_EXTRACTION_RULES = {
+        'geeksforgeeks.org': {'name': 'article'},
+        'javatpoint.com': {'name': 'div', 'attrs': {'id': 'city'}},
+        'tutorialspoint.com': {'name': 'div', 'attrs': {'id': 'mainContent'}},
+    }
+
+    # Parallel PDF extraction: PDFs shorter than PDF_PARALLEL_MIN_PAGES are not
+    # worth the process start-up cost and are extracted in-process
+    PDF_WORKERS = os.cpu_count() or 1
+    PDF_PARALLEL_MIN_PAGES = 40
+    PDF_PAGES_PER_TASK = 10
+
     @classmethod
     def is_supported_domain(cls, url: str) -> bool:
         domain = urlparse(url).netloc.lower()
         return any(supported in domain for supported in cls.SUPPORTED_DOMAINS)
 
-    @staticmethod
-    def scrape_webpage(url: str) -> Dict[str, str]:
+    @classmethod
+    def scrape_webpage(cls, url: str, etag: Optional[str] = None,
+                       last_modified: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """Scrape a page, or return None if the validators show it unchanged."""
         try:
-            response = requests.get(url)
+            headers = {}
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+            response = ScraperHttpClient.get(url, headers=headers)
+            if headers and response.status_code == 304:
+                return None
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove unwanted elements
-            for element in soup.find_all(['script', 'style', 'nav', 'footer', 'header']):
-                element.decompose()
-            
-            # Extract main content based on common article containers
-            main_content = soup.find('article') or soup.find(class_=['article', 'post-content', 'entry-content'])
-            if not main_content:
-                main_content = soup.find('main') or soup.find('div', class_=['content', 'main-content'])
-            
-            title = soup.title.string if soup.title else ''
-            content = main_content.get_text(separator='\n', strip=True) if main_content else soup.get_text()
-            
-            return {
-                'title': title if title else '',
-                'content': content,
-                'source_type': 'webpage'
-            }
+
+            page = cls.parse_webpage(response.text, url=url)
+            page['etag'] = response.headers.get('ETag')
+            page['last_modified'] = response.headers.get('Last-Modified')
+            return page
         except Exception as e:
             raise ValueError(f"Failed to scrape webpage: {str(e)}")
 
+    @classmethod
+    def parse_webpage(cls, html: str, url: Optional[str] = None,
+                      backend: Optional[str] = None) -> Dict[str, str]:
+        """Extract the title and main article text from a page's HTML.
+
+        ``backend`` is one of WEBPAGE_BACKENDS and defaults to
+        WEBPAGE_BACKEND. Every backend produces the same output as
+        ``html.parser``; ``bench_html_extraction`` checks that on a corpus.
+        """
+        backend = backend or cls.WEBPAGE_BACKEND
+        if backend not in cls.WEBPAGE_BACKENDS:
+            raise ValueError(f"Unknown webpage backend {backend!r}")
+
+        if backend == 'strainer':
+            rule = cls.extraction_rule_for(url) if url else None
+            if rule is not None:
+                page = cls._parse_with_rule(html, rule)
+                if page is not None:
+                    return page
+            backend = 'lxml'
+
+        if backend == 'lxml' and not LXML_AVAILABLE:
+            backend = 'html.parser'
+        return cls._parse_generic(html, backend)
+
+    @classmethod
+    def extraction_rule_for(cls, url: str) -> Optional[Dict]:
+        host = (urlparse(url).hostname or '').lower()
+        for domain, rule in cls.DOMAIN_EXTRACTION_RULES.items():
+            if host == domain or host.endswith('.' + domain):
+                return rule
+        return None
+
+    @staticmethod
+    def _page(title: Optional[str], content: str) -> Dict[str, str]:
+        return {
+            'title': title if title else '',
+            'content': content,
+            'source_type': 'webpage'
+        }
+
+    @classmethod
+    def _parse_with_rule(cls, html: str, rule: Dict) -> Optional[Dict[str, str]]:
+        # Only the site's article container is turned into a tree; the rest of
+        # the page (navigation, sidebars, ads) is tokenised and dropped
+        parser = 'lxml' if LXML_AVAILABLE else 'html.parser'
+        soup = BeautifulSoup(html, parser, parse_only=SoupStrainer(rule['name'], attrs=rule.get('attrs', {})))
+        main_content = soup.find(rule['name'], attrs=rule.get('attrs', {}))
+        if main_content is None:
+            return None
+
+        title_match = TITLE_RE.search(html)
+        if title_match is None or '<' in title_match.group(1):
+            # No title, or markup inside it: let a real parse decide
+            title_soup = BeautifulSoup(html, parser, parse_only=SoupStrainer('title'))
+            title = title_soup.title.string if title_soup.title else ''
+        else:
+            title = unescape(title_match.group(1))
+
+        for element in main_content.find_all(UNWANTED_TAGS):
+            element.decompose()
+        return cls._page(title, main_content.get_text(separator='\n', strip=True))
+
+    @classmethod
+    def _parse_generic(cls, html: str, parser: str) -> Dict[str, str]:
+        soup = BeautifulSoup(html, parser)
+        
+        # Remove unwanted elements
+        for element in soup.find_all(UNWANTED_TAGS):
+            element.decompose()
+        
+        # Extract main content based on common article containers
+        main_content = soup.find('article') or soup.find(class_=['article', 'post-content', 'entry-content'])
+        if not main_content:
+            main_content = soup.find('main') or soup.find('div', class_=['content', 'main-content'])
+        
+        title = soup.title.string if soup.title else ''
+        content = main_content.get_text(separator='\n', strip=True) if main_content else soup.get_text()
+        return cls._page(title, content)
+
     @staticmethod
-    def extract_pdf_content(pdf_file) -> Dict[str, str]:
+    def pdf_title(pdf_file) -> str:
+        # Extract title from filename
+        return pdf_file.name.rsplit('.', 1)[0] if hasattr(pdf_file, 'name') else 'Uploaded PDF'
+
+    @classmethod
+    def extract_pdf_content(cls, pdf_file) -> Dict[str, str]:
         try:
             text = extract_text(pdf_file)
-            # Extract title from first line or filename
-            title = pdf_file.name.rsplit('.', 1)[0] if hasattr(pdf_file, 'name') else 'Uploaded PDF'
             
             return {
-                'title': title,
+                'title': cls.pdf_title(pdf_file),
                 'content': text,
                 'source_type': 'pdf'
             }
         except Exception as e:
             raise ValueError(f"Failed to extract PDF content: {str(e)}")
 
+    @classmethod
+    def iter_pdf_pages(cls, pdf_file, max_pages: Optional[int] = None,
+                       max_bytes: Optional[int] = None) -> Iterator[str]:
+        """Yield the text of a PDF one page at a time.
+
+        Produces the same text as ``extract_text`` but only ever holds one
+        page in memory. Extraction stops after ``max_pages`` pages or once
+        ``max_bytes`` of UTF-8 text have been yielded, truncating the last page.
+        """
+        try:
+            resource_manager = PDFResourceManager(caching=True)
+            page_text = StringIO()
+            device = TextConverter(resource_manager, page_text, codec='utf-8', laparams=LAParams())
+            interpreter = PDFPageInterpreter(resource_manager, device)
+            remaining = max_bytes
+
+            # Object caching would keep every parsed page alive until the end
+            for page in PDFPage.get_pages(pdf_file, maxpages=max_pages or 0, caching=False):
+                interpreter.process_page(page)
+                text = page_text.getvalue()
+                page_text.seek(0)
+                page_text.truncate()
+
+                if remaining is not None:
+                    encoded = text.encode('utf-8')
+                    if len(encoded) >= remaining:
+                        yield encoded[:remaining].decode('utf-8', 'ignore')
+                        return
+                    remaining -= len(encoded)
+                yield text
+        except Exception as e:
+            raise ValueError(f"Failed to extract PDF content: {str(e)}")
+
+    @staticmethod
+    def count_pdf_pages(pdf_data: bytes) -> int:
+        document = PDFDocument(PDFParser(BytesIO(pdf_data)))
+        pages = resolve1(document.catalog.get('Pages'))
+        count = resolve1(pages.get('Count')) if pages else None
+        if isinstance(count, int):
+            return count
+        # Malformed page tree without a usable /Count: walk it instead
+        return sum(1 for _ in PDFPage.create_pages(document))
+
+    @classmethod
+    def plan_page_ranges(cls, page_count: int, workers: int) -> List[Tuple[int, int]]:
+        """Split ``page_count`` pages into contiguous ranges for the pool."""
+        # A few tasks per worker keeps the pool busy when pages vary in cost
+        pages_per_task = max(cls.PDF_PAGES_PER_TASK, math.ceil(page_count / (workers * 4)))
+        return [
+            (first, min(first + pages_per_task, page_count))
+            for first in range(0, page_count, pages_per_task)
+        ]
+
+    @classmethod
+    def iter_pdf_pages_parallel(cls, pdf_file, workers: Optional[int] = None,
+                                max_pages: Optional[int] = None,
+                                max_bytes: Optional[int] = None) -> Iterator[str]:
+        """Extract page ranges in a process pool and yield them in order.
+
+        Falls back to ``iter_pdf_pages`` for short PDFs, a single worker, or
+        when running inside a daemonic process (e.g. a Celery prefork worker)
+        that is not allowed to start children of its own.
+        """
+        workers = workers or cls.PDF_WORKERS
+        try:
+            pdf_data = pdf_file.read()
+            page_count = cls.count_pdf_pages(pdf_data)
+        except Exception as e:
+            raise ValueError(f"Failed to extract PDF content: {str(e)}")
+
+        if max_pages:
+            page_count = min(page_count, max_pages)
+
+        if (workers < 2 or page_count < cls.PDF_PARALLEL_MIN_PAGES
+                or multiprocessing.current_process().daemon):
+            yield from cls.iter_pdf_pages(BytesIO(pdf_data), max_pages=max_pages, max_bytes=max_bytes)
+            return
+
+        ranges = cls.plan_page_ranges(page_count, workers)
+        remaining = max_bytes
+        pdf_path = None
+        try:
+            # Written once for every worker to read, rather than sent with each task
+            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as handle:
+                pdf_path = handle.name
+                handle.write(pdf_data)
+            del pdf_data
+
+            # Spawned workers don't inherit the parent's threads or DB connections
+            with ProcessPoolExecutor(max_workers=min(workers, len(ranges)),
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                results = executor.map(
+                    _extract_page_range,
+                    [pdf_path] * len(ranges),
+                    [first for first, _ in ranges],
+                    [last for _, last in ranges]
+                )
+                for text in results:
+                    if remaining is not None:
+                        encoded = text.encode('utf-8')
+                        if len(encoded) >= remaining:
+                            yield encoded[:remaining].decode('utf-8', 'ignore')
+                            executor.shutdown(wait=True, cancel_futures=True)
+                            return
+                        remaining -= len(encoded)
+                    yield text
+        except Exception as e:
+            raise ValueError(f"Failed to extract PDF content: {str(e)}")
+        finally:
+            if pdf_path is not None:
+                os.remove(pdf_path)
+
+    @classmethod
+    def stream_pdf_content(cls, pdf_file, max_pages: Optional[int] = None,
+                           max_bytes: Optional[int] = None, parallel: bool = False,
+                           workers: Optional[int] = None) -> Dict:
+        """Like ``extract_pdf_content`` but ``content`` is a page generator.
+
+        With ``parallel`` the generator yields ranges of pages extracted by a
+        pool of ``workers`` processes instead of single pages.
+        """
+        max_pages = max_pages if max_pages is not None else cls.PDF_MAX_PAGES
+        max_bytes = max_bytes if max_bytes is not None else cls.PDF_MAX_BYTES
+        if parallel:
+            pages = cls.iter_pdf_pages_parallel(pdf_file, workers=workers, max_pages=max_pages, max_bytes=max_bytes)
+        else:
+            pages = cls.iter_pdf_pages(pdf_file, max_pages=max_pages, max_bytes=max_bytes)
+
+        return {
+            'title': cls.pdf_title(pdf_file),
+            'content': pages,
+            'source_type': 'pdf'
+        }
+
     @staticmethod
     def clean_content(content: str) -> str:
         # Remove excessive whitespace and normalize line breaks
@@ -67,7 +339,61 @@ class ContentScraper:
         return cleaned
 
     @classmethod
-    def process_content(cls, source, is_pdf: bool = False) -> Dict[str, str]:
+    def iter_clean_content(cls, chunks: Iterable[str]) -> Iterator[str]:
+        """Streaming ``clean_content``: the joined output is identical.
+
+        A word cut in half at a chunk boundary is carried over to the next
+        chunk, so only one chunk's worth of words is split at a time.
+        """
+        carry = ''
+        first = True
+        for chunk in chunks:
+            text = carry + chunk
+            words = text.split()
+            carry = words.pop() if words and not text[-1].isspace() else ''
+            if words:
+                yield ('' if first else ' ') + cls.clean_content(' '.join(words))
+                first = False
+        if carry:
+            yield ('' if first else ' ') + cls.clean_content(carry)
+
+    @classmethod
+    def join_clean_content(cls, chunks: Iterable[str], max_bytes: Optional[int] = None) -> str:
+        """``iter_clean_content`` joined into one string of at most ``max_bytes`` UTF-8 bytes.
+
+        The limit is checked as chunks arrive, and the chunk stream is closed
+        once it is reached, so no more pages are extracted than are kept.
+        """
+        parts = []
+        remaining = max_bytes
+        for part in cls.iter_clean_content(chunks):
+            if remaining is not None:
+                encoded = part.encode('utf-8')
+                if len(encoded) >= remaining:
+                    parts.append(encoded[:remaining].decode('utf-8', 'ignore'))
+                    break
+                remaining -= len(encoded)
+            parts.append(part)
+        return ''.join(parts)
+
+    @classmethod
+    def process_content(cls, source, is_pdf: bool = False, stream: bool = False,
+                        max_pages: Optional[int] = None, max_bytes: Optional[int] = None,
+                        parallel: bool = False, workers: Optional[int] = None) -> Dict[str, str]:
+        if is_pdf and (stream or parallel):
+            # Pages are extracted and cleaned one at a time, so the raw text is
+            # never held in full; the cleaned text is, capped at max_bytes
+            max_bytes = max_bytes if max_bytes is not None else cls.PDF_MAX_BYTES
+            raw_content = cls.stream_pdf_content(
+                source,
+                max_pages=max_pages,
+                max_bytes=max_bytes,
+                parallel=parallel,
+                workers=workers
+            )
+            raw_content['content'] = cls.join_clean_content(raw_content['content'], max_bytes)
+            return raw_content
+
         if is_pdf:
             raw_content = cls.extract_pdf_content(source)
         else:
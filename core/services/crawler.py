@@ -0,0 +1,342 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from dataclasses import asdict, dataclass, field
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+import asyncio
+import json
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from bs4 import BeautifulSoup, SoupStrainer
+
+from core.models import IngestionJob, ScrapedContent, StudyMaterial
+from core.services.content_cache import ContentCache
+from core.services.content_processor import ContentProcessor, ProcessedContent
+from core.services.content_scraper import ContentScraper
+from core.services.http_client import ScraperHttpClient
+from core.services.ingestion import IngestionPipeline
+from core.services.material_store import StudyMaterialStore
+
+# Links to these are never tutorial pages worth ingesting
+SKIPPED_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico', '.css', '.js',
+    '.zip', '.pdf', '.mp4', '.mp3', '.xml', '.json'
+)
+
+@dataclass
+class CrawlReport:
+    fetched: int = 0
+    persisted: int = 0
+    # Pages whose material already existed: cached, refreshed in place or a near-duplicate
+    reused: int = 0
+    skipped_robots: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+class CrawlCheckpoint:
+    """Crawl state persisted as JSON so an interrupted crawl can resume.
+
+    ``frontier`` holds every (url, depth) that has been discovered but whose
+    page is not yet persisted; ``seen`` holds every URL ever queued.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.frontier: List[Tuple[str, int]] = []
+        self.seen: Set[str] = set()
+        self.done: int = 0
+        self.failed: Dict[str, str] = {}
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.path) and os.path.exists(self.path)
+
+    def load(self) -> 'CrawlCheckpoint':
+        with open(self.path, encoding='utf-8') as handle:
+            state = json.load(handle)
+        self.frontier = [(url, depth) for url, depth in state['frontier']]
+        self.seen = set(state['seen'])
+        self.done = state['done']
+        self.failed = state['failed']
+        return self
+
+    def save(self, frontier: Iterable[Tuple[str, int]]) -> None:
+        if not self.path:
+            return
+        self.frontier = sorted(set(frontier))
+        state = {
+            'frontier': self.frontier,
+            'seen': sorted(self.seen),
+            'done': self.done,
+            'failed': self.failed,
+        }
+        # Write-then-rename so a crash never leaves a half-written checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(state, handle)
+        os.replace(tmp_path, self.path)
+
+class HostLimiter:
+    """Caps concurrency and spaces out request starts for one host."""
+
+    def __init__(self, concurrency: int, interval: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.interval = interval
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+class BatchCrawler:
+    """Breadth-first crawler that bulk-imports tutorial pages.
+
+    Starting from ``seeds`` it follows links that stay on the seed's domain
+    up to ``max_depth`` hops, honouring robots.txt and a per-host rate limit.
+    Every page gets an IngestionJob (without a user) and goes through
+    ``IngestionPipeline.scrape_stage``, so the content cache, in-place refresh
+    and near-duplicate checks apply as for a single ingest and errors are
+    recorded on the job. Pages that still need a material are processed with
+    ContentProcessor and written ``batch_size`` at a time through
+    StudyMaterialStore. The HTTP work runs on ScraperHttpClient in worker
+    threads, so pooling, retries and size limits still apply.
+    """
+
+    def __init__(self, seeds: Iterable[str], max_depth: int = 2, max_pages: Optional[int] = None,
+                 concurrency: int = 8, per_host_concurrency: int = 2, per_host_interval: float = 1.0,
+                 allowed_domains: Optional[Iterable[str]] = None, checkpoint_path: Optional[str] = None,
+                 persist: bool = True, batch_size: int = 20):
+        self.seeds = list(seeds)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_interval = per_host_interval
+        self.allowed_domains = tuple(allowed_domains or ContentScraper.SUPPORTED_DOMAINS)
+        self.persist = persist
+        self.batch_size = batch_size
+        self.checkpoint = CrawlCheckpoint(checkpoint_path)
+
+        self.report = CrawlReport()
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Set[Tuple[str, int]] = set()
+        self._unpersisted: List[Tuple[str, int, Dict, object]] = []
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._robots: Dict[str, Optional[RobotFileParser]] = {}
+        self._robots_lock: Optional[asyncio.Lock] = None
+        self._persist_lock: Optional[asyncio.Lock] = None
+        self._claimed = 0
+
+    @staticmethod
+    def canonical(url: str) -> str:
+        return ContentCache.normalize_url(url)
+
+    def is_allowed_domain(self, url: str) -> bool:
+        parsed = urlparse(url)
+        host = (parsed.hostname or '').lower()
+        return parsed.scheme in ('http', 'https') and any(
+            host == domain or host.endswith('.' + domain) for domain in self.allowed_domains
+        )
+
+    def extract_links(self, html: str, base_url: str) -> List[str]:
+        """Return in-domain links from a page, resolved and normalised."""
+        base_host = urlparse(base_url).hostname
+        links = []
+        # Only <a> tags are built, which is much cheaper than a full parse
+        for anchor in BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('a', href=True)).find_all('a'):
+            url = urljoin(base_url, anchor['href'].strip())
+            if urlparse(url).hostname != base_host or not self.is_allowed_domain(url):
+                continue
+            if urlparse(url).path.lower().endswith(SKIPPED_EXTENSIONS):
+                continue
+            links.append(self.canonical(url))
+        return links
+
+    def _limiter_for(self, host: str, crawl_delay: Optional[float]) -> HostLimiter:
+        if host not in self._limiters:
+            interval = max(self.per_host_interval, crawl_delay or 0)
+            self._limiters[host] = HostLimiter(self.per_host_concurrency, interval)
+        return self._limiters[host]
+
+    async def _robots_for(self, url: str) -> Optional[RobotFileParser]:
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        async with self._robots_lock:
+            if origin not in self._robots:
+                parser = RobotFileParser(f"{origin}/robots.txt")
+                try:
+                    response = await asyncio.to_thread(ScraperHttpClient.get, f"{origin}/robots.txt")
+                    if response.status_code in (401, 403):
+                        parser.disallow_all = True
+                    elif response.status_code >= 400:
+                        parser.allow_all = True
+                    else:
+                        parser.parse(response.text.splitlines())
+                except Exception:
+                    # Unreachable robots.txt: treat as no restrictions, like urllib does
+                    parser.allow_all = True
+                self._robots[origin] = parser
+            return self._robots[origin]
+
+    def _enqueue(self, url: str, depth: int) -> None:
+        if url in self.checkpoint.seen:
+            return
+        self.checkpoint.seen.add(url)
+        self._pending.add((url, depth))
+        self._queue.put_nowait((url, depth))
+
+    async def _fetch(self, url: str, depth: int) -> None:
+        robots = await self._robots_for(url)
+        agent = ScraperHttpClient.USER_AGENT
+        if robots is not None and not robots.can_fetch(agent, url):
+            self.report.skipped_robots += 1
+            self._pending.discard((url, depth))
+            return
+
+        job_id = await sync_to_async(self._start_job)(url) if self.persist else None
+        try:
+            host = urlparse(url).netloc
+            async with self._limiter_for(host, robots.crawl_delay(agent) if robots else None):
+                response = await asyncio.to_thread(ScraperHttpClient.get, url)
+            response.raise_for_status()
+            if 'html' not in response.headers.get('Content-Type', 'text/html'):
+                raise ValueError(f"Not an HTML page ({response.headers.get('Content-Type')})")
+
+            page = await asyncio.to_thread(self._parse, response.text, url, depth < self.max_depth)
+            page['raw'].update(etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'))
+        except Exception as e:
+            if job_id:
+                await sync_to_async(IngestionPipeline.fail)(job_id, e)
+            raise
+        self.report.fetched += 1
+
+        for link in page['links']:
+            self._enqueue(link, depth + 1)
+
+        source = None
+        if self.persist:
+            # Records its own errors on the job
+            source = await sync_to_async(IngestionPipeline.scrape_stage)(job_id, page=page['raw'])
+            if source.get('study_material_id'):
+                await sync_to_async(IngestionPipeline.finish)(job_id, StudyMaterial(pk=source['study_material_id']))
+                self.report.reused += 1
+                self._pending.discard((url, depth))
+                return
+
+        if not (source and source.get('processed')):
+            # The same text scrape_stage stored, as it cleans the same parsed page
+            content = ContentScraper.clean_content(page['raw']['content'])
+            processed = await asyncio.to_thread(ContentProcessor.process_content, content, page['raw']['title'])
+            source = {**(source or {}), 'processed': asdict(processed)}
+
+        self._unpersisted.append((url, depth, job_id, source))
+        if len(self._unpersisted) >= self.batch_size:
+            await self._flush()
+
+    @staticmethod
+    def _start_job(url: str) -> str:
+        return str(IngestionJob.objects.create(source_type='webpage', url=url).pk)
+
+    def _parse(self, html: str, url: str, follow_links: bool) -> Dict:
+        # CPU-bound, so it runs in a worker thread rather than on the event loop
+        return {
+            'raw': ContentScraper.parse_webpage(html, url=url),
+            'links': self.extract_links(html, url) if follow_links else []
+        }
+
+    async def _flush(self) -> None:
+        async with self._persist_lock:
+            batch, self._unpersisted = self._unpersisted, []
+            if not batch:
+                return
+            if self.persist:
+                await sync_to_async(self._persist_batch)(batch)
+            for url, depth, _, _ in batch:
+                self._pending.discard((url, depth))
+            self.report.persisted += len(batch)
+            self.checkpoint.done += len(batch)
+            self.checkpoint.save(self._pending)
+
+    @staticmethod
+    def _persist_batch(batch: List[Tuple[str, int, str, Dict]]) -> None:
+        rows = ScrapedContent.objects.only('id').in_bulk([source['scraped_content_id'] for *_, source in batch])
+        try:
+            report = StudyMaterialStore.persist_many(
+                [(ProcessedContent(**source['processed']), rows[source['scraped_content_id']])
+                 for *_, source in batch],
+                batch_size=len(batch)
+            )
+        except Exception as e:
+            for _, _, job_id, _ in batch:
+                IngestionPipeline.fail(job_id, e)
+            raise
+
+        for (_, _, job_id, source), material in zip(batch, report.materials):
+            # Later single-URL ingests of the same pages become cache hits
+            ContentCache.update(
+                source['cache_key'],
+                scraped_content_id=material.scraped_content_id,
+                study_material_id=material.id
+            )
+            IngestionPipeline.finish(job_id, material)
+
+    async def _worker(self) -> None:
+        while True:
+            url, depth = await self._queue.get()
+            try:
+                if self.max_pages is not None and self._claimed >= self.max_pages:
+                    continue
+                self._claimed += 1
+                await self._fetch(url, depth)
+            except Exception as e:
+                self.report.failed[url] = str(e)
+                self.checkpoint.failed[url] = str(e)
+                self._pending.discard((url, depth))
+            finally:
+                self._queue.task_done()
+
+    async def crawl(self) -> CrawlReport:
+        started = time.perf_counter()
+        self._queue = asyncio.Queue()
+        self._robots_lock = asyncio.Lock()
+        self._persist_lock = asyncio.Lock()
+
+        if self.checkpoint.exists:
+            self.checkpoint.load()
+            for url, depth in self.checkpoint.frontier:
+                self._pending.add((url, depth))
+                self._queue.put_nowait((url, depth))
+            self._claimed = self.checkpoint.done
+        else:
+            for seed in self.seeds:
+                if not self.is_allowed_domain(seed):
+                    raise ValueError(f"Seed {seed} is outside the allowed domains: {', '.join(self.allowed_domains)}")
+                self._enqueue(self.canonical(seed), 0)
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            await self._queue.join()
+            await self._flush()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Whatever was still in flight stays in the frontier for a resume
+            self.checkpoint.save(self._pending | {(url, depth) for url, depth, _, _ in self._unpersisted})
+
+        self.report.seconds = time.perf_counter() - started
+        return self.report
+
+    def run(self) -> CrawlReport:
+        return asyncio.run(self.crawl())
@@ -0,0 +1,217 @@
+from typing import Dict, List, Sequence
+from collections import Counter, defaultdict
+import math
+import random
+import zlib
+
+from core.services.summarizer import STOPWORDS, TOKEN_PATTERN, TOKEN_RE
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # pragma: no cover - pandas is in requirements.txt
+    np = None
+    pd = None
+
+
+def _bucket(term: str, dimensions: int):
+    # crc32 rather than hash() so vectors are the same in every process;
+    # one spare bit picks the sign, which keeps collisions from only adding up
+    digest = zlib.crc32(term.encode())
+    return digest % dimensions, (1.0 if digest & 0x80000000 else -1.0)
+
+
+class DistractorIndex:
+    """Similarity index over one document's candidate answers.
+
+    Each candidate (a sentence or a key concept definition) becomes a TF-IDF
+    weighted term vector, hashed into ``DIMENSIONS`` buckets and normalised.
+    Similarities against one answer are a single pass over the non-zero
+    weights of the candidates that share a bucket with it, so each question
+    costs time linear in the document instead of comparing every pair.
+
+    Scoring is vectorised with NumPy/pandas for larger documents and falls
+    back to plain Python for short ones, or when those libraries are not
+    installed; both paths compute the same similarities.
+    """
+    DIMENSIONS = 1 << 18
+    # Below this many candidates the pandas setup costs more than it saves
+    VECTORIZE_MIN_CANDIDATES = 200
+    # Candidates this close to the answer are probably restating it
+    MAX_SIMILARITY = 0.8
+
+    def __init__(self, candidates: Sequence[str]):
+        self.candidates = list(candidates)
+        self.lengths = [len(candidate) for candidate in self.candidates]
+        self.vectorized = np is not None and len(self.candidates) >= self.VECTORIZE_MIN_CANDIDATES
+        if self.vectorized:
+            self._build_vectorized()
+        else:
+            self._build_python()
+
+    def _build_python(self) -> None:
+        term_counts = [
+            Counter(t for t in TOKEN_RE.findall(c.lower()) if t not in STOPWORDS)
+            for c in self.candidates
+        ]
+        n = len(self.candidates)
+        doc_freq = Counter(term for counts in term_counts for term in counts)
+        idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in doc_freq.items()}
+
+        self.vectors: List[Dict[int, float]] = []
+        # bucket -> [(candidate, weight)]: only candidates sharing a bucket are ever compared
+        self.postings: Dict[int, List] = defaultdict(list)
+        for row, counts in enumerate(term_counts):
+            vector = defaultdict(float)
+            for term, count in counts.items():
+                bucket, sign = _bucket(term, self.DIMENSIONS)
+                vector[bucket] += sign * count * idf[term]
+            norm = math.sqrt(sum(w * w for w in vector.values()))
+            vector = {bucket: w / norm for bucket, w in vector.items()} if norm else {}
+            self.vectors.append(vector)
+            for bucket, weight in vector.items():
+                self.postings[bucket].append((row, weight))
+
+    def _build_vectorized(self) -> None:
+        n = len(self.candidates)
+        tokens = pd.Series(self.candidates, dtype=object).str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+        tokens = tokens[~tokens.isin(STOPWORDS)]
+
+        # Sparse candidate x bucket matrix as parallel (row, bucket, weight) arrays, sorted by row
+        term_ids, vocab = pd.factorize(tokens.to_numpy())
+        hashed = [_bucket(term, self.DIMENSIONS) for term in vocab]
+        term_buckets = np.array([bucket for bucket, _ in hashed], dtype=np.int64)
+        term_signs = np.array([sign for _, sign in hashed])
+
+        vocab_size = max(len(vocab), 1)
+        keys = tokens.index.to_numpy(dtype=np.int64) * vocab_size + term_ids
+        keys, counts = np.unique(keys, return_counts=True)
+        rows, term_ids = np.divmod(keys, vocab_size)
+
+        doc_freq = np.bincount(term_ids, minlength=len(vocab))
+        idf = np.log((1 + n) / (1 + doc_freq)) + 1
+        weights = term_signs[term_ids] * counts * idf[term_ids]
+
+        # Terms hashed to the same bucket in one candidate add up
+        keys = rows * self.DIMENSIONS + term_buckets[term_ids]
+        keys, inverse = np.unique(keys, return_inverse=True)
+        weights = np.bincount(inverse, weights=weights)
+        rows, buckets = np.divmod(keys, self.DIMENSIONS)
+
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n))
+        # Opposite-signed collisions can cancel a candidate out entirely
+        norms[norms == 0] = 1.0
+        self.rows = rows
+        self.buckets = buckets
+        self.weights = weights / norms[rows]
+        self.indptr = np.searchsorted(rows, np.arange(n + 1))
+        self.length_array = np.array(self.lengths, dtype=float)
+
+    def similarities(self, index: int):
+        """Cosine similarity of every candidate to candidate ``index``."""
+        if self.vectorized:
+            start, end = self.indptr[index], self.indptr[index + 1]
+            query = np.zeros(self.DIMENSIONS)
+            query[self.buckets[start:end]] = self.weights[start:end]
+            return np.bincount(self.rows, weights=self.weights * query[self.buckets], minlength=len(self.candidates))
+
+        scores = [0.0] * len(self.candidates)
+        for bucket, weight in self.vectors[index].items():
+            for row, other in self.postings[bucket]:
+                scores[row] += weight * other
+        return scores
+
+    def distractors(self, index: int, count: int = 3, similarities=None) -> List[str]:
+        """Up to ``count`` candidates most like the answer at ``index`` without restating it.
+
+        Related candidates rank by similarity, scaled down when their length
+        differs from the answer's; unrelated ones only fill remaining slots,
+        closest in length first. Pass ``similarities`` if already computed.
+        """
+        answer = self.candidates[index]
+        answer_length = max(self.lengths[index], 1)
+        if similarities is None:
+            similarities = self.similarities(index)
+
+        if self.vectorized:
+            ratios = np.minimum(self.length_array, answer_length) / np.maximum(self.length_array, answer_length)
+            plausibility = similarities * (0.5 + 0.5 * ratios) + 1e-6 * ratios
+            plausibility[similarities >= self.MAX_SIMILARITY] = -np.inf
+            plausibility[index] = -np.inf
+            # Only the best few need sorting; the extras cover candidates dropped as duplicates
+            shortlist = min(len(self.candidates), count * 4)
+            best = np.argpartition(-plausibility, shortlist - 1)[:shortlist]
+            ranked = best[np.argsort(-plausibility[best], kind='stable')].tolist()
+            chosen = self._pick(answer, ranked, plausibility, count)
+            if len(chosen) < count and shortlist < len(self.candidates):
+                chosen = self._pick(answer, np.argsort(-plausibility, kind='stable').tolist(), plausibility, count)
+            return chosen
+
+        plausibility = []
+        for row, similarity in enumerate(similarities):
+            ratio = min(self.lengths[row], answer_length) / max(self.lengths[row], answer_length, 1)
+            excluded = row == index or similarity >= self.MAX_SIMILARITY
+            plausibility.append(-math.inf if excluded else similarity * (0.5 + 0.5 * ratio) + 1e-6 * ratio)
+        ranked = sorted(range(len(self.candidates)), key=lambda row: (-plausibility[row], row))
+        return self._pick(answer, ranked, plausibility, count)
+
+    def _pick(self, answer: str, ranked: Sequence[int], plausibility, count: int) -> List[str]:
+        chosen, seen = [], {answer.lower()}
+        for row in ranked:
+            if plausibility[row] == -math.inf or len(chosen) >= count:
+                break
+            text = self.candidates[row]
+            if text.lower() not in seen:
+                seen.add(text.lower())
+                chosen.append(text)
+        return chosen
+
+
+class QuizQuestionBuilder:
+    """Multiple-choice questions with distractors picked from the same document.
+
+    Key concepts are asked first (which definition fits the concept), then
+    sentences; one DistractorIndex over both supplies the wrong options, and
+    the correct answer lands in a random but reproducible position.
+    """
+    OPTIONS = 4
+
+    @classmethod
+    def build(cls, sentences: Sequence[str], key_concepts: Sequence[Dict[str, str]],
+              max_questions: int = 5) -> List[Dict[str, str]]:
+        definitions = [concept['definition'] for concept in key_concepts if concept['definition']]
+        prompts = [
+            (f"Which of the following best describes {concept['concept']}?", position)
+            for position, concept in enumerate(c for c in key_concepts if c['definition'])
+        ]
+        prompts += [
+            (f"Which of the following best describes {' '.join(sentence.split()[:5])}...?", len(definitions) + position)
+            for position, sentence in enumerate(sentences)
+        ]
+        if not prompts:
+            return []
+
+        index = DistractorIndex(definitions + list(sentences))
+        questions, asked = [], []
+        for text, position in prompts:
+            if len(questions) >= max_questions:
+                break
+            similarities = index.similarities(position)
+            # A sentence that restates an answer already asked (e.g. the line a
+            # key concept came from) would just repeat that question
+            if any(similarities[row] >= index.MAX_SIMILARITY for row in asked):
+                continue
+            distractors = index.distractors(position, cls.OPTIONS - 1, similarities)
+            if not distractors:
+                continue
+            asked.append(position)
+            answer = index.candidates[position]
+            options = [answer] + distractors
+            # Seeded by the answer so reprocessing a document gives the same quiz
+            random.Random(zlib.crc32(answer.encode())).shuffle(options)
+            options += [''] * (cls.OPTIONS - len(options))
+
+            question = {'question': text, 'correct_answer': answer}
+            question.update({f'option{i}': option for i, option in enumerate(options, 1)})
+            questions.append(question)
+        return questions
@@ -0,0 +1,81 @@
+from typing import Dict, List, Tuple, Union
+from functools import cached_property
+from itertools import accumulate
+import re
+
+# Sentence terminators, captured so we can keep track of character offsets
+SENTENCE_BOUNDARY = re.compile(r'([.!?]+)')
+
+class DocumentIndex:
+    """Precomputed representation of one document for ContentProcessor.
+
+    Every ContentProcessor stage used to re-split the raw text for itself.
+    The index computes each view of the text (sentences, word count, lines,
+    paragraphs) at most once, on first use, and every stage reads from it.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._sentence_cache: Dict[int, List[str]] = {}
+
+    @classmethod
+    def of(cls, content: Union[str, 'DocumentIndex']) -> 'DocumentIndex':
+        """Return ``content`` if it is already indexed, otherwise index it."""
+        if isinstance(content, DocumentIndex):
+            return content
+        return cls(content)
+
+    @cached_property
+    def _sentence_data(self) -> Tuple[List[str], List[Tuple[int, int]]]:
+        parts = SENTENCE_BOUNDARY.split(self.text)
+        sentences, spans = [], []
+        position = 0
+
+        # parts alternates sentence text and the terminator run that ended it
+        for i in range(0, len(parts), 2):
+            piece = parts[i]
+            stripped = piece.strip()
+            start = position + len(piece) - len(piece.lstrip())
+            sentences.append(stripped)
+            spans.append((start, start + len(stripped)))
+            position += len(piece) + (len(parts[i + 1]) if i + 1 < len(parts) else 0)
+
+        return sentences, spans
+
+    @property
+    def sentences(self) -> List[str]:
+        """Every stripped sentence, including empty ones, in document order."""
+        return self._sentence_data[0]
+
+    @property
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        """(start, end) character offsets of each entry in ``sentences``."""
+        return self._sentence_data[1]
+
+    def sentences_longer_than(self, min_length: int) -> List[str]:
+        """Sentences with more than ``min_length`` characters after stripping."""
+        if min_length not in self._sentence_cache:
+            self._sentence_cache[min_length] = [s for s in self.sentences if len(s) > min_length]
+        return self._sentence_cache[min_length]
+
+    @cached_property
+    def word_count(self) -> int:
+        return len(self.text.split())
+
+    @cached_property
+    def lines(self) -> List[str]:
+        return self.text.split('\n')
+
+    @cached_property
+    def line_offsets(self) -> List[int]:
+        """Character offset at which each entry in ``lines`` starts."""
+        return [0] + list(accumulate(len(line) + 1 for line in self.lines[:-1]))
+
+    @cached_property
+    def paragraphs(self) -> List[str]:
+        return self.text.split('\n\n')
+
+    @cached_property
+    def paragraph_offsets(self) -> List[int]:
+        """Character offset at which each entry in ``paragraphs`` starts."""
+        return [0] + list(accumulate(len(para) + 2 for para in self.paragraphs[:-1]))
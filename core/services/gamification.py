@@ -1,8 +1,65 @@
-from typing import Dict, List, Optional
-from datetime import datetime
-from django.db.models import Sum
+from typing import Dict, List, Optional, Tuple
+from bisect import bisect_right
+import threading
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
-from core.models import Badge, UserBadge, StudyMaterial, StudyMilestone, UserProgress
+from django.utils import timezone
+from core.models import (
+    Badge,
+    UserBadge,
+    StudyMaterial,
+    StudyMilestone,
+    UserProgress,
+    XPLedgerEntry,
+    UserXP
+)
+from core.services.leaderboard import Leaderboard
+
+class BadgeIndex:
+    """Process-level index of badges sorted by XP requirement.
+
+    Loaded from the Badge table on first use and dropped whenever a Badge is
+    saved or deleted, so awarding badges never has to read that table.
+    """
+    _badges: Optional[List[Badge]] = None
+    _thresholds: List[int] = []
+    _lock = threading.Lock()
+
+    @staticmethod
+    def queryset():
+        return Badge.objects.order_by('xp_requirement', 'id')
+
+    @classmethod
+    def _load(cls) -> Tuple[List[Badge], List[int]]:
+        with cls._lock:
+            if cls._badges is None:
+                badges = list(cls.queryset())
+                cls._thresholds = [badge.xp_requirement for badge in badges]
+                cls._badges = badges
+            return cls._badges, cls._thresholds
+
+    @classmethod
+    def invalidate(cls, **kwargs) -> None:
+        with cls._lock:
+            cls._badges = None
+            cls._thresholds = []
+
+    @classmethod
+    def crossed(cls, old_xp: int, new_xp: int) -> List[Badge]:
+        """Badges whose requirement is above ``old_xp`` and at most ``new_xp``."""
+        badges, thresholds = cls._load()
+        return badges[bisect_right(thresholds, old_xp):bisect_right(thresholds, new_xp)]
+
+
+def connect_signals():
+    """Reload the badge index when badges change; called from CoreConfig.ready()."""
+    post_save.connect(BadgeIndex.invalidate, sender=Badge, dispatch_uid='badge_index_save')
+    post_delete.connect(BadgeIndex.invalidate, sender=Badge, dispatch_uid='badge_index_delete')
+
 
 class GamificationService:
     # XP rewards for different actions
@@ -46,6 +103,9 @@ class GamificationService:
             'xp_requirement': 5000
         }
     ]
+
+    # Progress stats are cached per user and dropped whenever XP or badges change
+    STATS_CACHE_TTL = 5 * 60
     
     @classmethod
     def initialize_badges(cls):
@@ -62,87 +122,277 @@ class GamificationService:
     
     @classmethod
     def get_user_xp(cls, user: User) -> int:
-        """Get total XP for a user."""
-        total_xp = UserProgress.objects.filter(user=user).aggregate(Sum('xp_earned'))['xp_earned__sum']
+        """Get total XP for a user from the denormalised running total."""
+        total_xp = UserXP.objects.filter(user_id=user.pk).values_list('total_xp', flat=True).first()
         return total_xp or 0
     
     @classmethod
-    def award_xp(cls, user: User, action_type: str) -> int:
-        """Award XP for a specific action and return the amount awarded."""
+    def award_xp(cls, user: User, action_type: str, bonus: int = 0,
+                 study_material: Optional[StudyMaterial] = None,
+                 milestone: Optional[StudyMilestone] = None,
+                 idempotency_key: Optional[str] = None) -> int:
+        """Award XP for a specific action and return the amount awarded.
+
+        The award is appended to the XP ledger, added to the user's running
+        total and any badge it crosses is awarded, all in the same transaction.
+        """
         if action_type not in cls.XP_REWARDS:
             return 0
             
-        xp_amount = cls.XP_REWARDS[action_type]
+        xp_amount = cls.XP_REWARDS[action_type] + bonus
+        with transaction.atomic():
+            XPLedgerEntry.objects.create(
+                user=user,
+                action_type=action_type,
+                amount=xp_amount,
+                study_material=study_material,
+                milestone=milestone,
+                idempotency_key=idempotency_key
+            )
+            totals = cls._add_to_total(user, xp_amount)
+            cls.invalidate_progress_stats(user)
+            cls.check_and_award_badges(user, totals=totals)
+            cls.update_leaderboards([(user.pk, xp_amount, study_material.pk if study_material else None)])
         return xp_amount
+
+    @staticmethod
+    def update_leaderboards(awards) -> None:
+        """Add ``(user_id, amount, study_material_id)`` awards to the leaderboards on commit."""
+        def record():
+            try:
+                Leaderboard.record(awards)
+            except Exception as e:
+                # The ledger is the source of truth; rebuild_leaderboards repairs the boards
+                print("[Error] Leaderboard update:", str(e))
+
+        transaction.on_commit(record)
+
+    @staticmethod
+    def _add_to_total(user: User, amount: int) -> Tuple[int, int]:
+        """Add ``amount`` to the user's running total; returns the total before and after.
+
+        The row is locked before it is read, so concurrent awards queue up
+        and each one sees exactly the totals its own increment moved between.
+        """
+        totals = UserXP.objects.select_for_update().filter(user_id=user.pk).values_list('total_xp', flat=True)
+        with transaction.atomic():
+            previous = totals.first()
+            if previous is None:
+                try:
+                    with transaction.atomic():
+                        UserXP.objects.create(user_id=user.pk, total_xp=amount)
+                    return 0, amount
+                except IntegrityError:
+                    # Another request created the row first
+                    previous = totals.get()
+            UserXP.objects.filter(user_id=user.pk).update(total_xp=F('total_xp') + amount)
+            return previous, previous + amount
+
+    @classmethod
+    def reconcile_xp_totals(cls, dry_run: bool = False) -> Dict[int, Dict[str, int]]:
+        """Rebuild every UserXP total from the ledger.
+
+        Returns ``{user_id: {'stored': ..., 'ledger': ...}}`` for each user
+        whose stored total had drifted; with ``dry_run`` nothing is written.
+        """
+        ledger = dict(
+            XPLedgerEntry.objects.values('user_id').annotate(total=Sum('amount')).values_list('user_id', 'total')
+        )
+        stored = dict(UserXP.objects.values_list('user_id', 'total_xp'))
+
+        drift = {
+            user_id: {'stored': stored.get(user_id, 0), 'ledger': ledger.get(user_id, 0)}
+            for user_id in set(ledger) | set(stored)
+            if stored.get(user_id, 0) != ledger.get(user_id, 0)
+        }
+        if dry_run or not drift:
+            return drift
+
+        with transaction.atomic():
+            UserXP.objects.bulk_create(
+                [UserXP(user_id=user_id, total_xp=totals['ledger']) for user_id, totals in drift.items()],
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=['total_xp', 'updated_at'],
+                batch_size=1000
+            )
+        return drift
     
     @classmethod
-    def check_and_award_badges(cls, user: User) -> List[Badge]:
-        """Check if user qualifies for new badges and award them."""
-        user_xp = cls.get_user_xp(user)
-        new_badges = []
-        
-        # Get all badges user doesn't have yet
-        earned_badge_ids = UserBadge.objects.filter(user=user).values_list('badge_id', flat=True)
-        available_badges = Badge.objects.exclude(id__in=earned_badge_ids)
-        
-        for badge in available_badges:
-            if user_xp >= badge.xp_requirement:
-                UserBadge.objects.create(user=user, badge=badge)
-                new_badges.append(badge)
+    def check_and_award_badges(cls, user: User, totals: Optional[Tuple[int, int]] = None) -> List[Badge]:
+        """Check if user qualifies for new badges and award them.
+
+        With ``totals``, the ``(before, after)`` pair returned by
+        ``_add_to_total`` in the same transaction, only the thresholds crossed
+        by that award are considered; without it every badge the user's XP
+        qualifies for is.
+        """
+        previous_xp, user_xp = totals if totals is not None else (-1, cls.get_user_xp(user))
+        candidates = BadgeIndex.crossed(previous_xp, user_xp)
+        if not candidates:
+            return []
+
+        earned_badge_ids = set(
+            UserBadge.objects.filter(user=user, badge_id__in=[badge.id for badge in candidates])
+            .values_list('badge_id', flat=True)
+        )
+        new_badges = [badge for badge in candidates if badge.id not in earned_badge_ids]
+        if new_badges:
+            # A concurrent award of the same badge is silently skipped
+            UserBadge.objects.bulk_create(
+                [UserBadge(user=user, badge=badge) for badge in new_badges],
+                ignore_conflicts=True
+            )
+            cls.invalidate_progress_stats(user)
         
         return new_badges
     
+    @staticmethod
+    def _stats_cache_key(user: User) -> str:
+        return f"progress_stats:{user.pk}"
+
     @classmethod
-    def get_progress_stats(cls, user: User) -> Dict:
-        """Get comprehensive progress statistics for a user."""
-        total_xp = cls.get_user_xp(user)
-        completed_milestones = UserProgress.objects.filter(
-            user=user,
-            completed=True
-        ).count()
-        
-        # Get next badge to achieve
-        earned_badge_ids = UserBadge.objects.filter(user=user).values_list('badge_id', flat=True)
-        next_badge = Badge.objects.exclude(id__in=earned_badge_ids)\
-            .filter(xp_requirement__gt=total_xp)\
-            .order_by('xp_requirement').first()
-        
+    def invalidate_progress_stats(cls, user: User) -> None:
+        """Drop the cached stats once the surrounding transaction commits."""
+        # Deleting after commit stops a concurrent reader from re-caching the old values
+        transaction.on_commit(lambda: cache.delete(cls._stats_cache_key(user)))
+
+    @staticmethod
+    def _count_subquery(queryset):
+        # COUNT(*) of a per-user queryset as a scalar subquery
+        return Coalesce(
+            Subquery(
+                queryset.order_by().values('user_id').annotate(n=Count('pk')).values('n'),
+                output_field=IntegerField()
+            ),
+            Value(0)
+        )
+
+    @classmethod
+    def progress_stats_queryset(cls, user: User):
+        """The single query behind get_progress_stats, built from correlated subqueries."""
+        user_ref = OuterRef('pk')
+        unearned_badges = Badge.objects.filter(
+            ~Exists(UserBadge.objects.filter(user_id=OuterRef(user_ref), badge_id=OuterRef('pk'))),
+            xp_requirement__gt=OuterRef('total_xp')
+        ).order_by('xp_requirement')
+
+        return User.objects.filter(pk=user.pk).annotate(
+            total_xp=Coalesce(
+                Subquery(UserXP.objects.filter(user_id=user_ref).values('total_xp')[:1]),
+                Value(0)
+            ),
+            completed_milestones=cls._count_subquery(
+                UserProgress.objects.filter(user_id=user_ref, completed=True)
+            ),
+            badges_earned=cls._count_subquery(UserBadge.objects.filter(user_id=user_ref)),
+            next_badge_name=Subquery(unearned_badges.values('name')[:1]),
+            next_badge_xp=Subquery(unearned_badges.values('xp_requirement')[:1])
+        ).values(
+            'total_xp', 'completed_milestones', 'badges_earned', 'next_badge_name', 'next_badge_xp'
+        )
+
+    @classmethod
+    def _query_progress_stats(cls, user: User) -> Dict:
+        row = cls.progress_stats_queryset(user).first()
+        if row is None:
+            row = dict.fromkeys(('completed_milestones', 'badges_earned', 'total_xp'), 0)
+            row.update(next_badge_name=None, next_badge_xp=None)
+
+        total_xp = row['total_xp']
         return {
             'total_xp': total_xp,
-            'completed_milestones': completed_milestones,
-            'badges_earned': UserBadge.objects.filter(user=user).count(),
+            'completed_milestones': row['completed_milestones'],
+            'badges_earned': row['badges_earned'],
             'next_badge': {
-                'name': next_badge.name if next_badge else None,
-                'xp_required': next_badge.xp_requirement if next_badge else None,
-                'xp_remaining': next_badge.xp_requirement - total_xp if next_badge else 0
+                'name': row['next_badge_name'],
+                'xp_required': row['next_badge_xp'],
+                'xp_remaining': row['next_badge_xp'] - total_xp if row['next_badge_xp'] is not None else 0
             }
         }
+
+    @classmethod
+    def get_progress_stats(cls, user: User) -> Dict:
+        """Get comprehensive progress statistics for a user."""
+        key = cls._stats_cache_key(user)
+        stats = cache.get(key)
+        if stats is None:
+            stats = cls._query_progress_stats(user)
+            cache.set(key, stats, cls.STATS_CACHE_TTL)
+        return stats
     
+    @staticmethod
+    def _replayed_award(user: User, milestone: StudyMilestone, idempotency_key: Optional[str]) -> int:
+        """XP already claimed under ``idempotency_key``, or 0 for a plain repeat."""
+        if not idempotency_key:
+            return 0
+        # The progress row holds the key from the moment the milestone is claimed,
+        # the ledger only once the event consumer has run
+        claimed = UserProgress.objects.filter(user=user, idempotency_key=idempotency_key).values_list(
+            'milestone_id', 'xp_earned'
+        ).first() or XPLedgerEntry.objects.filter(user=user, idempotency_key=idempotency_key).values_list(
+            'milestone_id', 'amount'
+        ).first()
+        if claimed is None:
+            return 0
+        milestone_id, xp_earned = claimed
+        if milestone_id != milestone.id:
+            raise ValueError('Idempotency key was already used for a different milestone.')
+        return xp_earned
+
     @classmethod
-    def complete_milestone(cls, user: User, milestone: StudyMilestone) -> Dict:
-        """Mark a milestone as completed and award XP."""
-        # Check if already completed
-        progress, created = UserProgress.objects.get_or_create(
-            user=user,
-            study_material=milestone.study_material,
-            milestone=milestone,
-            defaults={'completed': True, 'completed_at': datetime.now()}
-        )
-        
-        if created or not progress.completed:
-            # Award XP for milestone completion
-            xp_earned = cls.award_xp(user, 'complete_milestone') + milestone.xp_reward
-            progress.xp_earned = xp_earned
-            progress.completed = True
-            progress.completed_at = datetime.now()
-            progress.save()
-            
-            # Check for new badges
-            new_badges = cls.check_and_award_badges(user)
-            
-            return {
-                'xp_earned': xp_earned,
-                'new_badges': [badge.name for badge in new_badges]
-            }
-        
-        return {'xp_earned': 0, 'new_badges': []}
\ No newline at end of file
+    def complete_milestone(cls, user: User, milestone: StudyMilestone,
+                           idempotency_key: Optional[str] = None) -> Dict:
+        """Mark a milestone as completed and queue its XP award, exactly once.
+
+        Completion is claimed with a conditional UPDATE inside one transaction,
+        so of any number of concurrent calls only one publishes the
+        ``complete_milestone`` event; the rest return ``xp_earned`` 0. A retry
+        carrying the same ``idempotency_key`` as an earlier call gets that
+        call's XP back instead, whether or not its event has been applied. XP totals and
+        badges are updated later by the event consumer, so ``new_badges`` is
+        always empty; the page picks new badges up on its next load.
+        """
+        # Imported here: gamification_events imports this module
+        from core.services.gamification_events import GamificationEvents
+
+        with transaction.atomic():
+            # Also rejects a key already spent on another milestone before anything is written
+            replayed = cls._replayed_award(user, milestone, idempotency_key)
+            if replayed:
+                return {'xp_earned': replayed, 'new_badges': []}
+
+            progress, _ = UserProgress.objects.get_or_create(
+                user=user,
+                study_material_id=milestone.study_material_id,
+                milestone=milestone,
+                defaults={'completed': False, 'xp_earned': 0}
+            )
+
+            # Only the request that flips completed from False to True goes on
+            xp_earned = cls.XP_REWARDS['complete_milestone'] + milestone.xp_reward
+            try:
+                with transaction.atomic():
+                    claimed = UserProgress.objects.filter(pk=progress.pk, completed=False).update(
+                        completed=True,
+                        completed_at=timezone.now(),
+                        xp_earned=xp_earned,
+                        idempotency_key=idempotency_key
+                    )
+            except IntegrityError:
+                # A concurrent request spent the same key on another milestone
+                raise ValueError('Idempotency key was already used for a different milestone.')
+            if not claimed:
+                return {'xp_earned': cls._replayed_award(user, milestone, idempotency_key), 'new_badges': []}
+
+            GamificationEvents.publish(
+                user,
+                'complete_milestone',
+                bonus=milestone.xp_reward,
+                study_material=milestone.study_material,
+                milestone=milestone,
+                idempotency_key=idempotency_key
+            )
+            cls.invalidate_progress_stats(user)
+
+        return {'xp_earned': xp_earned, 'new_badges': []}
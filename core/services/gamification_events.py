@@ -0,0 +1,433 @@
+from typing import Callable, Dict, List, Optional
+from collections import defaultdict
+from dataclasses import dataclass, field
+import json
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, close_old_connections, transaction
+
+from core.models import StudyMaterial, StudyMilestone, XPLedgerEntry
+from core.services.gamification import GamificationService
+
+DEFAULT_SETTINGS = {
+    'BACKEND': 'celery',
+    # A consumer applies at most this many events in one transaction
+    'BATCH_SIZE': 500,
+    # How long a consumer waits for more events before applying a partial batch
+    'BATCH_WINDOW': 0.5,
+    'REDIS_URL': 'redis://localhost:6379/0',
+    'KEY_PREFIX': 'examprep:gamification:',
+}
+
+
+@dataclass
+class BatchReport:
+    events: int = 0
+    users: int = 0
+    xp_awarded: int = 0
+    duplicates: int = 0
+    new_badges: Dict[int, List[str]] = field(default_factory=dict)
+    # ``{'event': ..., 'error': ...}`` for every event that could not be applied
+    dead_letters: List[Dict] = field(default_factory=list)
+
+
+class LocalDeadLetters:
+    """Dead letters kept in a list in this process."""
+
+    def __init__(self):
+        self._dead_letters: List[Dict] = []
+        self._dead_letters_lock = threading.Lock()
+
+    def dead_letter(self, records: List[Dict]) -> None:
+        for record in records:
+            print("[Error] Gamification event dead-lettered:", record['error'])
+        with self._dead_letters_lock:
+            self._dead_letters.extend(records)
+
+    def dead_letters(self) -> List[Dict]:
+        with self._dead_letters_lock:
+            return list(self._dead_letters)
+
+    def requeue_dead_letters(self) -> int:
+        """Publish every dead-lettered event again and return how many there were."""
+        with self._dead_letters_lock:
+            records, self._dead_letters = self._dead_letters, []
+        for record in records:
+            self.publish(record['event'])
+        return len(records)
+
+    def _apply_or_dead_letter(self, batch: List[Dict]) -> None:
+        try:
+            report = self.apply(batch)
+        except Exception as e:
+            self.dead_letter([{'event': event, 'error': str(e)} for event in batch])
+        else:
+            if report.dead_letters:
+                self.dead_letter(report.dead_letters)
+
+
+class EagerEventQueue(LocalDeadLetters):
+    """Applies every event as soon as it is published; for tests and scripts."""
+
+    def __init__(self, apply: Callable[[List[Dict]], BatchReport]):
+        super().__init__()
+        self.apply = apply
+
+    def publish(self, event: Dict) -> None:
+        self._apply_or_dead_letter([event])
+
+    def drain(self) -> None:
+        pass
+
+
+class InMemoryEventQueue(LocalDeadLetters):
+    """Queue consumed by one daemon thread in the publishing process.
+
+    The consumer takes the first waiting event, keeps collecting for up to
+    ``batch_window`` seconds or ``batch_size`` events, then applies them all
+    at once. Events still queued when the process exits are lost, so this
+    suits a single web process and tests; use the ``celery`` backend in
+    production.
+    """
+
+    def __init__(self, apply: Callable[[List[Dict]], BatchReport], batch_size: int, batch_window: float):
+        super().__init__()
+        self.apply = apply
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def publish(self, event: Dict) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._consume, name='gamification-events', daemon=True)
+                self._thread.start()
+        self._queue.put(event)
+
+    def _next_batch(self) -> List[Dict]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _consume(self) -> None:
+        while True:
+            batch = self._next_batch()
+            close_old_connections()
+            try:
+                self._apply_or_dead_letter(batch)
+            finally:
+                close_old_connections()
+                for _ in batch:
+                    self._queue.task_done()
+
+    def drain(self) -> None:
+        """Block until every published event has been applied."""
+        self._queue.join()
+
+
+class RedisEventQueue:
+    """Events kept in a Redis list and applied by a Celery task.
+
+    The first event published into an idle queue schedules
+    ``core.tasks.apply_gamification_events`` ``batch_window`` seconds out, so
+    a burst of events is applied by a single task run. Events that cannot be
+    applied are moved to a second list, see ``manage.py gamification_dead_letters``.
+    ``client`` can be any object implementing the redis-py commands used here.
+    """
+
+    def __init__(self, apply: Callable[[List[Dict]], BatchReport], batch_size: int, batch_window: float,
+                 url: str = None, key_prefix: str = 'examprep:gamification:', client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.apply = apply
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.events_key = f"{key_prefix}events"
+        self.scheduled_key = f"{key_prefix}scheduled"
+        self.dead_letters_key = f"{key_prefix}dead_letters"
+
+    def publish(self, event: Dict) -> None:
+        self.client.rpush(self.events_key, json.dumps(event))
+        # The flag expires on its own in case the scheduled task is lost
+        if self.client.set(self.scheduled_key, 1, nx=True, ex=max(60, int(self.batch_window * 10))):
+            from core.tasks import apply_gamification_events
+            apply_gamification_events.apply_async(countdown=self.batch_window)
+
+    def _pop_batch(self) -> List[Dict]:
+        pipe = self.client.pipeline()
+        pipe.lrange(self.events_key, 0, self.batch_size - 1)
+        pipe.ltrim(self.events_key, self.batch_size, -1)
+        items, _ = pipe.execute()
+        return [json.loads(item) for item in items]
+
+    def drain(self) -> None:
+        # Cleared first: anything published from here on schedules a new run
+        self.client.delete(self.scheduled_key)
+        while True:
+            batch = self._pop_batch()
+            if not batch:
+                return
+            try:
+                report = self.apply(batch)
+            except Exception as e:
+                self.dead_letter([{'event': event, 'error': str(e)} for event in batch])
+            else:
+                if report.dead_letters:
+                    self.dead_letter(report.dead_letters)
+
+    def dead_letter(self, records: List[Dict]) -> None:
+        for record in records:
+            print("[Error] Gamification event dead-lettered:", record['error'])
+        self.client.rpush(self.dead_letters_key, *[json.dumps(record) for record in records])
+
+    def dead_letters(self) -> List[Dict]:
+        return [json.loads(item) for item in self.client.lrange(self.dead_letters_key, 0, -1)]
+
+    def requeue_dead_letters(self) -> int:
+        """Publish every dead-lettered event again and return how many there were."""
+        pipe = self.client.pipeline()
+        pipe.lrange(self.dead_letters_key, 0, -1)
+        pipe.delete(self.dead_letters_key)
+        items, _ = pipe.execute()
+        for item in items:
+            self.publish(json.loads(item)['event'])
+        return len(items)
+
+
+class GamificationEvents:
+    """Publishes gamification events and applies them in per-user batches.
+
+    The request path only publishes ``{user_id, action_type, amount, ...}``
+    events (the action types are the keys of ``GamificationService.XP_REWARDS``).
+    A consumer later writes each batch to the XP ledger in one transaction,
+    adds each user's summed XP to their total with a single UPDATE and
+    evaluates badges once per user per batch. Events that cannot be applied
+    are kept on the queue's dead-letter list rather than dropped.
+    """
+    BACKENDS = ('celery', 'memory', 'eager')
+
+    _queue = None
+    _queue_lock = threading.Lock()
+
+    @staticmethod
+    def get_settings() -> Dict:
+        return {**DEFAULT_SETTINGS, **getattr(settings, 'GAMIFICATION_EVENTS', {})}
+
+    @classmethod
+    def get_queue(cls):
+        with cls._queue_lock:
+            if cls._queue is None:
+                options = cls.get_settings()
+                if options['BACKEND'] not in cls.BACKENDS:
+                    raise ImproperlyConfigured(
+                        f"GAMIFICATION_EVENTS['BACKEND'] must be one of: {', '.join(cls.BACKENDS)}"
+                    )
+                if options['BACKEND'] == 'celery':
+                    cls._queue = RedisEventQueue(
+                        cls.apply_batch,
+                        batch_size=options['BATCH_SIZE'],
+                        batch_window=options['BATCH_WINDOW'],
+                        url=options['REDIS_URL'],
+                        key_prefix=options['KEY_PREFIX']
+                    )
+                elif options['BACKEND'] == 'memory':
+                    cls._queue = InMemoryEventQueue(
+                        cls.apply_batch,
+                        batch_size=options['BATCH_SIZE'],
+                        batch_window=options['BATCH_WINDOW']
+                    )
+                else:
+                    cls._queue = EagerEventQueue(cls.apply_batch)
+            return cls._queue
+
+    @classmethod
+    def set_queue(cls, event_queue) -> None:
+        """Swap the queue, e.g. for an in-memory one in tests."""
+        with cls._queue_lock:
+            cls._queue = event_queue
+
+    @classmethod
+    def publish(cls, user: User, action_type: str, bonus: int = 0,
+                study_material: Optional[StudyMaterial] = None,
+                milestone: Optional[StudyMilestone] = None,
+                idempotency_key: Optional[str] = None) -> int:
+        """Queue an XP award and return the amount that will be awarded."""
+        if action_type not in GamificationService.XP_REWARDS:
+            return 0
+
+        amount = GamificationService.XP_REWARDS[action_type] + bonus
+        event = {
+            'user_id': user.pk,
+            'action_type': action_type,
+            'amount': amount,
+            'study_material_id': study_material.pk if study_material else None,
+            'milestone_id': milestone.pk if milestone else None,
+            'idempotency_key': idempotency_key,
+        }
+        # Published only once the caller's writes are visible to the consumer
+        transaction.on_commit(lambda: cls.get_queue().publish(event))
+        return amount
+
+    @classmethod
+    def drain(cls) -> None:
+        cls.get_queue().drain()
+
+    @classmethod
+    def dead_letters(cls) -> List[Dict]:
+        return cls.get_queue().dead_letters()
+
+    @classmethod
+    def requeue_dead_letters(cls) -> int:
+        return cls.get_queue().requeue_dead_letters()
+
+    @classmethod
+    def apply_batch(cls, events: List[Dict]) -> BatchReport:
+        """Write a batch of events to the ledger and update totals and badges.
+
+        Events that can never be applied (an unknown user or action type, or
+        an idempotency key already spent on a different award) are returned
+        in ``report.dead_letters``. The rest are applied in one transaction;
+        if that fails, each event is retried in its own savepoint so a single
+        poison event does not take the rest of the batch with it.
+        """
+        report = BatchReport(events=len(events))
+        events = cls._check_references(events, report)
+        try:
+            applied = cls._apply(events)
+        except DatabaseError as e:
+            if len(events) > 1:
+                applied = cls._apply_one_by_one(events)
+            else:
+                applied = BatchReport(dead_letters=[{'event': event, 'error': str(e)} for event in events])
+
+        report.users = applied.users
+        report.xp_awarded = applied.xp_awarded
+        report.duplicates = applied.duplicates
+        report.new_badges = applied.new_badges
+        report.dead_letters.extend(applied.dead_letters)
+        return report
+
+    @classmethod
+    def _check_references(cls, events: List[Dict], report: BatchReport) -> List[Dict]:
+        """Dead-letter events for unknown users or actions and return the rest.
+
+        Foreign keys are only checked on commit, so a missing user would
+        otherwise fail the whole batch's transaction.
+        """
+        def existing(model, name):
+            ids = {event[name] for event in events if event.get(name)}
+            return set(model.objects.filter(pk__in=ids).values_list('pk', flat=True)) if ids else set()
+
+        users = existing(User, 'user_id')
+        materials = existing(StudyMaterial, 'study_material_id')
+        milestones = existing(StudyMilestone, 'milestone_id')
+
+        valid = []
+        for event in events:
+            if event.get('action_type') not in GamificationService.XP_REWARDS:
+                report.dead_letters.append({'event': event, 'error': f"Unknown action type {event.get('action_type')!r}."})
+            elif event.get('user_id') not in users:
+                report.dead_letters.append({'event': event, 'error': f"User {event.get('user_id')} does not exist."})
+            else:
+                # A material or milestone deleted since publishing is dropped, as on_delete=SET_NULL would
+                valid.append({
+                    **event,
+                    'study_material_id': event.get('study_material_id') if event.get('study_material_id') in materials else None,
+                    'milestone_id': event.get('milestone_id') if event.get('milestone_id') in milestones else None,
+                })
+        return valid
+
+    @classmethod
+    def _apply_one_by_one(cls, events: List[Dict]) -> BatchReport:
+        report = BatchReport()
+        users = set()
+        for event in events:
+            try:
+                applied = cls._apply([event])
+            except DatabaseError as e:
+                report.dead_letters.append({'event': event, 'error': str(e)})
+                continue
+            if applied.users:
+                users.add(event['user_id'])
+            report.xp_awarded += applied.xp_awarded
+            report.duplicates += applied.duplicates
+            for user_id, badges in applied.new_badges.items():
+                report.new_badges.setdefault(user_id, []).extend(badges)
+            report.dead_letters.extend(applied.dead_letters)
+        report.users = len(users)
+        return report
+
+    @classmethod
+    def _apply(cls, events: List[Dict]) -> BatchReport:
+        """Apply ``events`` in one transaction (a savepoint when already inside one)."""
+        report = BatchReport(events=len(events))
+        keys = [event['idempotency_key'] for event in events if event.get('idempotency_key')]
+
+        with transaction.atomic():
+            # A redelivered event with a key that is already in the ledger is dropped
+            seen = {
+                (user_id, key): (action_type, milestone_id)
+                for user_id, key, action_type, milestone_id in XPLedgerEntry.objects.filter(
+                    idempotency_key__in=keys
+                ).values_list('user_id', 'idempotency_key', 'action_type', 'milestone_id')
+            } if keys else {}
+
+            entries = []
+            gained = defaultdict(int)
+            for event in events:
+                key = event.get('idempotency_key')
+                if key:
+                    award = (event['action_type'], event.get('milestone_id'))
+                    previous = seen.get((event['user_id'], key))
+                    if previous == award:
+                        report.duplicates += 1
+                        continue
+                    if previous is not None:
+                        report.dead_letters.append({
+                            'event': event,
+                            'error': f"Idempotency key {key!r} was already used for a different award."
+                        })
+                        continue
+                    seen[(event['user_id'], key)] = award
+                entries.append(XPLedgerEntry(
+                    user_id=event['user_id'],
+                    action_type=event['action_type'],
+                    amount=event['amount'],
+                    study_material_id=event.get('study_material_id'),
+                    milestone_id=event.get('milestone_id'),
+                    idempotency_key=key
+                ))
+                gained[event['user_id']] += event['amount']
+            XPLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+            GamificationService.update_leaderboards(
+                [(entry.user_id, entry.amount, entry.study_material_id) for entry in entries]
+            )
+
+            for user_id, amount in gained.items():
+                user = User(pk=user_id)
+                totals = GamificationService._add_to_total(user, amount)
+                GamificationService.invalidate_progress_stats(user)
+                new_badges = GamificationService.check_and_award_badges(user, totals=totals)
+                if new_badges:
+                    report.new_badges[user_id] = [badge.name for badge in new_badges]
+
+        report.users = len(gained)
+        report.xp_awarded = sum(gained.values())
+        return report
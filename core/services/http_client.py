@@ -0,0 +1,229 @@
+from typing import Dict, Optional
+from collections import defaultdict
+from urllib.parse import urlparse
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+
+class HttpMetrics:
+    """Thread-safe per-host timing counters for scraper HTTP traffic.
+
+    Phases are ``dns``, ``connect`` (TCP), ``tls``, ``ttfb`` (request sent to
+    response headers), ``transfer`` (reading the body) plus ``retries`` and
+    ``bytes`` counters. Connection phases are only recorded when a new
+    connection is opened, so a low count relative to ``ttfb`` means the
+    keep-alive pool is doing its job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases = defaultdict(lambda: {'count': 0, 'total': 0.0, 'max': 0.0})
+
+    def record(self, host: str, phase: str, value: float) -> None:
+        with self._lock:
+            stats = self._phases[(host, phase)]
+            stats['count'] += 1
+            stats['total'] += value
+            stats['max'] = max(stats['max'], value)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        with self._lock:
+            result = defaultdict(dict)
+            for (host, phase), stats in self._phases.items():
+                result[host][phase] = {
+                    **stats,
+                    'mean': stats['total'] / stats['count'] if stats['count'] else 0.0
+                }
+            return dict(result)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._phases.clear()
+
+
+HTTP_METRICS = HttpMetrics()
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            # Resolve up front so DNS time can be told apart from the TCP
+            # handshake; create_connection's own lookup then hits the cache
+            socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except OSError:
+            pass  # let urllib3 raise its usual NameResolutionError
+        resolved = time.perf_counter()
+        HTTP_METRICS.record(self.host, 'dns', resolved - started)
+
+        sock = super()._new_conn()
+        self._tcp_seconds = time.perf_counter() - resolved
+        HTTP_METRICS.record(self.host, 'connect', self._tcp_seconds)
+        return sock
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        self._tcp_seconds = 0.0
+        super().connect()
+        elapsed = time.perf_counter() - started
+        # Whatever connect() spent beyond opening the socket was the TLS handshake
+        HTTP_METRICS.record(self.host, 'tls', max(0.0, elapsed - self._tcp_seconds))
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+class ResponseTooLarge(ValueError):
+    pass
+
+
+class ScraperHttpClient:
+    """Shared HTTP layer for ContentScraper.
+
+    Keeps one keep-alive ``requests.Session`` per supported domain with
+    bounded retries and backoff, applies connect/read timeouts, caps the
+    number of in-flight requests per domain and refuses bodies larger than
+    ``MAX_RESPONSE_BYTES``.
+    """
+    CONNECT_TIMEOUT = 3.05
+    READ_TIMEOUT = 15
+    RETRIES = 3
+    BACKOFF_FACTOR = 0.5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    POOL_MAXSIZE = 8
+    # Hosts whose connection pools a session keeps alive at once. A domain's
+    # session also serves its subdomains (www., m.) and both schemes, and the
+    # OTHER_DOMAINS session serves every other host, so one would thrash
+    POOL_CONNECTIONS = 16
+    MAX_IN_FLIGHT_PER_DOMAIN = 4
+    # How long a request waits for a free per-domain slot before giving up
+    SLOT_TIMEOUT = 30
+    MAX_RESPONSE_BYTES = 5 * 1024 * 1024
+    CHUNK_SIZE = 64 * 1024
+    USER_AGENT = 'ExamPrepBot/1.0 (+https://github.com/TanishqMSD/ExamPrep)'
+
+    # Requests to hosts outside SUPPORTED_DOMAINS share this pool
+    OTHER_DOMAINS = '*'
+
+    _sessions: Dict[str, requests.Session] = {}
+    _slots: Dict[str, threading.BoundedSemaphore] = {}
+    _lock = threading.Lock()
+
+    metrics = HTTP_METRICS
+
+    @classmethod
+    def domain_for(cls, url: str) -> str:
+        # Imported here: content_scraper imports this module
+        from core.services.content_scraper import ContentScraper
+
+        host = (urlparse(url).hostname or '').lower()
+        for domain in ContentScraper.SUPPORTED_DOMAINS:
+            if host == domain or host.endswith('.' + domain):
+                return domain
+        return cls.OTHER_DOMAINS
+
+    @classmethod
+    def _build_session(cls) -> requests.Session:
+        retry = Retry(
+            total=cls.RETRIES,
+            connect=cls.RETRIES,
+            read=cls.RETRIES,
+            status=cls.RETRIES,
+            backoff_factor=cls.BACKOFF_FACTOR,
+            status_forcelist=cls.RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = _TimedHTTPAdapter(
+            pool_connections=cls.POOL_CONNECTIONS, pool_maxsize=cls.POOL_MAXSIZE, max_retries=retry
+        )
+        session = requests.Session()
+        session.headers['User-Agent'] = cls.USER_AGENT
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @classmethod
+    def _session_and_slot(cls, domain: str):
+        with cls._lock:
+            if domain not in cls._sessions:
+                cls._sessions[domain] = cls._build_session()
+                cls._slots[domain] = threading.BoundedSemaphore(cls.MAX_IN_FLIGHT_PER_DOMAIN)
+            return cls._sessions[domain], cls._slots[domain]
+
+    @classmethod
+    def get(cls, url: str, headers: Optional[Dict[str, str]] = None,
+            max_bytes: Optional[int] = None) -> requests.Response:
+        """GET ``url`` through the domain's pool with the body fully read."""
+        domain = cls.domain_for(url)
+        session, slot = cls._session_and_slot(domain)
+        max_bytes = max_bytes or cls.MAX_RESPONSE_BYTES
+        host = (urlparse(url).hostname or '').lower()
+
+        if not slot.acquire(timeout=cls.SLOT_TIMEOUT):
+            raise ValueError(f"Too many concurrent requests to {domain}")
+        try:
+            started = time.perf_counter()
+            response = session.get(
+                url,
+                headers=headers,
+                timeout=(cls.CONNECT_TIMEOUT, cls.READ_TIMEOUT),
+                stream=True
+            )
+            headers_at = time.perf_counter()
+            cls.metrics.record(host, 'ttfb', headers_at - started)
+            retries = response.raw.retries
+            if retries is not None and retries.history:
+                cls.metrics.record(host, 'retries', len(retries.history))
+
+            try:
+                declared = int(response.headers.get('Content-Length', 0))
+            except ValueError:
+                declared = 0
+            if declared > max_bytes:
+                response.close()
+                raise ResponseTooLarge(f"Response from {host} is larger than {max_bytes} bytes")
+
+            body = bytearray()
+            for chunk in response.iter_content(cls.CHUNK_SIZE):
+                body.extend(chunk)
+                if len(body) > max_bytes:
+                    response.close()
+                    raise ResponseTooLarge(f"Response from {host} is larger than {max_bytes} bytes")
+            # Hand back a normal, already-consumed Response
+            response._content = bytes(body)
+            response._content_consumed = True
+
+            cls.metrics.record(host, 'transfer', time.perf_counter() - headers_at)
+            cls.metrics.record(host, 'bytes', len(body))
+            return response
+        finally:
+            slot.release()
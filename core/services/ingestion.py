@@ -0,0 +1,279 @@
+from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from core.models import IngestionJob, ScrapedContent, StudyMaterial
+from core.services.content_cache import ContentCache
+from core.services.content_scraper import ContentScraper
+from core.services.content_processor import ContentProcessor, ProcessedContent
+from core.services.gamification_events import GamificationEvents
+from core.services.material_store import StudyMaterialStore
+from core.services.near_duplicates import NearDuplicateIndex
+from core.services.refresher import MaterialRefresher
+
+class IngestionPipeline:
+    """Runs study material ingestion as scrape -> process -> persist stages.
+
+    Each stage takes the job id plus the previous stage's (JSON-serialisable)
+    ``source`` dict, so the same functions back both the Celery chain in
+    ``core.tasks`` and the in-process ``thread``/``eager`` backends.
+    """
+    BACKENDS = ('celery', 'thread', 'eager')
+    UPLOAD_DIR = 'ingestion'
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def get_backend(cls) -> str:
+        backend = getattr(settings, 'INGESTION_BACKEND', 'thread')
+        if backend not in cls.BACKENDS:
+            raise ImproperlyConfigured(
+                f"INGESTION_BACKEND must be one of: {', '.join(cls.BACKENDS)}"
+            )
+        return backend
+
+    @classmethod
+    def enqueue(cls, user: User, url: Optional[str] = None, pdf_file=None) -> IngestionJob:
+        """Record an ingestion job and hand it to the configured backend."""
+        if not url and not pdf_file:
+            raise ValidationError('Please provide either a URL or a PDF file.')
+
+        if url:
+            # Reject bad URLs up front instead of failing inside a worker
+            if not ContentScraper.is_supported_domain(url):
+                raise ValidationError(
+                    f"Unsupported domain. Please use one of: {', '.join(ContentScraper.SUPPORTED_DOMAINS)}"
+                )
+            job = IngestionJob.objects.create(user=user, source_type='webpage', url=url)
+        else:
+            pdf_path = default_storage.save(f"{cls.UPLOAD_DIR}/{uuid.uuid4().hex}.pdf", pdf_file)
+            job = IngestionJob.objects.create(
+                user=user,
+                source_type='pdf',
+                pdf_path=pdf_path,
+                pdf_name=getattr(pdf_file, 'name', '') or 'Uploaded PDF.pdf'
+            )
+
+        job_id = str(job.id)
+        transaction.on_commit(lambda: cls.dispatch(job_id))
+        return job
+
+    @classmethod
+    def dispatch(cls, job_id: str) -> None:
+        backend = cls.get_backend()
+        if backend == 'celery':
+            from core.tasks import ingestion_chain
+            ingestion_chain(job_id).apply_async()
+        elif backend == 'thread':
+            cls._get_executor().submit(cls._run_in_thread, job_id)
+        else:
+            cls.run(job_id)
+
+    @classmethod
+    def run(cls, job_id: str) -> Optional[int]:
+        """Run every stage in the current process and return the material id."""
+        try:
+            source = cls.scrape_stage(job_id)
+            source = cls.process_stage(source, job_id)
+            return cls.persist_stage(source, job_id)
+        except Exception:
+            # The failing stage has already recorded the error on the job
+            return None
+
+    @classmethod
+    def _run_in_thread(cls, job_id: str) -> Optional[int]:
+        # Pool threads get their own DB connections; don't leak them between jobs
+        close_old_connections()
+        try:
+            return cls.run(job_id)
+        finally:
+            close_old_connections()
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'INGESTION_THREAD_WORKERS', 2),
+                    thread_name_prefix='ingestion'
+                )
+            return cls._executor
+
+    @staticmethod
+    def _set_status(job_id: str, status: str, **fields) -> None:
+        IngestionJob.objects.filter(pk=job_id).update(
+            status=status,
+            progress=IngestionJob.STAGE_PROGRESS[status],
+            updated_at=timezone.now(),
+            **fields
+        )
+
+    @classmethod
+    def fail(cls, job_id: str, exc: Exception) -> None:
+        """Record ``exc`` on the job and mark it failed."""
+        print(f"[Error] Ingestion job {job_id}:", str(exc))
+        cls._set_status(job_id, IngestionJob.STATUS_FAILED, error=str(exc))
+
+    @classmethod
+    def finish(cls, job_id: str, study_material: StudyMaterial) -> None:
+        cls._set_status(job_id, IngestionJob.STATUS_DONE, study_material=study_material)
+
+    @classmethod
+    def scrape_stage(cls, job_id: str, page: Optional[Dict] = None) -> Dict:
+        """Fetch or parse the source, going through the content cache.
+
+        Returns the ``source`` dict handed to the later stages. On a cache hit
+        it already carries the processed result and/or the StudyMaterial to
+        reuse, and those stages have nothing left to do. ``page`` is a web
+        page the caller has already fetched and parsed (the crawler); it goes
+        through the same cache, refresh and near-duplicate checks.
+        """
+        cls._set_status(job_id, IngestionJob.STATUS_SCRAPING)
+        try:
+            job = IngestionJob.objects.get(pk=job_id)
+            if job.source_type == 'pdf':
+                with default_storage.open(job.pdf_path, 'rb') as handle:
+                    cache_key, entry, hit = ContentCache.fetch_pdf(File(handle, name=job.pdf_name), stream=True)
+                default_storage.delete(job.pdf_path)
+            else:
+                cache_key, entry, hit = ContentCache.fetch_webpage(job.url, page=page)
+
+            source = {'cache_key': cache_key, 'processed': None, 'study_material_id': None}
+            if hit:
+                source.update(cls._reusable_rows(entry))
+            elif job.source_type == 'webpage':
+                source.update(cls._refresh_existing(job.url, cache_key, entry))
+
+            if source.get('scraped_content_id') is None:
+                scraped = entry['scraped']
+                if 'content' not in scraped:
+                    # A cache hit whose ScrapedContent was deleted after the lookup
+                    ContentCache.invalidate(cache_key)
+                    raise ValueError('The stored copy of this source was just removed. Please try again.')
+                signature = NearDuplicateIndex.signature(scraped['content'])
+                duplicate = NearDuplicateIndex.find_material(signature)
+                if duplicate:
+                    # Same document under another URL or upload: reuse its rows and skip processing
+                    source['scraped_content_id'] = duplicate.scraped_content_id
+                    source['study_material_id'] = duplicate.study_material_id
+                    ContentCache.update(
+                        cache_key,
+                        scraped_content_id=duplicate.scraped_content_id,
+                        study_material_id=duplicate.study_material_id
+                    )
+                else:
+                    with transaction.atomic():
+                        scraped_content = ScrapedContent.objects.create(
+                            url=job.url,
+                            title=scraped['title'],
+                            raw_content=scraped['content'],
+                            source_type=scraped['source_type'],
+                            etag=entry['etag'] or '',
+                            last_modified=entry['last_modified'] or ''
+                        )
+                        NearDuplicateIndex.add(scraped_content.id, signature)
+                    source['scraped_content_id'] = scraped_content.id
+                    ContentCache.update(cache_key, scraped_content_id=scraped_content.id)
+
+            IngestionJob.objects.filter(pk=job_id).update(scraped_content_id=source['scraped_content_id'])
+            return source
+        except Exception as e:
+            cls.fail(job_id, e)
+            raise
+
+    @staticmethod
+    def _refresh_existing(url: str, cache_key: str, entry: Dict) -> Dict:
+        """Update the material of a page we already have to its newly scraped text.
+
+        Re-ingesting a changed page then keeps the material, and the progress
+        on its unchanged milestones, instead of creating a second copy.
+        """
+        scraped_content = MaterialRefresher.find_page(url)
+        if scraped_content is None:
+            return {}
+        result = MaterialRefresher.apply(scraped_content, {
+            **entry['scraped'],
+            'etag': entry['etag'],
+            'last_modified': entry['last_modified']
+        })
+        ContentCache.update(
+            cache_key,
+            scraped_content_id=scraped_content.id,
+            study_material_id=result.study_material_ids[0]
+        )
+        return {'scraped_content_id': scraped_content.id, 'study_material_id': result.study_material_ids[0]}
+
+    @staticmethod
+    def _reusable_rows(entry: Dict) -> Dict:
+        """Pick the parts of a cache hit that are still valid in the database."""
+        reusable = {}
+        scraped_content_id = entry.get('scraped_content_id')
+        if scraped_content_id and ScrapedContent.objects.filter(pk=scraped_content_id).exists():
+            reusable['scraped_content_id'] = scraped_content_id
+            study_material_id = entry.get('study_material_id')
+            if study_material_id and StudyMaterial.objects.filter(
+                    pk=study_material_id, scraped_content_id=scraped_content_id).exists():
+                reusable['study_material_id'] = study_material_id
+        if entry.get('processed'):
+            reusable['processed'] = entry['processed']
+        return reusable
+
+    @classmethod
+    def process_stage(cls, source: Dict, job_id: str) -> Dict:
+        """Run ContentProcessor over the scraped text unless it is cached."""
+        cls._set_status(job_id, IngestionJob.STATUS_PROCESSING)
+        if source.get('study_material_id') or source.get('processed'):
+            return source
+
+        try:
+            scraped_content = ScrapedContent.objects.select_related('blob').get(pk=source['scraped_content_id'])
+            processed = asdict(ContentProcessor.process_content(
+                content=scraped_content.raw_content,
+                title=scraped_content.title
+            ))
+            ContentCache.update(source['cache_key'], processed=processed)
+            return {**source, 'processed': processed}
+        except Exception as e:
+            cls.fail(job_id, e)
+            raise
+
+    @classmethod
+    def persist_stage(cls, source: Dict, job_id: str) -> int:
+        """Write the StudyMaterial and its children, then award XP."""
+        cls._set_status(job_id, IngestionJob.STATUS_PERSISTING)
+        try:
+            job = IngestionJob.objects.select_related('user').get(pk=job_id)
+
+            study_material_id = source.get('study_material_id')
+            if study_material_id:
+                study_material = StudyMaterial.objects.only('id').get(pk=study_material_id)
+            else:
+                # Material and children are written in one transaction
+                scraped_content = ScrapedContent.objects.only('id').get(pk=source['scraped_content_id'])
+                study_material = StudyMaterialStore.persist(ProcessedContent(**source['processed']), scraped_content)
+                ContentCache.update(
+                    source['cache_key'],
+                    scraped_content_id=scraped_content.id,
+                    study_material_id=study_material.id
+                )
+
+            # Award XP to user for creating material; crawler jobs have no user
+            if job.user_id:
+                GamificationEvents.publish(job.user, 'read_material', study_material=study_material)
+
+            cls.finish(job_id, study_material)
+            return study_material.id
+        except Exception as e:
+            cls.fail(job_id, e)
+            raise
@@ -0,0 +1,323 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.models import XPLedgerEntry
+
+DEFAULT_SETTINGS = {
+    'BACKEND': 'redis',
+    'REDIS_URL': 'redis://localhost:6379/2',
+    'KEY_PREFIX': 'examprep:leaderboard:',
+    # Weekly boards are dropped this many weeks after the week ends
+    'WEEKS_KEPT': 2,
+}
+
+
+class SortedSetBackend:
+    """In-process stand-in for a Redis sorted set per board.
+
+    Each board keeps ``member -> score`` plus a list of ``(-score, member)``
+    kept sorted with bisect, so rank lookups are O(log n) and top-N reads
+    are a slice.
+    """
+
+    def __init__(self):
+        self._scores: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._order: Dict[str, List[Tuple[float, str]]] = defaultdict(list)
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _expire_stale(self, board: str) -> None:
+        expires_at = self._expires.get(board)
+        if expires_at is not None and expires_at < time.time():
+            self._scores.pop(board, None)
+            self._order.pop(board, None)
+            self._expires.pop(board, None)
+
+    def _remove(self, board: str, member: str) -> Optional[float]:
+        score = self._scores[board].pop(member, None)
+        if score is not None:
+            order = self._order[board]
+            del order[bisect_left(order, (-score, member))]
+        return score
+
+    def incr(self, board: str, member: str, amount: float) -> float:
+        with self._lock:
+            self._expire_stale(board)
+            score = (self._remove(board, member) or 0) + amount
+            self._scores[board][member] = score
+            insort(self._order[board], (-score, member))
+            return score
+
+    def replace(self, board: str, scores: Dict[str, float]) -> None:
+        with self._lock:
+            self._scores[board] = dict(scores)
+            self._order[board] = sorted((-score, member) for member, score in scores.items())
+            self._expires.pop(board, None)
+
+    def expire_at(self, board: str, timestamp: float) -> None:
+        with self._lock:
+            self._expires[board] = timestamp
+
+    def top(self, board: str, count: int) -> List[Tuple[str, float]]:
+        with self._lock:
+            self._expire_stale(board)
+            return [(member, -score) for score, member in self._order.get(board, [])[:count]]
+
+    def rank(self, board: str, member: str) -> Optional[Tuple[int, float]]:
+        """Zero-based rank and score of ``member``, highest score first."""
+        with self._lock:
+            self._expire_stale(board)
+            score = self._scores.get(board, {}).get(member)
+            if score is None:
+                return None
+            return bisect_left(self._order[board], (-score, member)), score
+
+    def size(self, board: str) -> int:
+        with self._lock:
+            self._expire_stale(board)
+            return len(self._scores.get(board, {}))
+
+    def delete(self, board: str) -> None:
+        with self._lock:
+            self._scores.pop(board, None)
+            self._order.pop(board, None)
+            self._expires.pop(board, None)
+
+    def boards(self) -> List[str]:
+        with self._lock:
+            return list(self._scores)
+
+
+class RedisSortedSetBackend:
+    """One Redis ZSET per board, shared by every process.
+
+    ``client`` can be any object implementing the redis-py commands used
+    here, so a local stand-in can replace a real server in tests.
+    """
+
+    def __init__(self, url: str = None, key_prefix: str = 'examprep:leaderboard:', client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.key_prefix = key_prefix
+
+    @staticmethod
+    def _member(member) -> str:
+        return member.decode() if isinstance(member, bytes) else member
+
+    def incr(self, board: str, member: str, amount: float) -> float:
+        return self.client.zincrby(self.key_prefix + board, amount, member)
+
+    def replace(self, board: str, scores: Dict[str, float]) -> None:
+        # Built under a temporary key and renamed so readers never see a half-built board
+        key = self.key_prefix + board
+        pipe = self.client.pipeline()
+        if scores:
+            pipe.delete(f"{key}:rebuild")
+            pipe.zadd(f"{key}:rebuild", scores)
+            pipe.rename(f"{key}:rebuild", key)
+        else:
+            pipe.delete(key)
+        pipe.execute()
+
+    def expire_at(self, board: str, timestamp: float) -> None:
+        self.client.expireat(self.key_prefix + board, int(timestamp))
+
+    def top(self, board: str, count: int) -> List[Tuple[str, float]]:
+        entries = self.client.zrevrange(self.key_prefix + board, 0, count - 1, withscores=True)
+        return [(self._member(member), score) for member, score in entries]
+
+    def rank(self, board: str, member: str) -> Optional[Tuple[int, float]]:
+        pipe = self.client.pipeline()
+        pipe.zrevrank(self.key_prefix + board, member)
+        pipe.zscore(self.key_prefix + board, member)
+        rank, score = pipe.execute()
+        return None if rank is None else (rank, score)
+
+    def size(self, board: str) -> int:
+        return self.client.zcard(self.key_prefix + board)
+
+    def delete(self, board: str) -> None:
+        self.client.delete(self.key_prefix + board)
+
+    def boards(self) -> List[str]:
+        boards = []
+        for key in self.client.scan_iter(match=f"{self.key_prefix}*"):
+            board = self._member(key)[len(self.key_prefix):]
+            if not board.endswith(':rebuild'):
+                boards.append(board)
+        return boards
+
+
+class Leaderboard:
+    """Ranked XP totals for the global board and one board per study material.
+
+    Every board also has a weekly variant per ISO week that only counts XP
+    earned that week; the current week and the WEEKS_KEPT weeks before it can
+    be read, older ones expire. Boards are updated incrementally from the gamification
+    event consumer and can be rebuilt from the XP ledger. The ``redis``
+    backend is shared by every process; the ``locmem`` backend is rebuilt
+    lazily the first time a process reads it and then only sees the awards
+    applied in that process, so it is only fit for a single process.
+    """
+    GLOBAL = 'global'
+
+    _backend = None
+    _loaded = False
+    _backend_lock = threading.Lock()
+
+    @staticmethod
+    def get_settings() -> Dict:
+        return {**DEFAULT_SETTINGS, **getattr(settings, 'LEADERBOARD', {})}
+
+    @classmethod
+    def get_backend(cls):
+        with cls._backend_lock:
+            if cls._backend is None:
+                options = cls.get_settings()
+                if options['BACKEND'] == 'redis':
+                    cls._backend = RedisSortedSetBackend(url=options['REDIS_URL'], key_prefix=options['KEY_PREFIX'])
+                    # Redis boards outlive the process; rebuild them with manage.py rebuild_leaderboards
+                    cls._loaded = True
+                else:
+                    cls._backend = SortedSetBackend()
+            return cls._backend
+
+    @classmethod
+    def set_backend(cls, backend, loaded: bool = True) -> None:
+        """Swap the backend, e.g. for a Redis stand-in in tests."""
+        with cls._backend_lock:
+            cls._backend = backend
+            cls._loaded = loaded
+
+    @classmethod
+    def _ready_backend(cls):
+        backend = cls.get_backend()
+        if not cls._loaded:
+            cls.rebuild()
+        return backend
+
+    @staticmethod
+    def week_start(at: Optional[datetime] = None, weeks_ago: int = 0) -> datetime:
+        """Midnight on the Monday of the week ``weeks_ago`` weeks before ``at`` (default now)."""
+        local = timezone.localtime(at or timezone.now())
+        monday = local.date() - timedelta(days=local.weekday(), weeks=weeks_ago)
+        return timezone.make_aware(datetime.combine(monday, datetime.min.time()), local.tzinfo)
+
+    @classmethod
+    def board_name(cls, study_material_id: Optional[int] = None, weekly: bool = False,
+                   at: Optional[datetime] = None) -> str:
+        scope = f"material:{study_material_id}" if study_material_id else cls.GLOBAL
+        if weekly:
+            year, week, _ = cls.week_start(at).isocalendar()
+            scope = f"{scope}:week:{year}-W{week:02d}"
+        return scope
+
+    @classmethod
+    def _week_expiry(cls, at: Optional[datetime] = None) -> float:
+        weeks = 1 + cls.get_settings()['WEEKS_KEPT']
+        return (cls.week_start(at) + timedelta(weeks=weeks)).timestamp()
+
+    @classmethod
+    def record(cls, awards: Iterable[Tuple[int, int, Optional[int]]], at: Optional[datetime] = None) -> None:
+        """Add ``(user_id, amount, study_material_id)`` awards to every board they count towards.
+
+        Call it after the awards' ledger entries are committed.
+        """
+        backend = cls.get_backend()
+        if not cls._loaded:
+            # The rebuild reads the ledger, which already holds these awards
+            cls.rebuild()
+            return
+        totals = defaultdict(int)
+        for user_id, amount, study_material_id in awards:
+            totals[(None, user_id)] += amount
+            if study_material_id:
+                totals[(study_material_id, user_id)] += amount
+
+        weekly_boards = set()
+        for (study_material_id, user_id), amount in totals.items():
+            backend.incr(cls.board_name(study_material_id), str(user_id), amount)
+            weekly = cls.board_name(study_material_id, weekly=True, at=at)
+            backend.incr(weekly, str(user_id), amount)
+            weekly_boards.add(weekly)
+        for board in weekly_boards:
+            backend.expire_at(board, cls._week_expiry(at))
+
+    @classmethod
+    def top(cls, count: int = 10, study_material_id: Optional[int] = None, weekly: bool = False,
+            at: Optional[datetime] = None) -> List[Dict]:
+        """The top ``count`` entries; a weekly board is the week containing ``at`` (default this week)."""
+        entries = cls._ready_backend().top(cls.board_name(study_material_id, weekly, at), count)
+        usernames = dict(
+            User.objects.filter(pk__in=[int(member) for member, _ in entries]).values_list('id', 'username')
+        )
+        return [
+            {'rank': rank, 'user_id': int(member), 'username': usernames.get(int(member)), 'xp': int(score)}
+            for rank, (member, score) in enumerate(entries, start=1)
+        ]
+
+    @classmethod
+    def rank(cls, user: User, study_material_id: Optional[int] = None, weekly: bool = False,
+             at: Optional[datetime] = None) -> Optional[Dict]:
+        """One-based rank and XP of ``user`` on a board, or None if they aren't on it."""
+        backend = cls._ready_backend()
+        board = cls.board_name(study_material_id, weekly, at)
+        found = backend.rank(board, str(user.pk))
+        if found is None:
+            return None
+        rank, score = found
+        return {'rank': rank + 1, 'xp': int(score), 'of': backend.size(board)}
+
+    @classmethod
+    def rebuild(cls) -> Dict[str, int]:
+        """Recompute every board from the XP ledger; returns members per board.
+
+        Weekly boards are rebuilt for the current week and the WEEKS_KEPT
+        weeks before it. Boards the ledger no longer accounts for (a deleted
+        material, a week with no awards left, a week past WEEKS_KEPT) are deleted.
+        """
+        backend = cls.get_backend()
+        boards: Dict[str, Dict[str, float]] = defaultdict(dict)
+
+        rows = XPLedgerEntry.objects.values('user_id').annotate(total=Sum('amount'))
+        boards[cls.board_name()] = {str(row['user_id']): row['total'] for row in rows}
+        rows = XPLedgerEntry.objects.filter(study_material__isnull=False)\
+            .values('study_material_id', 'user_id').annotate(total=Sum('amount'))
+        for row in rows:
+            boards[cls.board_name(row['study_material_id'])][str(row['user_id'])] = row['total']
+
+        weeks = [cls.week_start(weeks_ago=weeks_ago) for weeks_ago in range(cls.get_settings()['WEEKS_KEPT'] + 1)]
+        week_boards = {}
+        for index, since in enumerate(weeks):
+            entries = XPLedgerEntry.objects.filter(created_at__gte=since)
+            if index:
+                entries = entries.filter(created_at__lt=weeks[index - 1])
+            rows = entries.values('user_id').annotate(total=Sum('amount'))
+            boards[cls.board_name(weekly=True, at=since)] = {str(row['user_id']): row['total'] for row in rows}
+            week_boards[cls.board_name(weekly=True, at=since)] = since
+            rows = entries.filter(study_material__isnull=False)\
+                .values('study_material_id', 'user_id').annotate(total=Sum('amount'))
+            for row in rows:
+                board = cls.board_name(row['study_material_id'], weekly=True, at=since)
+                boards[board][str(row['user_id'])] = row['total']
+                week_boards[board] = since
+
+        for board, scores in boards.items():
+            backend.replace(board, scores)
+            if board in week_boards:
+                backend.expire_at(board, cls._week_expiry(week_boards[board]))
+        for board in set(backend.boards()) - set(boards):
+            backend.delete(board)
+        cls._loaded = True
+        return {board: len(scores) for board, scores in boards.items()}
@@ -0,0 +1,113 @@
+from typing import Dict, List, Optional
+from dataclasses import asdict, dataclass, field
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.db.models.signals import post_delete, post_save
+
+from core.models import BookmarkedInsight, KeyConcept, StudyMaterial, StudyMilestone, UserProgress
+
+
+@dataclass
+class MaterialDetail:
+    id: int
+    title: str
+    summary: str
+    eli5_explanation: str
+    study_duration: int
+    key_concepts: List[Dict] = field(default_factory=list)
+    milestones: List[Dict] = field(default_factory=list)
+    insights: List[Dict] = field(default_factory=list)
+
+
+class StudyMaterialLoader:
+    """Loads a study material with all its children for the detail page.
+
+    The material, key concepts, milestones and insights are read with one
+    query per table and cached per material; edits to any of them drop the
+    entry. Only the user's completed milestones are read on every request,
+    so a cached page costs one query and an uncached one five.
+    """
+    CACHE_TTL = 60 * 60
+
+    @staticmethod
+    def cache_key(material_id: int) -> str:
+        return f"study_material:{material_id}"
+
+    @classmethod
+    def invalidate(cls, material_id: int) -> None:
+        transaction.on_commit(lambda: cache.delete(cls.cache_key(material_id)))
+
+    @classmethod
+    def _fetch(cls, material_id: int) -> Dict:
+        # Raises StudyMaterial.DoesNotExist for an unknown id
+        material = StudyMaterial.objects.prefetch_related(
+            Prefetch('key_concepts', queryset=KeyConcept.objects.order_by('id')),
+            Prefetch('milestones', queryset=StudyMilestone.objects.order_by('order', 'id')),
+            Prefetch('bookmarkedinsight_set', queryset=BookmarkedInsight.objects.order_by('id'))
+        ).get(pk=material_id)
+
+        return asdict(MaterialDetail(
+            id=material.id,
+            title=material.title,
+            summary=material.summary,
+            eli5_explanation=material.eli5_explanation,
+            study_duration=material.study_duration,
+            key_concepts=[
+                {'concept': concept.concept, 'definition': concept.definition}
+                for concept in material.key_concepts.all()
+            ],
+            milestones=[
+                {
+                    'id': milestone.id,
+                    'title': milestone.title,
+                    'description': milestone.description,
+                    'order': milestone.order,
+                    'xp_reward': milestone.xp_reward
+                }
+                for milestone in material.milestones.all()
+            ],
+            insights=[
+                {'content': insight.content, 'importance_level': insight.importance_level}
+                for insight in material.bookmarkedinsight_set.all()
+            ]
+        ))
+
+    @classmethod
+    def load(cls, material_id: int, user: Optional[User] = None) -> MaterialDetail:
+        """Return the material with ``is_completed`` set on each milestone for ``user``."""
+        key = cls.cache_key(material_id)
+        data = cache.get(key)
+        if data is None:
+            data = cls._fetch(material_id)
+            cache.set(key, data, cls.CACHE_TTL)
+
+        completed = set()
+        if user is not None and user.is_authenticated:
+            completed = set(UserProgress.objects.filter(
+                user=user,
+                study_material_id=material_id,
+                completed=True
+            ).values_list('milestone_id', flat=True))
+
+        detail = MaterialDetail(**data)
+        # Copies, so the per-user flag never leaks into the cached dicts
+        detail.milestones = [
+            {**milestone, 'is_completed': milestone['id'] in completed}
+            for milestone in detail.milestones
+        ]
+        return detail
+
+
+def _invalidate_material(sender, instance, **kwargs):
+    material_id = instance.pk if sender is StudyMaterial else instance.study_material_id
+    StudyMaterialLoader.invalidate(material_id)
+
+
+def connect_signals():
+    """Drop cached material details when any of their rows change; called from CoreConfig.ready()."""
+    for model in (StudyMaterial, KeyConcept, StudyMilestone, BookmarkedInsight):
+        post_save.connect(_invalidate_material, sender=model, dispatch_uid=f'material_loader_save_{model.__name__}')
+        post_delete.connect(_invalidate_material, sender=model, dispatch_uid=f'material_loader_delete_{model.__name__}')
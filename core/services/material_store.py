@@ -0,0 +1,198 @@
+from typing import Dict, Iterable, List, Tuple, Union
+from dataclasses import dataclass, field
+import time
+
+from django.db import connection, transaction
+
+from core.models import (
+    ScrapedContent,
+    StudyMaterial,
+    KeyConcept,
+    StudyMilestone,
+    BookmarkedInsight,
+    Quiz,
+    Question
+)
+from core.services.content_processor import ProcessedContent
+from core.services.near_duplicates import NearDuplicateIndex
+from core.services.search import SearchIndex
+
+# A source is either an existing (or unsaved) ScrapedContent row or the dict
+# returned by ContentScraper.process_content plus an optional 'url' key
+Source = Union[ScrapedContent, Dict[str, str]]
+
+@dataclass
+class BatchTiming:
+    batch: int
+    size: int
+    seconds: float
+
+@dataclass
+class PersistReport:
+    materials: List[StudyMaterial] = field(default_factory=list)
+    timings: List[BatchTiming] = field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(timing.seconds for timing in self.timings)
+
+class StudyMaterialStore:
+    """Writes ProcessedContent to the database with one INSERT per table.
+
+    Each batch runs in a single transaction: the ScrapedContent rows, their
+    StudyMaterial rows, every KeyConcept, StudyMilestone and
+    BookmarkedInsight child and the generated Quiz and its Questions either
+    all land or none do.
+    """
+    BATCH_SIZE = 100
+
+    @classmethod
+    def persist(cls, processed: ProcessedContent, source: Source) -> StudyMaterial:
+        """Persist a single processed document and return its StudyMaterial."""
+        return cls.persist_many([(processed, source)]).materials[0]
+
+    @classmethod
+    def persist_many(cls, entries: Iterable[Tuple[ProcessedContent, Source]],
+                     batch_size: int = None) -> PersistReport:
+        """Persist many processed documents, e.g. for backfills.
+
+        Entries are written ``batch_size`` at a time and the report records
+        how long each batch took.
+        """
+        batch_size = batch_size or cls.BATCH_SIZE
+        report = PersistReport()
+        batch = []
+
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                cls._persist_batch(batch, report)
+                batch = []
+        if batch:
+            cls._persist_batch(batch, report)
+
+        return report
+
+    @staticmethod
+    def _to_scraped_content(source: Source) -> ScrapedContent:
+        if isinstance(source, ScrapedContent):
+            return source
+        return ScrapedContent(
+            url=source.get('url', ''),
+            title=source['title'],
+            raw_content=source['content'],
+            source_type=source['source_type'],
+            etag=source.get('etag') or '',
+            last_modified=source.get('last_modified') or ''
+        )
+
+    @staticmethod
+    def _to_question(quiz: Quiz, question: Dict[str, str]) -> Question:
+        # Generated options are whole sentences; trim them to the column
+        # width, the same way for the answer so grading still matches
+        width = Question._meta.get_field('correct_answer').max_length
+        return Question(
+            quiz=quiz,
+            text=question['question'],
+            correct_answer=question['correct_answer'][:width],
+            option1=question['option1'][:width],
+            option2=question['option2'][:width],
+            option3=question['option3'][:width],
+            option4=question['option4'][:width]
+        )
+
+    @staticmethod
+    def _bulk_insert_parents(model, objs: List) -> None:
+        # Children need parent primary keys; backends that can't return them
+        # from a bulk INSERT fall back to one INSERT per parent row
+        if connection.features.can_return_rows_from_bulk_insert:
+            model.objects.bulk_create(objs)
+        else:
+            for obj in objs:
+                obj.save()
+
+    @classmethod
+    def _persist_batch(cls, batch: List[Tuple[ProcessedContent, Source]],
+                       report: PersistReport) -> None:
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            scraped = [cls._to_scraped_content(source) for _, source in batch]
+            new_scraped = [s for s in scraped if s.pk is None]
+            # bulk_create skips save(), so store the compressed text explicitly
+            ScrapedContent.attach_blobs(new_scraped)
+            cls._bulk_insert_parents(ScrapedContent, new_scraped)
+            # Rows passed in already saved were fingerprinted by whoever created them
+            NearDuplicateIndex.add_many(
+                (s.pk, NearDuplicateIndex.signature(s.raw_content)) for s in new_scraped
+            )
+
+            materials = [
+                StudyMaterial(
+                    scraped_content=scraped_content,
+                    title=processed.title,
+                    summary=processed.summary,
+                    eli5_explanation=processed.eli5_explanation,
+                    study_duration=processed.estimated_duration
+                )
+                for (processed, _), scraped_content in zip(batch, scraped)
+            ]
+            cls._bulk_insert_parents(StudyMaterial, materials)
+
+            concepts, milestones, insights = [], [], []
+            for (processed, _), study_material in zip(batch, materials):
+                concepts.extend(
+                    KeyConcept(
+                        study_material=study_material,
+                        concept=concept['concept'],
+                        definition=concept['definition']
+                    )
+                    for concept in processed.key_concepts
+                )
+                milestones.extend(
+                    StudyMilestone(
+                        study_material=study_material,
+                        title=milestone['title'],
+                        description=milestone['description'],
+                        order=i,
+                        xp_reward=milestone['xp_reward']
+                    )
+                    for i, milestone in enumerate(processed.study_milestones, 1)
+                )
+                insights.extend(
+                    BookmarkedInsight(
+                        study_material=study_material,
+                        content=insight['content'],
+                        importance_level=insight['importance_level']
+                    )
+                    for insight in processed.bookmarked_insights
+                )
+
+            KeyConcept.objects.bulk_create(concepts)
+            StudyMilestone.objects.bulk_create(milestones)
+            BookmarkedInsight.objects.bulk_create(insights)
+
+            quizzes = [
+                (processed, Quiz(
+                    title=f"{processed.title} quiz"[:200],
+                    description=f"Questions generated from {processed.title}",
+                    study_material=study_material
+                ))
+                for (processed, _), study_material in zip(batch, materials)
+                if processed.quiz_questions
+            ]
+            cls._bulk_insert_parents(Quiz, [quiz for _, quiz in quizzes])
+            Question.objects.bulk_create([
+                cls._to_question(quiz, question)
+                for processed, quiz in quizzes
+                for question in processed.quiz_questions
+            ])
+            # bulk_create sends no post_save, so index the batch here
+            SearchIndex.index_materials(materials, concepts)
+
+        report.materials.extend(materials)
+        report.timings.append(BatchTiming(
+            batch=len(report.timings) + 1,
+            size=len(batch),
+            seconds=time.perf_counter() - started
+        ))
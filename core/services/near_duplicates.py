@@ -0,0 +1,227 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import hashlib
+import random
+import struct
+import zlib
+
+from django.conf import settings
+
+from core.models import ContentFingerprint, ContentFingerprintBand, StudyMaterial
+from core.services.summarizer import TOKEN_RE
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy comes with pandas in requirements.txt
+    np = None
+
+# NUM_PERM and BANDS shape the stored fingerprints; after changing either,
+# run ``manage.py backfill_fingerprints --rebuild``
+DEFAULT_SETTINGS = {
+    # Estimated Jaccard similarity of word shingles at which an upload reuses an existing material
+    'THRESHOLD': 0.9,
+    'NUM_PERM': 128,
+    # 16 bands of 8 rows: pairs above ~0.7 similarity almost always share a bucket
+    'BANDS': 16,
+    'SHINGLE_SIZE': 5,
+}
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+# Fixed so every process derives the same permutations
+PERMUTATION_SEED = 1_000_003
+# Multiplier for combining token hashes into shingle hashes
+SHINGLE_BASE = 1_000_003
+SHINGLE_CHUNK = 20_000
+
+
+@dataclass
+class NearDuplicate:
+    scraped_content_id: int
+    similarity: float
+    study_material_id: Optional[int] = None
+
+
+class MinHasher:
+    """MinHash signatures over word shingles of a document's text.
+
+    Text is lowercased and tokenised (which also drops punctuation and
+    whitespace differences), each run of SHINGLE_SIZE words is hashed, and
+    the signature keeps the minimum of NUM_PERM universal hash functions over
+    those shingles. Two signatures agree in a fraction of positions that
+    estimates the Jaccard similarity of the documents' shingle sets.
+    """
+
+    def __init__(self, num_perm: int, shingle_size: int):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(PERMUTATION_SEED)
+        # a < 2**31 and x < 2**32 keep a * x + b inside 64 bits
+        self.a = [rng.randrange(1, 1 << 31) for _ in range(num_perm)]
+        self.b = [rng.randrange(0, 1 << 32) for _ in range(num_perm)]
+
+    def shingle_hashes(self, text: str) -> List[int]:
+        tokens = TOKEN_RE.findall(text.lower())
+        if not tokens:
+            return []
+        vocab = {token: zlib.crc32(token.encode()) for token in set(tokens)}
+        hashes = [vocab[token] for token in tokens]
+        size = min(self.shingle_size, len(hashes))
+
+        shingles = []
+        for start in range(len(hashes) - size + 1):
+            value = 0
+            for token_hash in hashes[start:start + size]:
+                value = (value * SHINGLE_BASE + token_hash) & MAX_HASH
+            shingles.append(value)
+        return shingles
+
+    def _shingle_array(self, text: str) -> 'np.ndarray':
+        tokens = TOKEN_RE.findall(text.lower())
+        if not tokens:
+            return np.zeros(0, dtype=np.uint64)
+        vocab = {token: zlib.crc32(token.encode()) for token in set(tokens)}
+        hashes = np.fromiter((vocab[token] for token in tokens), dtype=np.uint64, count=len(tokens))
+        size = min(self.shingle_size, len(hashes))
+        count = len(hashes) - size + 1
+
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(size):
+            shingles = (shingles * np.uint64(SHINGLE_BASE) + hashes[offset:offset + count]) & np.uint64(MAX_HASH)
+        return np.unique(shingles)
+
+    def signature(self, text: str) -> Optional[List[int]]:
+        """The document's signature, or None if it has no words."""
+        if np is not None:
+            shingles = self._shingle_array(text)
+            if not len(shingles):
+                return None
+            a = np.array(self.a, dtype=np.uint64)[:, None]
+            b = np.array(self.b, dtype=np.uint64)[:, None]
+            signature = np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+            # In chunks so a multi-MB document never needs a NUM_PERM x shingles matrix
+            for start in range(0, len(shingles), SHINGLE_CHUNK):
+                chunk = shingles[None, start:start + SHINGLE_CHUNK]
+                hashed = ((a * chunk + b) % np.uint64(MERSENNE_PRIME)) & np.uint64(MAX_HASH)
+                signature = np.minimum(signature, hashed.min(axis=1))
+            return signature.tolist()
+
+        shingles = set(self.shingle_hashes(text))
+        if not shingles:
+            return None
+        return [
+            min(((a * x + b) % MERSENNE_PRIME) & MAX_HASH for x in shingles)
+            for a, b in zip(self.a, self.b)
+        ]
+
+    @staticmethod
+    def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+        return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+class NearDuplicateIndex:
+    """LSH index of ContentFingerprints for finding near-duplicate uploads.
+
+    Each signature is cut into BANDS bands; a band's hash is stored as a
+    ContentFingerprintBand bucket. Documents sharing at least one bucket are
+    candidates, and a candidate only counts as a duplicate once the full
+    signatures agree on at least THRESHOLD of their positions. A lookup is
+    one indexed query for the candidates and one for their materials.
+    """
+    _hasher: Optional[MinHasher] = None
+
+    @staticmethod
+    def get_settings() -> Dict:
+        return {**DEFAULT_SETTINGS, **getattr(settings, 'NEAR_DUPLICATES', {})}
+
+    @classmethod
+    def hasher(cls) -> MinHasher:
+        options = cls.get_settings()
+        if (cls._hasher is None or cls._hasher.num_perm != options['NUM_PERM']
+                or cls._hasher.shingle_size != options['SHINGLE_SIZE']):
+            cls._hasher = MinHasher(options['NUM_PERM'], options['SHINGLE_SIZE'])
+        return cls._hasher
+
+    @classmethod
+    def signature(cls, text: str) -> Optional[List[int]]:
+        return cls.hasher().signature(text)
+
+    @staticmethod
+    def pack(signature: Sequence[int]) -> bytes:
+        return struct.pack(f'<{len(signature)}I', *signature)
+
+    @staticmethod
+    def unpack(data: bytes) -> Tuple[int, ...]:
+        data = bytes(data)
+        return struct.unpack(f'<{len(data) // 4}I', data)
+
+    @classmethod
+    def band_buckets(cls, signature: Sequence[int]) -> List[int]:
+        bands = cls.get_settings()['BANDS']
+        rows = len(signature) // bands
+        buckets = []
+        for band in range(bands):
+            data = struct.pack(f'<I{rows}I', band, *signature[band * rows:(band + 1) * rows])
+            buckets.append(int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little', signed=True))
+        return buckets
+
+    @classmethod
+    def add_many(cls, entries: Iterable[Tuple[int, Optional[Sequence[int]]]]) -> int:
+        """Index (scraped_content_id, signature) pairs; entries without a signature are skipped."""
+        fingerprints, bands = [], []
+        for scraped_content_id, signature in entries:
+            if signature is None:
+                continue
+            fingerprints.append(ContentFingerprint(scraped_content_id=scraped_content_id, signature=cls.pack(signature)))
+            bands.extend(
+                ContentFingerprintBand(fingerprint_id=scraped_content_id, bucket=bucket)
+                for bucket in cls.band_buckets(signature)
+            )
+        ContentFingerprint.objects.bulk_create(fingerprints, batch_size=500)
+        ContentFingerprintBand.objects.bulk_create(bands, batch_size=2000)
+        return len(fingerprints)
+
+    @classmethod
+    def add(cls, scraped_content_id: int, signature: Optional[Sequence[int]]) -> None:
+        cls.add_many([(scraped_content_id, signature)])
+
+    @classmethod
+    def similar(cls, signature: Sequence[int], threshold: Optional[float] = None) -> List[NearDuplicate]:
+        """Indexed documents at or above ``threshold`` similarity, most similar first."""
+        if threshold is None:
+            threshold = cls.get_settings()['THRESHOLD']
+        candidates = ContentFingerprint.objects.filter(
+            bands__bucket__in=cls.band_buckets(signature)
+        ).distinct().values_list('scraped_content_id', 'signature')
+
+        matches = []
+        for scraped_content_id, stored in candidates:
+            stored = cls.unpack(stored)
+            if len(stored) != len(signature):
+                continue
+            similarity = MinHasher.similarity(signature, stored)
+            if similarity >= threshold:
+                matches.append(NearDuplicate(scraped_content_id, similarity))
+        matches.sort(key=lambda match: (-match.similarity, match.scraped_content_id))
+        return matches
+
+    @classmethod
+    def find_material(cls, signature: Optional[Sequence[int]],
+                      threshold: Optional[float] = None) -> Optional[NearDuplicate]:
+        """The most similar indexed document that already has a StudyMaterial, if any."""
+        if signature is None:
+            return None
+        matches = cls.similar(signature, threshold)
+        if not matches:
+            return None
+
+        materials = {}
+        for scraped_content_id, material_id in StudyMaterial.objects.filter(
+                scraped_content_id__in=[match.scraped_content_id for match in matches]
+        ).order_by('id').values_list('scraped_content_id', 'id'):
+            materials.setdefault(scraped_content_id, material_id)
+        for match in matches:
+            if match.scraped_content_id in materials:
+                match.study_material_id = materials[match.scraped_content_id]
+                return match
+        return None
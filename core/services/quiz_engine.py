@@ -0,0 +1,158 @@
+from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+import json
+import random
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from core.models import Progress, Question, Quiz, StudyMaterial
+from core.services.gamification_events import GamificationEvents
+
+
+@dataclass
+class QuizResult:
+    quiz_id: int
+    correct: int
+    total: int
+    # Question id -> whether the submitted answer was right
+    results: Dict[str, bool] = field(default_factory=dict)
+    # Question id -> correct answer, shown once the quiz is submitted
+    answers: Dict[str, str] = field(default_factory=dict)
+    study_material_id: Optional[int] = None
+
+    @property
+    def score(self) -> int:
+        return round(100 * self.correct / self.total) if self.total else 0
+
+
+class QuizEngine:
+    """Serves quizzes from a cached, pre-serialized form and grades whole submissions.
+
+    A quiz is read once and cached as JSON fragments plus its answer key.
+    Serving it only shuffles each question's option fragments with a seeded
+    RNG and joins strings, so the same seed always gives the same order and
+    no request after the first touches the database. Grading a submission
+    checks every answer against the cached key and upserts one Progress row.
+    """
+    CACHE_TTL = 60 * 60
+
+    @staticmethod
+    def cache_key(quiz_id: int) -> str:
+        return f"quiz:{quiz_id}"
+
+    @classmethod
+    def invalidate(cls, quiz_id: int) -> None:
+        transaction.on_commit(lambda: cache.delete(cls.cache_key(quiz_id)))
+
+    @staticmethod
+    def options(question: Question) -> List[str]:
+        """Distinct options in stored order; the correct answer is always one of them."""
+        options = []
+        for option in (question.option1, question.option2, question.option3, question.option4,
+                       question.correct_answer):
+            if option and option not in options:
+                options.append(option)
+        return options
+
+    @classmethod
+    def _compile(cls, quiz_id: int) -> Dict:
+        # Raises Quiz.DoesNotExist for an unknown id
+        quiz = Quiz.objects.get(pk=quiz_id)
+        questions = Question.objects.filter(quiz_id=quiz_id).order_by('id')
+
+        head = json.dumps({'id': quiz.id, 'title': quiz.title, 'description': quiz.description})
+        compiled = {
+            # Closing brace dropped so the seed and questions can be appended
+            'head': head[:-1],
+            'questions': [],
+            'answers': {},
+            'study_material_id': quiz.study_material_id
+        }
+        for question in questions:
+            fragment = json.dumps({'id': question.id, 'text': question.text})
+            compiled['questions'].append(
+                (fragment[:-1], [json.dumps(option) for option in cls.options(question)])
+            )
+            compiled['answers'][str(question.id)] = question.correct_answer
+        return compiled
+
+    @classmethod
+    def compiled(cls, quiz_id: int) -> Dict:
+        key = cls.cache_key(quiz_id)
+        compiled = cache.get(key)
+        if compiled is None:
+            compiled = cls._compile(quiz_id)
+            cache.set(key, compiled, cls.CACHE_TTL)
+        return compiled
+
+    @classmethod
+    def payload(cls, quiz_id: int, seed: int = 0) -> str:
+        """The quiz as a JSON string with each question's options shuffled by ``seed``."""
+        compiled = cls.compiled(quiz_id)
+        rng = random.Random(f"{quiz_id}:{seed}")
+
+        questions = []
+        for prefix, options in compiled['questions']:
+            options = list(options)
+            rng.shuffle(options)
+            questions.append(f'{prefix}, "options": [{", ".join(options)}]}}')
+        return f'{compiled["head"]}, "seed": {seed}, "questions": [{", ".join(questions)}]}}'
+
+    @classmethod
+    def grade(cls, quiz_id: int, answers: Dict[str, str]) -> QuizResult:
+        """Grade ``answers`` (question id -> chosen option); unanswered questions count as wrong."""
+        compiled = cls.compiled(quiz_id)
+        key = compiled['answers']
+        if not key:
+            raise ValueError('This quiz has no questions.')
+
+        results = {
+            question_id: answers.get(question_id) == correct_answer
+            for question_id, correct_answer in key.items()
+        }
+        return QuizResult(
+            quiz_id=quiz_id,
+            correct=sum(results.values()),
+            total=len(key),
+            results=results,
+            answers=dict(key),
+            study_material_id=compiled['study_material_id']
+        )
+
+    @classmethod
+    def record(cls, user: User, results: List[QuizResult]) -> None:
+        """Upsert the user's Progress for every graded quiz in one statement."""
+        Progress.objects.bulk_create(
+            [Progress(user=user, quiz_id=result.quiz_id, score=result.score) for result in results],
+            update_conflicts=True,
+            unique_fields=['user', 'quiz'],
+            update_fields=['score', 'completed_at']
+        )
+        for result in results:
+            # XP for the first completion only; retakes replay the same key
+            GamificationEvents.publish(
+                user,
+                'complete_quiz',
+                study_material=StudyMaterial(pk=result.study_material_id) if result.study_material_id else None,
+                idempotency_key=f"quiz:{result.quiz_id}"
+            )
+
+    @classmethod
+    def submit(cls, user: User, quiz_id: int, answers: Dict[str, str]) -> QuizResult:
+        result = cls.grade(quiz_id, answers)
+        cls.record(user, [result])
+        return result
+
+
+def _invalidate_quiz(sender, instance, **kwargs):
+    QuizEngine.invalidate(instance.pk if sender is Quiz else instance.quiz_id)
+
+
+def connect_signals():
+    """Drop compiled quizzes when a quiz or its questions change; called from CoreConfig.ready()."""
+    for model in (Quiz, Question):
+        post_save.connect(_invalidate_quiz, sender=model, dispatch_uid=f'quiz_engine_save_{model.__name__}')
+        post_delete.connect(_invalidate_quiz, sender=model, dispatch_uid=f'quiz_engine_delete_{model.__name__}')
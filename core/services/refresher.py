@@ -0,0 +1,520 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from itertools import accumulate
+import difflib
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from core.models import (
+    BookmarkedInsight,
+    ContentBlob,
+    ContentFingerprint,
+    KeyConcept,
+    Question,
+    Quiz,
+    ScrapedContent,
+    StudyMaterial,
+    StudyMilestone
+)
+from core.services.content_cache import ContentCache
+from core.services.content_processor import ContentProcessor, Document
+from core.services.content_scraper import ContentScraper
+from core.services.document_index import SENTENCE_BOUNDARY, DocumentIndex
+from core.services.material_store import StudyMaterialStore
+from core.services.near_duplicates import NearDuplicateIndex
+from core.services.quiz_engine import QuizEngine
+
+DEFAULT_SETTINGS = {
+    # refresh_materials re-checks web pages not checked for this many days
+    'STALE_AFTER_DAYS': 7,
+}
+
+# ContentProcessor stages in ProcessedContent order
+STAGES = (
+    'summary',
+    'eli5_explanation',
+    'key_concepts',
+    'quiz_questions',
+    'study_milestones',
+    'bookmarked_insights',
+    'estimated_duration',
+)
+
+# Diff segments end after each run of terminators and after each line break
+SEGMENT_BOUNDARY = re.compile(r'(?<=[.!?\n])(?![.!?])')
+
+QUESTION_FIELDS = ('text', 'correct_answer', 'option1', 'option2', 'option3', 'option4')
+
+
+@dataclass
+class RefreshResult:
+    NOT_MODIFIED = 'not_modified'
+    UNCHANGED = 'unchanged'
+    UPDATED = 'updated'
+
+    scraped_content_id: int
+    # NOT_MODIFIED when the server's validators matched, UNCHANGED when the
+    # text was the same, UPDATED otherwise
+    status: str
+    study_material_ids: List[int] = field(default_factory=list)
+    # Sentences and lines that differ
+    segments_changed: int = 0
+    # Stages that were re-run; every other stage kept its stored output
+    stages: List[str] = field(default_factory=list)
+    # Child table -> [kept, added, removed] rows across the materials
+    rows: Dict[str, List[int]] = field(default_factory=dict)
+
+    def count(self, table: str, kept: int, added: int, removed: int) -> None:
+        totals = self.rows.setdefault(table, [0, 0, 0])
+        totals[0] += kept
+        totals[1] += added
+        totals[2] += removed
+
+
+def _longest_increasing(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    # Longest run of pairs whose second items increase, by patience sorting
+    tails, tail_pairs, previous = [], [], []
+    for k, (_, j) in enumerate(pairs):
+        position = bisect_left(tails, j)
+        if position == len(tails):
+            tails.append(j)
+            tail_pairs.append(k)
+        else:
+            tails[position] = j
+            tail_pairs[position] = k
+        previous.append(tail_pairs[position - 1] if position else None)
+
+    longest = []
+    k = tail_pairs[-1] if tail_pairs else None
+    while k is not None:
+        longest.append(pairs[k])
+        k = previous[k]
+    return longest[::-1]
+
+
+def _changed_blocks(old: Sequence[str], new: Sequence[str]) -> List[Tuple[int, int, int, int]]:
+    """Differing (i1, i2, j1, j2) index ranges between two lists of segments.
+
+    Segments that occur exactly once in each list anchor the alignment and
+    difflib only compares the stretches between anchors, so many scattered
+    edits cost about the same as one.
+    """
+    old_counts, new_counts = Counter(old), Counter(new)
+    new_positions = {segment: j for j, segment in enumerate(new) if new_counts[segment] == 1}
+    anchors = _longest_increasing([
+        (i, new_positions[segment]) for i, segment in enumerate(old)
+        if old_counts[segment] == 1 and segment in new_positions
+    ])
+
+    blocks = []
+    i0 = j0 = 0
+    for i, j in anchors + [(len(old), len(new))]:
+        if i > i0 and j > j0:
+            matcher = difflib.SequenceMatcher(None, old[i0:i], new[j0:j], autojunk=False)
+            blocks.extend(
+                (i0 + a1, i0 + a2, j0 + b1, j0 + b2)
+                for tag, a1, a2, b1, b2 in matcher.get_opcodes() if tag != 'equal'
+            )
+        elif i > i0 or j > j0:
+            blocks.append((i0, i, j0, j))
+        i0, j0 = i + 1, j + 1
+    return blocks
+
+
+class ContentDiff:
+    """Sentence-level diff between a document's stored text and a fresh scrape.
+
+    Both texts are cut after every sentence terminator and line break (a
+    cleaned page is a single line, so its paragraphs would be one block) and
+    the pieces are aligned. ``changes`` holds the differing
+    (old_begin, old_end, new_begin, new_end) character ranges; the text
+    outside them is identical in both versions.
+    """
+
+    def __init__(self, old: Document, new: Document):
+        self.old = DocumentIndex.of(old)
+        self.new = DocumentIndex.of(new)
+        old_segments = SEGMENT_BOUNDARY.split(self.old.text)
+        new_segments = SEGMENT_BOUNDARY.split(self.new.text)
+        old_offsets = [0] + list(accumulate(len(segment) for segment in old_segments))
+        new_offsets = [0] + list(accumulate(len(segment) for segment in new_segments))
+
+        self.segments_changed = 0
+        self.changes = []
+        for i1, i2, j1, j2 in _changed_blocks(old_segments, new_segments):
+            self.segments_changed += max(i2 - i1, j2 - j1)
+            self.changes.append((old_offsets[i1], old_offsets[i2], new_offsets[j1], new_offsets[j2]))
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.changes)
+
+    @property
+    def first_changed_offset(self) -> int:
+        """Character offset up to which both versions agree."""
+        return self.changes[0][0] if self.changes else len(self.old.text)
+
+    def _sides(self):
+        yield self.old.text, [(old_begin, old_end) for old_begin, old_end, _, _ in self.changes]
+        yield self.new.text, [(new_begin, new_end) for _, _, new_begin, new_end in self.changes]
+
+    def changed_lines(self) -> List[str]:
+        """Lines of either version that overlap a change."""
+        lines = []
+        for text, ranges in self._sides():
+            for begin, end in ranges:
+                stop = text.find('\n', end)
+                lines += text[text.rfind('\n', 0, begin) + 1:stop if stop != -1 else len(text)].split('\n')
+        return lines
+
+    def changed_sentences(self) -> List[str]:
+        """Sentences of either version that overlap a change."""
+        sentences = []
+        for text, ranges in self._sides():
+            for begin, end in ranges:
+                # From the terminator before the change to the one after it,
+                # split the way DocumentIndex splits the whole text
+                start = max(text.rfind(mark, 0, begin) for mark in '.!?') + 1
+                match = SENTENCE_BOUNDARY.search(text, end)
+                pieces = SENTENCE_BOUNDARY.split(text[start:match.start() if match else len(text)])
+                sentences += [piece.strip() for piece in pieces[::2]]
+        return sentences
+
+
+class MaterialRefresher:
+    """Re-scrapes web pages and updates their study materials in place.
+
+    The new text is diffed against the stored one sentence by sentence and
+    only the ContentProcessor stages whose input overlaps a change are run
+    again. Child rows are matched to the new output by content, so unchanged
+    KeyConcept, StudyMilestone, BookmarkedInsight and Question rows keep
+    their ids, and the UserProgress and quiz Progress hanging off them.
+    """
+
+    @staticmethod
+    def get_settings() -> Dict:
+        return {**DEFAULT_SETTINGS, **getattr(settings, 'CONTENT_REFRESH', {})}
+
+    @classmethod
+    def stale(cls, stale_after: Optional[timedelta] = None):
+        """Web pages with a study material not checked within ``stale_after``, oldest first."""
+        if stale_after is None:
+            stale_after = timedelta(days=cls.get_settings()['STALE_AFTER_DAYS'])
+        return ScrapedContent.objects.filter(
+            Exists(StudyMaterial.objects.filter(scraped_content=OuterRef('pk'))),
+            source_type='webpage',
+            checked_at__lt=timezone.now() - stale_after
+        ).order_by('checked_at', 'id')
+
+    @staticmethod
+    def find_page(url: str) -> Optional[ScrapedContent]:
+        """The newest stored copy of ``url`` that has a study material, if any."""
+        return ScrapedContent.objects.filter(
+            Exists(StudyMaterial.objects.filter(scraped_content=OuterRef('pk'))),
+            url=url,
+            source_type='webpage'
+        ).order_by('-id').first()
+
+    @staticmethod
+    def _first_sentence_end(text: str) -> Optional[int]:
+        # Where the sentence generate_eli5 uses ends, without splitting the whole text
+        position = 0
+        for match in SENTENCE_BOUNDARY.finditer(text):
+            if len(text[position:match.start()].strip()) > 10:
+                return match.end()
+            position = match.end()
+        return None
+
+    @staticmethod
+    def _milestones_affected(diff: ContentDiff) -> bool:
+        # Milestones describe the start of each of the first few paragraphs
+        offset = diff.first_changed_offset
+        paragraph = bisect_right(diff.old.paragraph_offsets, offset) - 1
+        if paragraph >= ContentProcessor.MAX_MILESTONES:
+            return False
+        # A change deep into the last paragraph leaves its description alone,
+        # as long as it adds no paragraph after it
+        last = len(diff.old.paragraphs) - 1
+        return not (
+            paragraph == last == len(diff.new.paragraphs) - 1
+            and offset - diff.old.paragraph_offsets[paragraph] > ContentProcessor.MILESTONE_DESCRIPTION_LENGTH
+        )
+
+    @classmethod
+    def affected_stages(cls, diff: ContentDiff) -> List[str]:
+        """The stages whose output may differ between the two versions."""
+        if not diff.changed:
+            return []
+        # These read every sentence of the document
+        affected = {'summary', 'quiz_questions', 'estimated_duration'}
+
+        # The simple explanation is built from the first sentence over 10
+        # characters, which only changes if the text up to its end does
+        end = cls._first_sentence_end(diff.old.text)
+        if end is None or end > diff.first_changed_offset:
+            affected.add('eli5_explanation')
+
+        if any(ContentProcessor.parse_concept(line) for line in diff.changed_lines()):
+            affected.add('key_concepts')
+
+        if cls._milestones_affected(diff):
+            affected.add('study_milestones')
+
+        if any(ContentProcessor.is_insight(sentence) for sentence in diff.changed_sentences()):
+            affected.add('bookmarked_insights')
+
+        return [stage for stage in STAGES if stage in affected]
+
+    @staticmethod
+    def run_stages(document: DocumentIndex, stages: Sequence[str]) -> Dict:
+        outputs = {}
+        if 'summary' in stages:
+            outputs['summary'] = ContentProcessor.generate_summary(document)
+        if 'eli5_explanation' in stages:
+            outputs['eli5_explanation'] = ContentProcessor.generate_eli5(document)
+        if 'key_concepts' in stages or 'quiz_questions' in stages:
+            # Questions are asked about the concepts even when those rows are kept
+            concepts = ContentProcessor.extract_key_concepts(document)
+            if 'key_concepts' in stages:
+                outputs['key_concepts'] = concepts
+            if 'quiz_questions' in stages:
+                outputs['quiz_questions'] = ContentProcessor.generate_quiz_questions(document, concepts)
+        if 'study_milestones' in stages:
+            outputs['study_milestones'] = ContentProcessor.generate_study_milestones(document)
+        if 'bookmarked_insights' in stages:
+            outputs['bookmarked_insights'] = ContentProcessor.extract_bookmarked_insights(document)
+        if 'estimated_duration' in stages:
+            outputs['estimated_duration'] = ContentProcessor.estimate_study_duration(document)
+        return outputs
+
+    @staticmethod
+    def _sync(model, existing, generated: List, fields: Sequence[str],
+              update_fields: Sequence[str] = (), fallback: Sequence[str] = ()) -> Tuple[int, int, int]:
+        """Make the stored rows match ``generated``, keeping rows whose ``fields`` are unchanged.
+
+        Kept rows take the generated values of ``update_fields`` (e.g. a
+        milestone's new position). With ``fallback``, items left unmatched are
+        then paired with the leftover rows on those fields instead, and those
+        rows take every generated value, so an item edited in place keeps its
+        row. Unmatched rows are deleted and unmatched items inserted. Returns
+        (kept, added, removed).
+        """
+        stored = defaultdict(deque)
+        for row in existing:
+            stored[tuple(getattr(row, name) for name in fields)].append(row)
+
+        kept, moved, unmatched = 0, [], []
+        for item in generated:
+            rows = stored.get(tuple(getattr(item, name) for name in fields))
+            if not rows:
+                unmatched.append(item)
+                continue
+            row = rows.popleft()
+            kept += 1
+            if any(getattr(row, name) != getattr(item, name) for name in update_fields):
+                moved.append(row)
+            for name in update_fields:
+                setattr(row, name, getattr(item, name))
+
+        added = unmatched
+        if fallback and unmatched:
+            leftover = defaultdict(deque)
+            for rows in stored.values():
+                for row in rows:
+                    leftover[tuple(getattr(row, name) for name in fallback)].append(row)
+            stored, added = leftover, []
+            for item in unmatched:
+                rows = stored.get(tuple(getattr(item, name) for name in fallback))
+                if not rows:
+                    added.append(item)
+                    continue
+                row = rows.popleft()
+                kept += 1
+                for name in (*fields, *update_fields):
+                    setattr(row, name, getattr(item, name))
+                moved.append(row)
+
+        removed = [row.pk for rows in stored.values() for row in rows]
+        if removed:
+            model.objects.filter(pk__in=removed).delete()
+        if moved:
+            model.objects.bulk_update(moved, [*update_fields, *fields] if fallback else update_fields)
+        model.objects.bulk_create(added)
+        return kept, len(added), len(removed)
+
+    @classmethod
+    def _sync_quiz(cls, material: StudyMaterial, questions: Optional[List[Dict[str, str]]],
+                   result: RefreshResult) -> None:
+        quiz = Quiz.objects.filter(study_material=material).order_by('id').first()
+        if quiz is None and not questions:
+            return
+        if quiz is not None and questions == []:
+            # Nothing left to ask; the store never creates an empty quiz either
+            quiz.delete()
+            result.count('questions', 0, 0, 1)
+            return
+
+        title = f"{material.title} quiz"[:200]
+        if quiz is None:
+            quiz = Quiz.objects.create(
+                title=title,
+                description=f"Questions generated from {material.title}",
+                study_material=material
+            )
+        elif quiz.title != title:
+            quiz.title = title
+            quiz.description = f"Questions generated from {material.title}"
+            quiz.save(update_fields=['title', 'description'])
+
+        if questions is not None:
+            result.count('questions', *cls._sync(
+                Question,
+                Question.objects.filter(quiz=quiz),
+                [StudyMaterialStore._to_question(quiz, question) for question in questions],
+                QUESTION_FIELDS
+            ))
+            # bulk writes send no post_save
+            QuizEngine.invalidate(quiz.id)
+
+    @classmethod
+    def _update_material(cls, material: StudyMaterial, title: str, outputs: Dict,
+                         result: RefreshResult) -> None:
+        fields = []
+        for stage, name in (('summary', 'summary'), ('eli5_explanation', 'eli5_explanation'),
+                            ('estimated_duration', 'study_duration')):
+            if stage in outputs and getattr(material, name) != outputs[stage]:
+                setattr(material, name, outputs[stage])
+                fields.append(name)
+        if material.title != title:
+            material.title = title
+            fields.append('title')
+
+        if 'key_concepts' in outputs:
+            result.count('key_concepts', *cls._sync(
+                KeyConcept,
+                KeyConcept.objects.filter(study_material=material),
+                [
+                    KeyConcept(study_material=material, concept=concept['concept'], definition=concept['definition'])
+                    for concept in outputs['key_concepts']
+                ],
+                ('concept', 'definition')
+            ))
+        if 'study_milestones' in outputs:
+            # Matched on their paragraph, so progress follows a milestone that moved;
+            # a paragraph edited in place keeps its milestone row, and the progress on it
+            result.count('milestones', *cls._sync(
+                StudyMilestone,
+                StudyMilestone.objects.filter(study_material=material),
+                [
+                    StudyMilestone(
+                        study_material=material,
+                        title=milestone['title'],
+                        description=milestone['description'],
+                        order=i,
+                        xp_reward=milestone['xp_reward']
+                    )
+                    for i, milestone in enumerate(outputs['study_milestones'], 1)
+                ],
+                ('description',),
+                ('title', 'order', 'xp_reward'),
+                fallback=('order',)
+            ))
+        if 'bookmarked_insights' in outputs:
+            result.count('insights', *cls._sync(
+                BookmarkedInsight,
+                BookmarkedInsight.objects.filter(study_material=material),
+                [
+                    BookmarkedInsight(
+                        study_material=material,
+                        content=insight['content'],
+                        importance_level=insight['importance_level']
+                    )
+                    for insight in outputs['bookmarked_insights']
+                ],
+                ('content', 'importance_level')
+            ))
+        if 'quiz_questions' in outputs or 'title' in fields:
+            cls._sync_quiz(material, outputs.get('quiz_questions'), result)
+
+        if fields or outputs:
+            # Saving also reindexes the material and its concepts for search
+            material.save(update_fields=fields + ['updated_at'])
+
+    @classmethod
+    def apply(cls, scraped_content: ScrapedContent, page: Dict[str, str]) -> RefreshResult:
+        """Bring a stored page and its study materials up to date with ``page``.
+
+        ``page`` is a cleaned scrape: title, content and optionally the
+        etag/last_modified validators to send on the next refresh.
+        """
+        with transaction.atomic():
+            # Locked so two refreshes of one page can't both diff the old text
+            scraped_content = ScrapedContent.objects.select_for_update(of=('self',)).select_related('blob').get(
+                pk=scraped_content.pk
+            )
+            diff = ContentDiff(scraped_content.raw_content, page['content'])
+            stages = cls.affected_stages(diff)
+            materials = list(StudyMaterial.objects.filter(scraped_content=scraped_content).order_by('id'))
+            result = RefreshResult(
+                scraped_content_id=scraped_content.id,
+                status=RefreshResult.UPDATED if diff.changed else RefreshResult.UNCHANGED,
+                study_material_ids=[material.id for material in materials],
+                segments_changed=diff.segments_changed,
+                stages=stages
+            )
+            outputs = cls.run_stages(diff.new, stages)
+
+            old_blob_id = scraped_content.blob_id
+            scraped_content.title = page['title']
+            scraped_content.etag = page.get('etag') or ''
+            scraped_content.last_modified = page.get('last_modified') or ''
+            scraped_content.checked_at = timezone.now()
+            if diff.changed:
+                scraped_content.raw_content = page['content']
+            scraped_content.save()
+
+            if diff.changed:
+                ContentFingerprint.objects.filter(pk=scraped_content.pk).delete()
+                NearDuplicateIndex.add(scraped_content.pk, NearDuplicateIndex.signature(page['content']))
+                # Drop the old text unless another page shares it
+                ContentBlob.delete_unreferenced([old_blob_id])
+
+            for material in materials:
+                cls._update_material(material, page['title'], outputs, result)
+        return result
+
+    @classmethod
+    def refresh(cls, scraped_content: ScrapedContent) -> RefreshResult:
+        """Re-scrape a stored web page and apply whatever changed."""
+        if scraped_content.source_type != 'webpage':
+            raise ValueError('Only web pages can be refreshed.')
+
+        page = ContentScraper.scrape_webpage(
+            scraped_content.url,
+            etag=scraped_content.etag or None,
+            last_modified=scraped_content.last_modified or None
+        )
+        if page is None:
+            # 304 Not Modified
+            ScrapedContent.objects.filter(pk=scraped_content.pk).update(checked_at=timezone.now())
+            return RefreshResult(scraped_content.id, RefreshResult.NOT_MODIFIED)
+
+        page['url'] = scraped_content.url
+        page['content'] = ContentScraper.clean_content(page['content'])
+        result = cls.apply(scraped_content, page)
+
+        # Later ingests of this URL hit the cache and reuse the refreshed material
+        ContentCache.store_webpage(
+            scraped_content.url,
+            page,
+            scraped_content_id=scraped_content.id,
+            study_material_id=result.study_material_ids[0] if result.study_material_ids else None
+        )
+        return result
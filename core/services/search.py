@@ -0,0 +1,303 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+from collections import defaultdict
+from dataclasses import dataclass
+import re
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+
+from core.models import KeyConcept, Note, PastPaper, SearchDocument, StudyMaterial
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+@dataclass
+class SearchResult:
+    kind: str
+    object_id: int
+    title: str
+    snippet: str
+    url: str
+    score: float
+
+
+class SQLiteSearchBackend:
+    """FTS5 table ``core_searchdocument_fts``, ranked with bm25.
+
+    Every term is a quoted prefix query, so ``thermo cyc`` matches
+    "thermodynamic cycles" and FTS5 operators typed by users are taken literally.
+    """
+    # bm25 weights for the title and body columns
+    TITLE_WEIGHT = 5.0
+    BODY_WEIGHT = 1.0
+
+    def match_expression(self, terms: Sequence[str]) -> str:
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def search(self, terms: Sequence[str], user_id: Optional[int],
+               kinds: Sequence[str], limit: int) -> List[tuple]:
+        placeholders = ', '.join(['%s'] * len(kinds))
+        sql = f"""
+            SELECT d.kind, d.object_id, d.title, d.body, d.url,
+                   -bm25(core_searchdocument_fts, %s, %s) AS score
+            FROM core_searchdocument_fts
+            JOIN core_searchdocument d ON d.id = core_searchdocument_fts.rowid
+            WHERE core_searchdocument_fts MATCH %s
+              AND (d.user_id IS NULL OR d.user_id = %s)
+              AND d.kind IN ({placeholders})
+            ORDER BY score DESC
+            LIMIT %s
+        """
+        params = [self.TITLE_WEIGHT, self.BODY_WEIGHT, self.match_expression(terms), user_id, *kinds, limit]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def rebuild(self) -> None:
+        # Re-reads every document; repairs the index if rows changed behind the triggers' back
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO core_searchdocument_fts(core_searchdocument_fts) VALUES ('rebuild')")
+
+
+class PostgresSearchBackend:
+    """Generated ``search_vector`` tsvector column with a GIN index, ranked with ts_rank_cd."""
+    CONFIG = 'english'
+
+    def tsquery(self, terms: Sequence[str]) -> str:
+        return ' & '.join(f"{term}:*" for term in terms)
+
+    def search(self, terms: Sequence[str], user_id: Optional[int],
+               kinds: Sequence[str], limit: int) -> List[tuple]:
+        placeholders = ', '.join(['%s'] * len(kinds))
+        sql = f"""
+            SELECT d.kind, d.object_id, d.title, d.body, d.url,
+                   ts_rank_cd(d.search_vector, query) AS score
+            FROM core_searchdocument d, to_tsquery(%s::regconfig, %s) query
+            WHERE d.search_vector @@ query
+              AND (d.user_id IS NULL OR d.user_id = %s)
+              AND d.kind IN ({placeholders})
+            ORDER BY score DESC
+            LIMIT %s
+        """
+        params = [self.CONFIG, self.tsquery(terms), user_id, *kinds, limit]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def rebuild(self) -> None:
+        # The tsvector column is generated, so it can never drift from the rows
+        pass
+
+
+class SearchIndex:
+    """Keeps one SearchDocument per note, study material and past paper.
+
+    Documents are written through model signals as objects change; bulk
+    writers that skip signals (StudyMaterialStore) call ``index_materials``
+    themselves. The database maintains the full-text index from there.
+    """
+    UPSERT_FIELDS = ['user', 'title', 'body', 'url', 'updated_at']
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def note_document(note: Note) -> SearchDocument:
+        return SearchDocument(
+            kind=SearchDocument.KIND_NOTE,
+            object_id=note.pk,
+            user_id=note.user_id,
+            title=note.title,
+            body=note.content,
+            url=reverse('notes')
+        )
+
+    @staticmethod
+    def material_document(material: StudyMaterial, concepts: Iterable[KeyConcept]) -> SearchDocument:
+        body = '\n'.join(
+            [material.summary] + [f"{concept.concept}: {concept.definition}" for concept in concepts]
+        )
+        return SearchDocument(
+            kind=SearchDocument.KIND_MATERIAL,
+            object_id=material.pk,
+            title=material.title,
+            body=body,
+            url=reverse('study_material_detail', args=[material.pk])
+        )
+
+    @staticmethod
+    def past_paper_document(paper: PastPaper) -> SearchDocument:
+        return SearchDocument(
+            kind=SearchDocument.KIND_PAST_PAPER,
+            object_id=paper.pk,
+            title=paper.title,
+            body=f"{paper.subject} {paper.year}",
+            url=paper.file_url
+        )
+
+    @classmethod
+    def upsert(cls, documents: List[SearchDocument]) -> None:
+        SearchDocument.objects.bulk_create(
+            documents,
+            batch_size=cls.BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=cls.UPSERT_FIELDS
+        )
+
+    @classmethod
+    def remove(cls, kind: str, object_id: int) -> None:
+        SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+    @classmethod
+    def index_materials(cls, materials: List[StudyMaterial],
+                        concepts: Optional[Iterable[KeyConcept]] = None) -> None:
+        """Index saved materials; pass ``concepts`` when already in memory to skip the query."""
+        if concepts is None:
+            concepts = KeyConcept.objects.filter(study_material__in=materials).order_by('id')
+        by_material = defaultdict(list)
+        for concept in concepts:
+            by_material[concept.study_material_id].append(concept)
+        cls.upsert([cls.material_document(material, by_material[material.pk]) for material in materials])
+
+    @classmethod
+    def reindex_material(cls, material_id: int) -> None:
+        materials = list(StudyMaterial.objects.filter(pk=material_id))
+        if materials:
+            cls.index_materials(materials)
+
+    @classmethod
+    def rebuild(cls) -> Dict[str, int]:
+        """Recreate every document from the source tables."""
+        SearchDocument.objects.all().delete()
+        counts = {}
+
+        notes = [cls.note_document(note) for note in Note.objects.iterator(chunk_size=cls.BATCH_SIZE)]
+        cls.upsert(notes)
+        counts[SearchDocument.KIND_NOTE] = len(notes)
+
+        counts[SearchDocument.KIND_MATERIAL] = 0
+        materials = StudyMaterial.objects.order_by('id')
+        for start in range(0, materials.count(), cls.BATCH_SIZE):
+            batch = list(materials[start:start + cls.BATCH_SIZE])
+            cls.index_materials(batch)
+            counts[SearchDocument.KIND_MATERIAL] += len(batch)
+
+        papers = [cls.past_paper_document(paper) for paper in PastPaper.objects.iterator(chunk_size=cls.BATCH_SIZE)]
+        cls.upsert(papers)
+        counts[SearchDocument.KIND_PAST_PAPER] = len(papers)
+
+        SearchService.get_backend().rebuild()
+        return counts
+
+
+class SearchService:
+    """Ranked, prefix-matching search over every indexed document.
+
+    The backend follows the database: FTS5 on SQLite, tsvector on
+    PostgreSQL. Notes are private, so they only match for their owner.
+    """
+    BACKENDS = {
+        'sqlite': SQLiteSearchBackend,
+        'postgresql': PostgresSearchBackend,
+    }
+    KINDS = [kind for kind, _ in SearchDocument.KIND_CHOICES]
+    MAX_TERMS = 8
+    MAX_LIMIT = 100
+    SNIPPET_LENGTH = 160
+
+    _backend = None
+
+    @classmethod
+    def get_backend(cls):
+        if cls._backend is None:
+            vendor = connection.vendor
+            if vendor not in cls.BACKENDS:
+                raise ImproperlyConfigured(f"Search supports SQLite and PostgreSQL, not {vendor}")
+            cls._backend = cls.BACKENDS[vendor]()
+        return cls._backend
+
+    @classmethod
+    def set_backend(cls, backend) -> None:
+        """Swap the backend, e.g. for a stub in tests."""
+        cls._backend = backend
+
+    @classmethod
+    def terms(cls, query: str) -> List[str]:
+        return TOKEN_RE.findall(query.lower())[:cls.MAX_TERMS]
+
+    @classmethod
+    def snippet(cls, body: str, terms: Sequence[str]) -> str:
+        """The stretch of ``body`` around the first word starting with a search term."""
+        match = re.search(r'\b(?:' + '|'.join(re.escape(term) for term in terms) + ')', body, re.IGNORECASE)
+        start = max(0, match.start() - cls.SNIPPET_LENGTH // 4) if match else 0
+        text = ' '.join(body[start:start + cls.SNIPPET_LENGTH].split())
+        prefix = '…' if start > 0 else ''
+        suffix = '…' if start + cls.SNIPPET_LENGTH < len(body) else ''
+        return f"{prefix}{text}{suffix}"
+
+    @classmethod
+    def search(cls, query: str, user: Optional[User] = None,
+               kinds: Optional[Sequence[str]] = None, limit: int = 20) -> List[SearchResult]:
+        kinds = list(kinds or cls.KINDS)
+        unknown = set(kinds) - set(cls.KINDS)
+        if unknown:
+            raise ValueError(f"Unknown search kinds: {', '.join(sorted(unknown))}")
+        terms = cls.terms(query)
+        if not terms:
+            return []
+
+        user_id = user.pk if user is not None and user.is_authenticated else None
+        rows = cls.get_backend().search(terms, user_id, kinds, min(limit, cls.MAX_LIMIT))
+        return [
+            SearchResult(
+                kind=kind,
+                object_id=object_id,
+                title=title,
+                snippet=cls.snippet(body, terms),
+                url=url,
+                score=float(score)
+            )
+            for kind, object_id, title, body, url, score in rows
+        ]
+
+
+def _index_note(sender, instance, **kwargs):
+    SearchIndex.upsert([SearchIndex.note_document(instance)])
+
+
+def _remove_note(sender, instance, **kwargs):
+    SearchIndex.remove(SearchDocument.KIND_NOTE, instance.pk)
+
+
+def _index_material(sender, instance, **kwargs):
+    SearchIndex.index_materials([instance])
+
+
+def _remove_material(sender, instance, **kwargs):
+    SearchIndex.remove(SearchDocument.KIND_MATERIAL, instance.pk)
+
+
+def _reindex_concept_material(sender, instance, **kwargs):
+    SearchIndex.reindex_material(instance.study_material_id)
+
+
+def _index_past_paper(sender, instance, **kwargs):
+    SearchIndex.upsert([SearchIndex.past_paper_document(instance)])
+
+
+def _remove_past_paper(sender, instance, **kwargs):
+    SearchIndex.remove(SearchDocument.KIND_PAST_PAPER, instance.pk)
+
+
+def connect_signals():
+    """Keep the search index in step with its source rows; called from CoreConfig.ready()."""
+    post_save.connect(_index_note, sender=Note, dispatch_uid='search_note_save')
+    post_delete.connect(_remove_note, sender=Note, dispatch_uid='search_note_delete')
+    post_save.connect(_index_material, sender=StudyMaterial, dispatch_uid='search_material_save')
+    post_delete.connect(_remove_material, sender=StudyMaterial, dispatch_uid='search_material_delete')
+    post_save.connect(_reindex_concept_material, sender=KeyConcept, dispatch_uid='search_concept_save')
+    post_delete.connect(_reindex_concept_material, sender=KeyConcept, dispatch_uid='search_concept_delete')
+    post_save.connect(_index_past_paper, sender=PastPaper, dispatch_uid='search_past_paper_save')
+    post_delete.connect(_remove_past_paper, sender=PastPaper, dispatch_uid='search_past_paper_delete')
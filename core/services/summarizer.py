@@ -0,0 +1,122 @@
+from typing import List, Sequence
+from collections import Counter
+import math
+import re
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # pragma: no cover - pandas is in requirements.txt
+    np = None
+    pd = None
+
+TOKEN_PATTERN = r'[a-z0-9]+'
+TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+# Very common words carry no signal about what a sentence is about
+STOPWORDS = frozenset(
+    'a an and are as at be but by can do does for from has have how if in into is it its '
+    'of on or so such that the their then there these they this those to was we were what '
+    'when where which while who will with you your'.split()
+)
+
+class ExtractiveSummarizer:
+    """Picks the sentences closest to the document's overall content.
+
+    Each sentence is scored by the cosine similarity between its TF-IDF
+    vector and the TF-IDF centroid of the whole document. The best scoring
+    sentences that fit the budget are returned in document order.
+
+    Scoring is vectorised with NumPy/pandas for larger documents and falls
+    back to plain Python for short ones, or when those libraries are not
+    installed; both paths compute the same scores.
+    """
+    MAX_SENTENCES = 5
+    # Below this many sentences the pandas setup costs more than it saves
+    VECTORIZE_MIN_SENTENCES = 200
+
+    @classmethod
+    def summarize(cls, sentences: Sequence[str], max_length: int = 500,
+                  max_sentences: int = None) -> List[str]:
+        """Return the selected sentences, in document order.
+
+        At most ``max_sentences`` sentences are chosen and their joined length
+        stays within ``max_length`` characters, except that the best sentence
+        is always kept so the summary is never empty.
+        """
+        max_sentences = max_sentences or cls.MAX_SENTENCES
+        if not sentences:
+            return []
+
+        scores = cls.score(sentences)
+        ranked = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+
+        chosen, used = [], 0
+        for i in ranked:
+            # '. ' separator between sentences once joined
+            cost = len(sentences[i]) + (2 if chosen else 0)
+            if chosen and used + cost > max_length:
+                continue
+            chosen.append(i)
+            used += cost
+            if len(chosen) >= max_sentences or used >= max_length:
+                break
+
+        return [sentences[i] for i in sorted(chosen)]
+
+    @classmethod
+    def score(cls, sentences: Sequence[str]) -> List[float]:
+        if np is not None and len(sentences) >= cls.VECTORIZE_MIN_SENTENCES:
+            return cls._score_vectorized(sentences).tolist()
+        return cls._score_python(sentences)
+
+    @staticmethod
+    def _score_python(sentences: Sequence[str]) -> List[float]:
+        term_counts = [
+            Counter(t for t in TOKEN_RE.findall(s.lower()) if t not in STOPWORDS)
+            for s in sentences
+        ]
+        n = len(sentences)
+        doc_freq = Counter(term for counts in term_counts for term in counts)
+        idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in doc_freq.items()}
+
+        weights = [{term: count * idf[term] for term, count in counts.items()} for counts in term_counts]
+        centroid = Counter()
+        for vector in weights:
+            centroid.update(vector)
+        centroid_norm = math.sqrt(sum(w * w for w in centroid.values()))
+
+        scores = []
+        for vector in weights:
+            norm = math.sqrt(sum(w * w for w in vector.values()))
+            if not norm or not centroid_norm:
+                scores.append(0.0)
+                continue
+            dot = sum(w * centroid[term] for term, w in vector.items())
+            scores.append(dot / (norm * centroid_norm))
+        return scores
+
+    @staticmethod
+    def _score_vectorized(sentences: Sequence[str]) -> 'np.ndarray':
+        n = len(sentences)
+        tokens = pd.Series(list(sentences), dtype=object).str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+        tokens = tokens[~tokens.isin(STOPWORDS)]
+        if tokens.empty:
+            return np.zeros(n)
+
+        # Sparse sentence x term matrix as parallel (sentence, term, count) arrays
+        term_ids, vocab = pd.factorize(tokens.to_numpy())
+        vocab_size = len(vocab)
+        keys = tokens.index.to_numpy(dtype=np.int64) * vocab_size + term_ids
+        keys, counts = np.unique(keys, return_counts=True)
+        sentence_ids, term_ids = np.divmod(keys, vocab_size)
+
+        doc_freq = np.bincount(term_ids, minlength=vocab_size)
+        idf = np.log((1 + n) / (1 + doc_freq)) + 1
+        weights = counts * idf[term_ids]
+
+        centroid = np.bincount(term_ids, weights=weights, minlength=vocab_size)
+        dots = np.bincount(sentence_ids, weights=weights * centroid[term_ids], minlength=n)
+        norms = np.sqrt(np.bincount(sentence_ids, weights=weights * weights, minlength=n))
+        denominators = norms * np.linalg.norm(centroid)
+        return np.divide(dots, denominators, out=np.zeros(n), where=denominators > 0)
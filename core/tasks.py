@@ -0,0 +1,33 @@
+from celery import chain, shared_task
+
+from core.services.gamification_events import GamificationEvents
+from core.services.ingestion import IngestionPipeline
+
+
+@shared_task
+def scrape_stage(job_id):
+    return IngestionPipeline.scrape_stage(job_id)
+
+
+@shared_task
+def process_stage(source, job_id):
+    return IngestionPipeline.process_stage(source, job_id)
+
+
+@shared_task
+def persist_stage(source, job_id):
+    return IngestionPipeline.persist_stage(source, job_id)
+
+
+def ingestion_chain(job_id):
+    """Build the scrape -> process -> persist chain for one ingestion job."""
+    return chain(
+        scrape_stage.s(job_id),
+        process_stage.s(job_id),
+        persist_stage.s(job_id)
+    )
+
+
+@shared_task
+def apply_gamification_events():
+    GamificationEvents.drain()
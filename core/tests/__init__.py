@@ -0,0 +1,66 @@
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.management.benchmarks import LOCAL_SERVICES, reset_local_services
+from core.models import ScrapedContent, StudyMaterial, StudyMilestone
+
+
+class LocalServicesMixin:
+    """Runs the Redis/Celery backed services in this process, so no servers are needed."""
+
+    def setUp(self):
+        super().setUp()
+        # Rebuilt from the overridden settings on first use
+        reset_local_services()
+
+
+@override_settings(**LOCAL_SERVICES)
+class CoreTestCase(LocalServicesMixin, TestCase):
+    pass
+
+
+@override_settings(**LOCAL_SERVICES)
+class CoreTransactionTestCase(LocalServicesMixin, TransactionTestCase):
+    """For code that uses the database from other threads, e.g. the crawler."""
+
+
+def make_material(title: str = 'Sorting', text: str = 'Merge sort splits the list in half.',
+                  milestones: int = 1) -> StudyMaterial:
+    scraped_content = ScrapedContent.objects.create(
+        url=f"https://example.com/{title.lower()}", title=title, raw_content=text, source_type='webpage'
+    )
+    study_material = StudyMaterial.objects.create(
+        scraped_content=scraped_content, title=title, summary=text, eli5_explanation=text, study_duration=5
+    )
+    for order in range(milestones):
+        StudyMilestone.objects.create(
+            study_material=study_material, title=f"Part {order + 1}", description=text, order=order, xp_reward=10
+        )
+    return study_material
+
+
+def make_pdf(pages: int, lines_per_page: int = 10) -> bytes:
+    """A minimal text-only PDF with ``pages`` pages."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        text = b"BT /F1 10 Tf 50 750 Td 12 TL " + b" ".join(
+            b"(Page %d line %d: a stack is a last in first out structure.) '" % (page, line)
+            for line in range(lines_per_page)
+        ) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(text), text))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R >> >> >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), pages)
+
+    data, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return data
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+
+from core.models import Badge, BookmarkedInsight, KeyConcept, Note, PastPaper, Question, Quiz, StudyMaterial, StudyMilestone
+from core.tests import CoreTestCase
+
+
+class SignalReceiverTests(CoreTestCase):
+    def test_ready_connects_every_invalidation_receiver(self):
+        for model in (Badge, BookmarkedInsight, KeyConcept, Note, PastPaper, Question, Quiz, StudyMaterial, StudyMilestone):
+            with self.subTest(model=model.__name__):
+                self.assertTrue(post_save.has_listeners(model))
+                self.assertTrue(post_delete.has_listeners(model))
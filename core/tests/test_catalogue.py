@@ -0,0 +1,58 @@
+from django.urls import reverse
+
+from core.models import PastPaper
+from core.services.catalogue import KeysetPaginator, PastPaperCatalogue
+from core.tests import CoreTestCase
+
+
+class KeysetPaginatorTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        PastPaper.objects.bulk_create([
+            PastPaper(title=f"{subject} {year} paper {i}", subject=subject, year=year,
+                      file_url=f"https://example.com/{subject.lower()}-{year}-{i}.pdf")
+            for subject in ('Chemistry', 'Physics') for year in (2020, 2021) for i in range(3)
+        ])
+        self.paginator = KeysetPaginator(PastPaper.objects.all(), PastPaperCatalogue.ORDERING, 5)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            page = self.paginator.page(cursor)
+            seen.extend(paper.id for paper in page.items)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        expected = list(PastPaper.objects.order_by(*PastPaperCatalogue.ORDERING).values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_values_are_coerced_to_their_field_types(self):
+        last_id = PastPaper.objects.order_by('id').last().id
+        cursor = KeysetPaginator.encode_cursor(['Physics', '2021', str(last_id)])
+
+        self.assertEqual(self.paginator.decode_cursor(cursor), ['Physics', 2021, last_id])
+
+    def test_tampered_cursor_is_rejected(self):
+        tampered = [
+            ['Physics', 'nineteen', 1],
+            ['Physics', 2021, {'id': 1}],
+            ['Physics', None, 1],
+            ['Physics', 2021, True],
+            ['Physics', 10 ** 30, 1],
+            [['Physics'], 2021, 1],
+            ['x' * 500, 2021, 1],
+            ['Physics', 2021],
+        ]
+        for values in tampered:
+            with self.assertRaisesMessage(ValueError, 'Invalid page cursor.'):
+                self.paginator.page(KeysetPaginator.encode_cursor(values))
+        with self.assertRaisesMessage(ValueError, 'Invalid page cursor.'):
+            self.paginator.page('not a cursor!')
+
+    def test_view_answers_a_tampered_cursor_with_400(self):
+        cursor = KeysetPaginator.encode_cursor(['Physics', 10 ** 30, 1])
+        response = self.client.get(reverse('past_papers'), {'cursor': cursor, 'format': 'json'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Invalid page cursor.')
@@ -0,0 +1,112 @@
+import hashlib
+import zlib
+from contextlib import redirect_stdout
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import override_settings
+
+from core.models import ContentBlob, ScrapedContent
+from core.models import content_blobs
+from core.tests import CoreTestCase, CoreTransactionTestCase, make_material
+
+TEXT = 'Entropy never decreases in an isolated system. Ünïcödé survives too. ' * 200
+
+
+class ContentBlobTests(CoreTestCase):
+    def test_compress_round_trip(self):
+        blob = ContentBlob.build(TEXT)
+
+        self.assertEqual(blob.codec, ContentBlob.CODEC_ZLIB)
+        self.assertEqual(blob.content_hash, hashlib.sha256(TEXT.encode('utf-8')).hexdigest())
+        self.assertEqual(blob.size, len(TEXT.encode('utf-8')))
+        self.assertLess(blob.stored_size, blob.size)
+        blob.save()
+        self.assertEqual(ContentBlob.objects.get(pk=blob.pk).text, TEXT)
+
+    @override_settings(CONTENT_STORE={'CODEC': 'zstd'})
+    def test_zstd_round_trip(self):
+        if content_blobs.zstandard is None:
+            self.skipTest('zstandard is not installed')
+        blob = ContentBlob.build(TEXT)
+
+        self.assertEqual(blob.codec, ContentBlob.CODEC_ZSTD)
+        self.assertEqual(blob.text, TEXT)
+
+    def test_same_text_is_stored_once(self):
+        first = make_material(title='First', text=TEXT)
+        second = make_material(title='Second', text=TEXT)
+        make_material(title='Other', text='Something else entirely.')
+
+        self.assertEqual(first.scraped_content.blob_id, second.scraped_content.blob_id)
+        self.assertEqual(ContentBlob.objects.count(), 2)
+        self.assertEqual(ScrapedContent.objects.get(pk=second.scraped_content_id).raw_content, TEXT)
+
+    def test_prune_deletes_only_unreferenced_blobs(self):
+        study_material = make_material(text=TEXT)
+        orphan = ContentBlob.build('Nobody points at this text.')
+        orphan.save()
+
+        stdout = StringIO()
+        call_command('content_store_report', '--prune', stdout=stdout)
+
+        self.assertIn('Deleted 1 unreferenced blobs.', stdout.getvalue())
+        self.assertEqual(list(ContentBlob.objects.values_list('pk', flat=True)),
+                         [study_material.scraped_content.blob_id])
+        self.assertEqual(ScrapedContent.objects.get(pk=study_material.scraped_content_id).raw_content, TEXT)
+
+    def test_delete_unreferenced_rechecks_the_given_hashes(self):
+        study_material = make_material(text=TEXT)
+        orphan = ContentBlob.build('Nobody points at this text.')
+        orphan.save()
+
+        deleted = ContentBlob.delete_unreferenced([study_material.scraped_content.blob_id, orphan.pk])
+
+        self.assertEqual(deleted, 1)
+        self.assertTrue(ContentBlob.objects.filter(pk=study_material.scraped_content.blob_id).exists())
+
+
+class CompressExistingMigrationTests(CoreTransactionTestCase):
+    before = [('core', '0010_content_fingerprints')]
+    after = [('core', '0011_content_blobs')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        with redirect_stdout(StringIO()):
+            executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def test_existing_rows_move_into_shared_blobs(self):
+        apps = self.migrate(self.before)
+        OldScrapedContent = apps.get_model('core', 'ScrapedContent')
+        texts = [TEXT, TEXT, 'A second document.', '']
+        ids = [
+            OldScrapedContent.objects.create(url=f"https://example.com/{i}", title=f"Page {i}", raw_content=text,
+                                             source_type='webpage').pk
+            for i, text in enumerate(texts)
+        ]
+
+        apps = self.migrate(self.after)
+        NewScrapedContent = apps.get_model('core', 'ScrapedContent')
+        NewContentBlob = apps.get_model('core', 'ContentBlob')
+
+        self.assertEqual(NewContentBlob.objects.count(), 3)
+        for pk, text in zip(ids, texts):
+            blob = NewScrapedContent.objects.select_related('blob').get(pk=pk).blob
+            self.assertEqual(blob.content_hash, hashlib.sha256(text.encode('utf-8')).hexdigest())
+            self.assertEqual(blob.codec, 'zlib')
+            self.assertEqual(zlib.decompress(bytes(blob.data)).decode('utf-8'), text)
+            self.assertEqual(blob.size, len(text.encode('utf-8')))
+
+        apps = self.migrate(self.before)
+        self.assertEqual(
+            list(apps.get_model('core', 'ScrapedContent').objects.order_by('pk').values_list('raw_content', flat=True)),
+            texts
+        )
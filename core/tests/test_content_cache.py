@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+
+from core.models import IngestionJob, ScrapedContent, StudyMaterial
+from core.services.content_cache import ContentCache
+from core.services.ingestion import IngestionPipeline
+from core.tests import CoreTestCase
+
+PAGE = (
+    "<html><head><title>Arrays</title></head><body><article>"
+    + "<p>An array stores elements of the same type next to each other in memory.</p>" * 20
+    + "</article></body></html>"
+)
+
+
+def fake_get(url, headers=None, **kwargs):
+    return mock.Mock(status_code=200, text=PAGE, headers={}, raise_for_status=lambda: None)
+
+
+class NormalizeUrlTests(CoreTestCase):
+    def test_tracking_params_are_dropped(self):
+        self.assertEqual(
+            ContentCache.normalize_url('HTTPS://WWW.GeeksForGeeks.org/arrays/?utm_source=x&ref=home&fbclid=1&b=2&a=1'),
+            'https://www.geeksforgeeks.org/arrays?a=1&b=2'
+        )
+
+    def test_params_that_only_start_like_tracking_params_are_kept(self):
+        self.assertEqual(
+            ContentCache.normalize_url('https://javatpoint.com/page?reference=3&refid=7&referrer=x'),
+            'https://javatpoint.com/page?reference=3&refid=7'
+        )
+
+
+class IngestCacheTests(CoreTestCase):
+    url = 'https://www.geeksforgeeks.org/arrays/'
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice')
+
+    def ingest(self, url=None):
+        with mock.patch('core.services.http_client.ScraperHttpClient.get', side_effect=fake_get) as get, \
+                self.captureOnCommitCallbacks(execute=True):
+            job = IngestionPipeline.enqueue(self.user, url=url or self.url)
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.STATUS_DONE, job.error)
+        return job, get.call_count
+
+    def test_entries_keep_the_hash_and_row_ids_but_not_the_text(self):
+        job, _ = self.ingest()
+
+        entry = ContentCache.get(f"url:{ContentCache.normalize_url(self.url)}")
+        self.assertNotIn('content', entry['scraped'])
+        self.assertEqual(entry['scraped_content_id'], job.scraped_content_id)
+        self.assertEqual(entry['content_hash'], ContentCache.content_hash(job.scraped_content.raw_content))
+
+    def test_repeat_ingest_is_served_from_the_cache(self):
+        first, _ = self.ingest()
+        second, fetches = self.ingest(self.url + '?utm_source=newsletter')
+
+        self.assertEqual(fetches, 0)
+        self.assertEqual(second.study_material_id, first.study_material_id)
+        self.assertEqual(ScrapedContent.objects.count(), 1)
+
+    def test_entry_for_a_deleted_page_is_a_miss(self):
+        first, _ = self.ingest()
+        ScrapedContent.objects.all().delete()
+
+        second, fetches = self.ingest()
+
+        self.assertEqual(fetches, 1)
+        self.assertNotEqual(second.scraped_content_id, first.scraped_content_id)
+        self.assertEqual(StudyMaterial.objects.count(), 1)
@@ -0,0 +1,78 @@
+import os
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.services.content_scraper import ContentScraper
+from core.tests import make_pdf
+
+
+class ParallelPdfTests(SimpleTestCase):
+    def test_parallel_extraction_matches_serial_and_cleans_up(self):
+        data = make_pdf(ContentScraper.PDF_PARALLEL_MIN_PAGES + 5)
+
+        with tempfile.TemporaryDirectory() as scratch, mock.patch.object(tempfile, 'tempdir', scratch):
+            parallel = ContentScraper.process_content(BytesIO(data), is_pdf=True, parallel=True, workers=2)
+            self.assertEqual(os.listdir(scratch), [])
+
+        serial = ContentScraper.process_content(BytesIO(data), is_pdf=True, stream=True)
+        self.assertEqual(parallel, serial)
+        self.assertIn('Page 44 line 9', parallel['content'])
+
+    def test_workers_are_sent_a_path_not_the_pdf(self):
+        data = make_pdf(ContentScraper.PDF_PARALLEL_MIN_PAGES)
+        calls = []
+
+        class InlineExecutor:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def map(self, function, *iterables):
+                calls.extend(zip(*iterables))
+                return map(function, *iterables)
+
+        with mock.patch('core.services.content_scraper.ProcessPoolExecutor', InlineExecutor):
+            text = ''.join(ContentScraper.iter_pdf_pages_parallel(BytesIO(data), workers=2))
+
+        self.assertTrue(calls)
+        self.assertTrue(all(isinstance(path, str) for path, _, _ in calls))
+        self.assertIn('Page 39 line 0', text)
+
+
+class StreamedPdfTests(SimpleTestCase):
+    def test_streamed_text_matches_full_extraction(self):
+        data = make_pdf(5)
+        streamed = ContentScraper.process_content(BytesIO(data), is_pdf=True, stream=True)
+        full = ContentScraper.process_content(BytesIO(data), is_pdf=True)
+
+        self.assertEqual(streamed['content'], full['content'])
+
+    def test_cleaned_text_is_capped_at_max_bytes(self):
+        data = make_pdf(20)
+        full = ContentScraper.process_content(BytesIO(data), is_pdf=True, stream=True)['content']
+
+        capped = ContentScraper.process_content(BytesIO(data), is_pdf=True, stream=True, max_bytes=1000)['content']
+
+        self.assertLessEqual(len(capped.encode('utf-8')), 1000)
+        self.assertTrue(full.startswith(capped))
+
+    def test_extraction_stops_once_the_limit_is_reached(self):
+        pages = []
+
+        def chunks():
+            for page in range(100):
+                pages.append(page)
+                yield f"page {page} " * 50
+
+        text = ContentScraper.join_clean_content(chunks(), max_bytes=600)
+
+        self.assertEqual(len(text.encode('utf-8')), 600)
+        self.assertLess(len(pages), 5)
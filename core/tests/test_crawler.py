@@ -0,0 +1,102 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+from core.models import IngestionJob, ScrapedContent, StudyMaterial
+from core.services.content_cache import ContentCache
+from core.services.crawler import BatchCrawler
+from core.tests import CoreTransactionTestCase
+
+SENTENCES = {
+    'index': 'Data structures organise values so programs can use them efficiently.',
+    'arrays': 'An array stores elements of one type in contiguous memory locations.',
+    'stacks': 'A stack removes the most recently added element first.',
+    'queues': 'A queue removes elements in the same order they were added.',
+}
+
+
+class FixtureSite(BaseHTTPRequestHandler):
+    """A tiny tutorial site: an index linking to three topics, one missing and one private page."""
+    protocol_version = 'HTTP/1.1'
+    edits = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        name = self.path.strip('/') or 'index'
+        if name == 'robots.txt':
+            self.reply(200, 'text/plain', 'User-agent: *\nDisallow: /private\n')
+        elif name in SENTENCES:
+            links = ''.join(f'<a href="/{topic}">{topic}</a>' for topic in ('arrays', 'stacks', 'queues', 'missing', 'private'))
+            body = ' '.join([SENTENCES[name], self.edits.get(name, '')] + [
+                f"Sentence {i} about {name} explains another detail of the topic." for i in range(12)
+            ])
+            self.reply(200, 'text/html', f"<html><title>{name}</title><body><nav>{links}</nav>"
+                                         f"<article><p>{body}</p></article></body></html>")
+        else:
+            self.reply(404, 'text/html', 'Not found')
+
+    def reply(self, status, content_type, body):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class BatchCrawlerTests(CoreTransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureSite)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        FixtureSite.edits = {}
+
+    def crawl(self):
+        return BatchCrawler([self.base], max_depth=1, allowed_domains=['127.0.0.1'],
+                            per_host_interval=0, batch_size=2).run()
+
+    def test_crawl_imports_every_page_and_records_errors_on_jobs(self):
+        report = self.crawl()
+
+        self.assertEqual((report.persisted, report.skipped_robots), (4, 1))
+        self.assertEqual(StudyMaterial.objects.count(), 4)
+        self.assertEqual(IngestionJob.objects.filter(status=IngestionJob.STATUS_DONE, user=None).count(), 4)
+        self.assertEqual(report.failed.keys(), {f"{self.base}missing"})
+        failed = IngestionJob.objects.get(status=IngestionJob.STATUS_FAILED)
+        self.assertTrue(failed.url.endswith('/missing'))
+        self.assertIn('404', failed.error)
+
+    def test_recrawl_reuses_stored_pages(self):
+        self.crawl()
+        materials = set(StudyMaterial.objects.values_list('id', flat=True))
+
+        report = self.crawl()
+
+        self.assertEqual((report.reused, report.persisted), (4, 0))
+        self.assertEqual(set(StudyMaterial.objects.values_list('id', flat=True)), materials)
+        self.assertEqual(ScrapedContent.objects.count(), 4)
+
+    def test_recrawl_in_a_new_process_refreshes_changed_pages_in_place(self):
+        self.crawl()
+        arrays = StudyMaterial.objects.get(title='arrays')
+        # As if the crawl ran in another process, with a cold cache
+        ContentCache.set_backend(None)
+        FixtureSite.edits = {'arrays': 'Indexing an array takes constant time.'}
+
+        report = self.crawl()
+
+        self.assertEqual(report.reused, 4)
+        self.assertEqual(StudyMaterial.objects.count(), 4)
+        self.assertIn('constant time', StudyMaterial.objects.get(pk=arrays.pk).scraped_content.raw_content)
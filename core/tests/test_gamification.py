@@ -0,0 +1,125 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from core.models import UserBadge, XPLedgerEntry
+from core.services.gamification import GamificationService
+from core.services.gamification_events import GamificationEvents
+from core.tests import CoreTestCase, CoreTransactionTestCase, make_material
+
+
+class ProgressStatsTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        GamificationService.initialize_badges()
+        self.user = User.objects.create_user('alice')
+        with self.captureOnCommitCallbacks(execute=True):
+            GamificationService.award_xp(self.user, 'complete_milestone', bonus=100)
+
+    def test_one_query_cold_and_none_warm(self):
+        with self.assertNumQueries(1):
+            computed = GamificationService.get_progress_stats(self.user)
+        with self.assertNumQueries(0):
+            cached = GamificationService.get_progress_stats(self.user)
+
+        self.assertEqual(cached, computed)
+        self.assertEqual(computed, GamificationService._query_progress_stats(self.user))
+
+    def test_award_drops_the_cached_stats(self):
+        before = GamificationService.get_progress_stats(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            GamificationService.award_xp(self.user, 'read_material')
+
+        after = GamificationService.get_progress_stats(self.user)
+        self.assertEqual(after['total_xp'], before['total_xp'] + GamificationService.XP_REWARDS['read_material'])
+
+
+class MilestoneRaceTests(CoreTransactionTestCase):
+    THREADS = 8
+
+    def race(self, user, milestone, key=None):
+        barrier = threading.Barrier(self.THREADS)
+        results, errors = [], []
+
+        def complete():
+            try:
+                barrier.wait()
+                results.append(GamificationService.complete_milestone(user, milestone, idempotency_key=key))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=complete) for _ in range(self.THREADS)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+        return [result['xp_earned'] for result in results]
+
+    def test_simultaneous_completions_award_xp_once(self):
+        user = User.objects.create_user('alice')
+        milestone = make_material().milestones.get()
+        xp = GamificationService.XP_REWARDS['complete_milestone'] + milestone.xp_reward
+
+        earned = self.race(user, milestone)
+
+        self.assertEqual(sorted(earned), [0] * (self.THREADS - 1) + [xp])
+        self.assertEqual(XPLedgerEntry.objects.filter(user=user, milestone=milestone).count(), 1)
+        self.assertEqual(GamificationService.get_user_xp(user), xp)
+
+    def test_simultaneous_retries_with_one_key_all_see_the_award(self):
+        user = User.objects.create_user('alice')
+        milestone = make_material().milestones.get()
+        xp = GamificationService.XP_REWARDS['complete_milestone'] + milestone.xp_reward
+
+        earned = self.race(user, milestone, key='retry')
+
+        self.assertEqual(earned, [xp] * self.THREADS)
+        self.assertEqual(XPLedgerEntry.objects.filter(user=user, milestone=milestone).count(), 1)
+
+
+class BadgeRaceTests(CoreTransactionTestCase):
+    THREADS = 8
+
+    def test_threshold_crossed_by_simultaneous_awards_is_awarded_once(self):
+        GamificationService.initialize_badges()
+        user = User.objects.create_user('alice')
+        GamificationService.award_xp(user, 'read_material', bonus=60)
+        barrier = threading.Barrier(self.THREADS)
+        reported, errors = [], []
+
+        def award(through_queue):
+            try:
+                barrier.wait()
+                if through_queue:
+                    event = {'user_id': user.pk, 'action_type': 'bookmark_insight',
+                             'amount': GamificationService.XP_REWARDS['bookmark_insight']}
+                    reported.extend(GamificationEvents.apply_batch([event]).new_badges.get(user.pk, []))
+                else:
+                    GamificationService.award_xp(user, 'bookmark_insight')
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        # Half the awards come from event batches, half from direct award_xp calls
+        workers = [threading.Thread(target=award, args=(i % 2 == 0,)) for i in range(self.THREADS)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(GamificationService.get_user_xp(user), 80 + self.THREADS * 10)
+        self.assertEqual(list(UserBadge.objects.filter(user=user).values_list('badge__name', flat=True)),
+                         ['Study Starter'])
+        self.assertLessEqual(len(reported), 1)
+
+    def test_totals_come_from_the_locked_row(self):
+        user = User.objects.create_user('alice')
+        with transaction.atomic():
+            self.assertEqual(GamificationService._add_to_total(user, 30), (0, 30))
+            self.assertEqual(GamificationService._add_to_total(user, 70), (30, 100))
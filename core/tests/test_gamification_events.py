@@ -0,0 +1,151 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+
+from core.models import UserXP, XPLedgerEntry
+from core.services.gamification import GamificationService
+from core.services.gamification_events import EagerEventQueue, GamificationEvents, InMemoryEventQueue
+from core.tests import CoreTestCase, CoreTransactionTestCase, make_material
+
+ACTIONS = ['read_material', 'complete_milestone', 'read_material', 'complete_quiz', 'read_material']
+
+
+class ApplyBatchTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+        self.study_material = make_material(milestones=2)
+        self.first, self.second = self.study_material.milestones.all()
+
+    def event(self, user_id, action_type='read_material', **fields):
+        return {'user_id': user_id, 'action_type': action_type,
+                'amount': GamificationService.XP_REWARDS[action_type], **fields}
+
+    def test_batch_matches_applying_events_one_by_one(self):
+        GamificationService.initialize_badges()
+        one_by_one = User.objects.create_user('carol')
+        for action_type in ACTIONS * 20:
+            GamificationService.award_xp(one_by_one, action_type)
+
+        report = GamificationEvents.apply_batch([self.event(self.alice.pk, action_type) for action_type in ACTIONS * 20])
+
+        self.assertEqual(report.dead_letters, [])
+        self.assertEqual(GamificationService.get_user_xp(self.alice), GamificationService.get_user_xp(one_by_one))
+        self.assertEqual(set(self.alice.userbadge_set.values_list('badge__name', flat=True)),
+                         set(one_by_one.userbadge_set.values_list('badge__name', flat=True)))
+
+    def test_unknown_user_is_dead_lettered_and_the_rest_applied(self):
+        report = GamificationEvents.apply_batch([
+            self.event(self.alice.pk), self.event(999999), self.event(self.bob.pk)
+        ])
+
+        self.assertEqual(report.users, 2)
+        self.assertEqual([record['event']['user_id'] for record in report.dead_letters], [999999])
+        self.assertEqual(XPLedgerEntry.objects.count(), 2)
+        self.assertEqual(GamificationService.get_user_xp(self.bob), GamificationService.XP_REWARDS['read_material'])
+
+    def test_failing_batch_is_retried_event_by_event(self):
+        check_badges = GamificationService.check_and_award_badges
+
+        def fail_for_alice(user, **kwargs):
+            if user.pk == self.alice.pk:
+                raise DatabaseError('disk I/O error')
+            return check_badges(user, **kwargs)
+
+        with mock.patch.object(GamificationService, 'check_and_award_badges', side_effect=fail_for_alice):
+            report = GamificationEvents.apply_batch([self.event(self.alice.pk), self.event(self.bob.pk)])
+
+        self.assertEqual([record['event']['user_id'] for record in report.dead_letters], [self.alice.pk])
+        self.assertEqual(report.users, 1)
+        self.assertFalse(XPLedgerEntry.objects.filter(user=self.alice).exists())
+        self.assertEqual(UserXP.objects.get(user=self.bob).total_xp, GamificationService.XP_REWARDS['read_material'])
+
+    def test_redelivered_event_is_a_duplicate(self):
+        event = self.event(self.alice.pk, 'complete_milestone', milestone_id=self.first.pk, idempotency_key='k')
+        GamificationEvents.apply_batch([event])
+        report = GamificationEvents.apply_batch([event])
+
+        self.assertEqual(report.duplicates, 1)
+        self.assertEqual(report.dead_letters, [])
+        self.assertEqual(XPLedgerEntry.objects.filter(user=self.alice).count(), 1)
+
+    def test_key_reused_for_another_milestone_is_dead_lettered(self):
+        GamificationEvents.apply_batch([
+            self.event(self.alice.pk, 'complete_milestone', milestone_id=self.first.pk, idempotency_key='k')
+        ])
+        report = GamificationEvents.apply_batch([
+            self.event(self.alice.pk, 'complete_milestone', milestone_id=self.second.pk, idempotency_key='k')
+        ])
+
+        self.assertEqual(report.duplicates, 0)
+        self.assertEqual(len(report.dead_letters), 1)
+        self.assertIn('different award', report.dead_letters[0]['error'])
+
+    def test_queue_keeps_dead_letters_and_requeues_them(self):
+        event_queue = EagerEventQueue(GamificationEvents.apply_batch)
+        GamificationEvents.set_queue(event_queue)
+        event_queue.publish(self.event(999999))
+
+        self.assertEqual(len(GamificationEvents.dead_letters()), 1)
+        self.assertEqual(GamificationEvents.requeue_dead_letters(), 1)
+        # Still poison, so it is back on the list
+        self.assertEqual(len(GamificationEvents.dead_letters()), 1)
+
+
+class CompleteMilestoneTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice')
+        self.first, self.second = make_material(milestones=2).milestones.all()
+        self.xp = GamificationService.XP_REWARDS['complete_milestone'] + self.first.xp_reward
+
+    def test_retry_before_the_event_is_applied_returns_the_same_xp(self):
+        with self.captureOnCommitCallbacks():
+            first = GamificationService.complete_milestone(self.user, self.first, idempotency_key='k')
+            retry = GamificationService.complete_milestone(self.user, self.first, idempotency_key='k')
+
+        self.assertEqual(first['xp_earned'], self.xp)
+        self.assertEqual(retry['xp_earned'], self.xp)
+        self.assertFalse(XPLedgerEntry.objects.exists())
+
+    def test_retry_after_the_event_is_applied_returns_the_same_xp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            GamificationService.complete_milestone(self.user, self.first, idempotency_key='k')
+        retry = GamificationService.complete_milestone(self.user, self.first, idempotency_key='k')
+
+        self.assertEqual(retry['xp_earned'], self.xp)
+        self.assertEqual(GamificationService.get_user_xp(self.user), self.xp)
+
+    def test_repeat_without_key_earns_nothing(self):
+        GamificationService.complete_milestone(self.user, self.first)
+        self.assertEqual(GamificationService.complete_milestone(self.user, self.first)['xp_earned'], 0)
+
+    def test_key_reused_for_another_milestone_is_rejected_before_the_event_is_applied(self):
+        with self.captureOnCommitCallbacks():
+            GamificationService.complete_milestone(self.user, self.first, idempotency_key='k')
+            with self.assertRaises(ValueError):
+                GamificationService.complete_milestone(self.user, self.second, idempotency_key='k')
+
+
+class InMemoryQueueTests(CoreTransactionTestCase):
+    def test_published_events_are_applied_in_batches(self):
+        users = [User.objects.create_user(f"user{i}") for i in range(3)]
+        batches = []
+
+        def apply(events):
+            batches.append(len(events))
+            return GamificationEvents.apply_batch(events)
+
+        GamificationEvents.set_queue(InMemoryEventQueue(apply, batch_size=50, batch_window=0.05))
+        for _ in range(20):
+            for user in users:
+                GamificationEvents.publish(user, 'read_material')
+        GamificationEvents.drain()
+
+        self.assertEqual(sum(batches), 60)
+        self.assertLess(len(batches), 60)
+        self.assertEqual(XPLedgerEntry.objects.count(), 60)
+        for user in users:
+            self.assertEqual(GamificationService.get_user_xp(user), 20 * GamificationService.XP_REWARDS['read_material'])
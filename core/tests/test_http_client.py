@@ -0,0 +1,158 @@
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import threading
+import time
+
+import requests
+from django.test import SimpleTestCase
+
+from core.services.http_client import ResponseTooLarge, ScraperHttpClient
+
+
+class SessionPoolTests(SimpleTestCase):
+    def test_session_keeps_a_pool_per_host(self):
+        adapter = ScraperHttpClient._build_session().get_adapter('https://www.geeksforgeeks.org/')
+        hosts = ['geeksforgeeks.org', 'www.geeksforgeeks.org', 'practice.geeksforgeeks.org']
+        pools = [adapter.poolmanager.connection_from_url(f"https://{host}/") for host in hosts]
+
+        # Going back to the first host reuses its pool and keep-alive connections
+        self.assertIs(adapter.poolmanager.connection_from_url(f"https://{hosts[0]}/"), pools[0])
+
+
+class TestServer(BaseHTTPRequestHandler):
+    """Endpoints for the client's limits: large bodies, slow and flaky responses."""
+    protocol_version = 'HTTP/1.1'
+    lock = threading.Lock()
+    hits = Counter()
+    in_flight = peak = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        name = self.path.strip('/')
+        with self.lock:
+            self.hits[name] += 1
+            hits = self.hits[name]
+            TestServer.in_flight += 1
+            TestServer.peak = max(TestServer.peak, TestServer.in_flight)
+        try:
+            if name == 'declared':
+                self.reply(200, b'x' * 2048)
+            elif name == 'chunked':
+                # No Content-Length, so only counting the body can catch it
+                self.send_response(200)
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for _ in range(4):
+                    self.wfile.write(b'200\r\n' + b'x' * 512 + b'\r\n')
+                self.wfile.write(b'0\r\n\r\n')
+            elif name == 'slow':
+                time.sleep(0.2)
+                self.reply(200, b'done')
+            elif name == 'hang':
+                time.sleep(1)
+                self.reply(200, b'too late')
+            elif name == 'flaky':
+                self.reply(503 if hits <= 2 else 200, b'ok')
+            else:
+                self.reply(503, b'down')
+        finally:
+            with self.lock:
+                TestServer.in_flight -= 1
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ScraperHttpClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), TestServer)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        TestServer.hits = Counter()
+        TestServer.in_flight = TestServer.peak = 0
+        ScraperHttpClient.metrics.reset()
+        # Fresh sessions and slots, so each test's limits apply
+        for name in ('_sessions', '_slots'):
+            patcher = mock.patch.dict(getattr(ScraperHttpClient, name), clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def configure(self, **limits):
+        patcher = mock.patch.multiple(ScraperHttpClient, BACKOFF_FACTOR=0, **limits)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_body_over_max_bytes_is_refused(self):
+        with self.assertRaises(ResponseTooLarge):
+            ScraperHttpClient.get(self.base + 'declared', max_bytes=1024)
+        with self.assertRaises(ResponseTooLarge):
+            ScraperHttpClient.get(self.base + 'chunked', max_bytes=1024)
+
+        self.configure(MAX_RESPONSE_BYTES=1024)
+        with self.assertRaises(ResponseTooLarge):
+            ScraperHttpClient.get(self.base + 'chunked')
+        self.assertEqual(len(ScraperHttpClient.get(self.base + 'chunked', max_bytes=4096).content), 2048)
+
+    def test_in_flight_requests_are_capped_per_domain(self):
+        self.configure(MAX_IN_FLIGHT_PER_DOMAIN=2)
+        threads = [threading.Thread(target=ScraperHttpClient.get, args=(self.base + 'slow',)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(TestServer.hits['slow'], 6)
+        self.assertEqual(TestServer.peak, 2)
+
+    def test_no_free_slot_within_slot_timeout_raises(self):
+        self.configure(MAX_IN_FLIGHT_PER_DOMAIN=1, SLOT_TIMEOUT=0.05)
+        _, slot = ScraperHttpClient._session_and_slot(ScraperHttpClient.domain_for(self.base))
+        slot.acquire()
+        try:
+            with self.assertRaisesMessage(ValueError, 'Too many concurrent requests'):
+                ScraperHttpClient.get(self.base + 'slow')
+        finally:
+            slot.release()
+        self.assertEqual(TestServer.hits['slow'], 0)
+
+    def test_retryable_statuses_are_retried(self):
+        self.configure(RETRIES=3)
+        response = ScraperHttpClient.get(self.base + 'flaky')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(TestServer.hits['flaky'], 3)
+        self.assertEqual(ScraperHttpClient.metrics.snapshot()['127.0.0.1']['retries']['total'], 2)
+
+    def test_retries_stop_after_the_configured_count(self):
+        self.configure(RETRIES=1)
+        response = ScraperHttpClient.get(self.base + 'down')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(TestServer.hits['down'], 2)
+
+    def test_read_timeout_is_retried_then_raised(self):
+        self.configure(RETRIES=1, READ_TIMEOUT=0.2)
+        started = time.perf_counter()
+        with self.assertRaises(requests.RequestException):
+            ScraperHttpClient.get(self.base + 'hang')
+
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(TestServer.hits['hang'], 2)
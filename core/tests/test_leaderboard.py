@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from core.models import XPLedgerEntry
+from core.services.leaderboard import Leaderboard
+from core.tests import CoreTestCase, make_material
+
+
+class RebuildTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice')
+        self.study_material = make_material()
+        XPLedgerEntry.objects.create(user=self.user, action_type='read_material', amount=5,
+                                     study_material=self.study_material)
+
+    def test_rebuild_matches_the_ledger(self):
+        Leaderboard.rebuild()
+
+        self.assertEqual(Leaderboard.top()[0]['xp'], 5)
+        self.assertEqual(Leaderboard.rank(self.user, study_material_id=self.study_material.pk, weekly=True)['xp'], 5)
+
+    def test_rebuild_deletes_boards_the_ledger_no_longer_has(self):
+        Leaderboard.rebuild()
+        Leaderboard.record([(self.user.pk, 7, 424242)])
+        backend = Leaderboard.get_backend()
+        self.assertIn(Leaderboard.board_name(424242), backend.boards())
+
+        boards = Leaderboard.rebuild()
+
+        self.assertEqual(sorted(backend.boards()), sorted(boards))
+        self.assertNotIn(Leaderboard.board_name(424242), backend.boards())
+        self.assertEqual(Leaderboard.top()[0]['xp'], 5)
+
+
+class PastWeekTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='secret')
+        self.study_material = make_material()
+        for weeks_ago, amount in ((0, 5), (1, 7), (5, 11)):
+            entry = XPLedgerEntry.objects.create(user=self.user, action_type='read_material', amount=amount,
+                                                 study_material=self.study_material)
+            XPLedgerEntry.objects.filter(pk=entry.pk).update(
+                created_at=Leaderboard.week_start(weeks_ago=weeks_ago) + timedelta(days=2)
+            )
+
+    def test_rebuild_keeps_the_weeks_before_this_one(self):
+        last_week = Leaderboard.week_start(weeks_ago=1)
+        Leaderboard.record([(self.user.pk, 3, None)], at=last_week + timedelta(days=1))
+
+        boards = Leaderboard.rebuild()
+
+        self.assertEqual(Leaderboard.top(weekly=True)[0]['xp'], 5)
+        self.assertEqual(Leaderboard.top(weekly=True, at=last_week)[0]['xp'], 7)
+        self.assertEqual(Leaderboard.rank(self.user, self.study_material.pk, weekly=True, at=last_week)['xp'], 7)
+        self.assertEqual(Leaderboard.top()[0]['xp'], 23)
+        # Only the current week and the WEEKS_KEPT weeks before it are rebuilt
+        self.assertEqual(Leaderboard.top(weekly=True, at=Leaderboard.week_start(weeks_ago=5)), [])
+        self.assertEqual(sorted(Leaderboard.get_backend().boards()), sorted(boards))
+
+    def test_view_reads_a_past_week(self):
+        self.client.login(username='alice', password='secret')
+        url = reverse('leaderboard')
+
+        response = self.client.get(url, {'period': 'week', 'weeks_ago': 1})
+        self.assertEqual(response.json()['top'][0]['xp'], 7)
+        self.assertEqual(response.json()['me']['xp'], 7)
+
+        for params in ({'period': 'week', 'weeks_ago': 3}, {'weeks_ago': 1}, {'period': 'week', 'weeks_ago': 'x'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
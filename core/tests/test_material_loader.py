@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+
+from core.models import BookmarkedInsight, KeyConcept, UserProgress
+from core.services.material_loader import StudyMaterialLoader
+from core.tests import CoreTestCase, make_material
+
+
+class StudyMaterialLoaderTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice')
+        self.study_material = make_material(milestones=3)
+        KeyConcept.objects.bulk_create([
+            KeyConcept(study_material=self.study_material, concept=f"Concept {i}", definition='Definition')
+            for i in range(3)
+        ])
+        BookmarkedInsight.objects.bulk_create([
+            BookmarkedInsight(study_material=self.study_material, content=f"Insight {i}", importance_level=3)
+            for i in range(3)
+        ])
+        self.first = self.study_material.milestones.order_by('order').first()
+        UserProgress.objects.create(user=self.user, study_material=self.study_material, milestone=self.first,
+                                    completed=True, xp_earned=60)
+
+    def test_five_queries_cold_and_one_warm(self):
+        with self.assertNumQueries(5):
+            fresh = StudyMaterialLoader.load(self.study_material.id, self.user)
+        with self.assertNumQueries(1):
+            cached = StudyMaterialLoader.load(self.study_material.id, self.user)
+
+        self.assertEqual(cached, fresh)
+        self.assertEqual(len(fresh.key_concepts), 3)
+        self.assertEqual(len(fresh.insights), 3)
+        self.assertEqual([milestone['is_completed'] for milestone in fresh.milestones], [True, False, False])
+
+    def test_completion_flags_are_per_user(self):
+        StudyMaterialLoader.load(self.study_material.id, self.user)
+        other = StudyMaterialLoader.load(self.study_material.id, User.objects.create_user('bob'))
+
+        self.assertFalse(any(milestone['is_completed'] for milestone in other.milestones))
+
+    def test_editing_a_child_drops_the_cached_material(self):
+        StudyMaterialLoader.load(self.study_material.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.title = 'Renamed'
+            self.first.save()
+
+        detail = StudyMaterialLoader.load(self.study_material.id)
+        self.assertEqual(detail.milestones[0]['title'], 'Renamed')
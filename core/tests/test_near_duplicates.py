@@ -0,0 +1,69 @@
+import random
+from unittest import mock
+
+from core.services import near_duplicates
+from core.services.near_duplicates import MinHasher, NearDuplicateIndex
+from core.tests import CoreTestCase, make_material
+
+WORDS = (
+    'array stack queue tree graph node pointer memory index key value hash '
+    'important essential crucial algorithm complexity sorting search binary'
+).split()
+
+
+def document(seed: int, words: int = 2000) -> str:
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+class NearDuplicateIndexTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.text = document(1)
+        self.study_material = make_material(text=self.text)
+        NearDuplicateIndex.add(self.study_material.scraped_content_id, NearDuplicateIndex.signature(self.text))
+
+    def test_near_copy_finds_the_material(self):
+        words = self.text.split()
+        words[100] = words[1500] = 'changed'
+        signature = NearDuplicateIndex.signature(' '.join(words).upper() + '!')
+
+        with self.assertNumQueries(2):
+            match = NearDuplicateIndex.find_material(signature)
+
+        self.assertEqual(match.scraped_content_id, self.study_material.scraped_content_id)
+        self.assertEqual(match.study_material_id, self.study_material.id)
+        self.assertGreaterEqual(match.similarity, NearDuplicateIndex.get_settings()['THRESHOLD'])
+
+    def test_different_document_is_not_a_duplicate(self):
+        self.assertIsNone(NearDuplicateIndex.find_material(NearDuplicateIndex.signature(document(2))))
+        self.assertIsNone(NearDuplicateIndex.find_material(NearDuplicateIndex.signature('')))
+
+    def test_add_many_indexes_every_signature(self):
+        others = [make_material(title=f"Other {i}", text=document(10 + i)) for i in range(3)]
+        added = NearDuplicateIndex.add_many(
+            [(other.scraped_content_id, NearDuplicateIndex.signature(document(10 + i)))
+             for i, other in enumerate(others)] + [(self.study_material.scraped_content_id + 100, None)]
+        )
+
+        self.assertEqual(added, 3)
+        for i, other in enumerate(others):
+            match = NearDuplicateIndex.find_material(NearDuplicateIndex.signature(document(10 + i)))
+            self.assertEqual(match.study_material_id, other.id)
+
+
+class MinHasherTests(CoreTestCase):
+    def test_numpy_and_pure_python_signatures_match(self):
+        if near_duplicates.np is None:
+            self.skipTest('numpy is not installed')
+        hasher = MinHasher(num_perm=64, shingle_size=5)
+        text = document(3, words=500)
+        with mock.patch.object(near_duplicates, 'np', None):
+            pure = hasher.signature(text)
+        self.assertEqual(hasher.signature(text), pure)
+
+    def test_similarity_estimates_shared_shingles(self):
+        hasher = MinHasher(num_perm=128, shingle_size=5)
+        first = hasher.signature(document(4))
+        self.assertEqual(MinHasher.similarity(first, first), 1.0)
+        self.assertLess(MinHasher.similarity(first, hasher.signature(document(5))), 0.2)
@@ -0,0 +1,71 @@
+import json
+
+from django.contrib.auth.models import User
+
+from core.models import Progress, Question, Quiz
+from core.services.gamification import GamificationService
+from core.services.quiz_engine import QuizEngine
+from core.tests import CoreTestCase
+
+
+class QuizEngineTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice')
+        self.quiz = Quiz.objects.create(title='Sorting', description='Merge sort and friends')
+        Question.objects.bulk_create([
+            Question(quiz=self.quiz, text=f"Question {i}?", correct_answer=f"Answer {i}", option1=f"Answer {i}",
+                     option2=f"Wrong {i}a", option3=f"Wrong {i}b", option4=f"Wrong {i}c")
+            for i in range(5)
+        ])
+
+    def correct_answers(self):
+        return dict(QuizEngine.compiled(self.quiz.id)['answers'])
+
+    def test_two_queries_cold_and_none_warm(self):
+        with self.assertNumQueries(2):
+            first = QuizEngine.payload(self.quiz.id, seed=1)
+        with self.assertNumQueries(0):
+            QuizEngine.payload(self.quiz.id, seed=2)
+
+        quiz = json.loads(first)
+        self.assertEqual(quiz['title'], 'Sorting')
+        self.assertEqual(len(quiz['questions']), 5)
+        for question in quiz['questions']:
+            self.assertEqual(sorted(question['options']),
+                             sorted(QuizEngine.options(Question.objects.get(pk=question['id']))))
+
+    def test_same_seed_gives_the_same_order(self):
+        self.assertEqual(QuizEngine.payload(self.quiz.id, seed=7), QuizEngine.payload(self.quiz.id, seed=7))
+
+    def test_submit_is_one_upsert(self):
+        answers = self.correct_answers()
+        with self.assertNumQueries(1):
+            result = QuizEngine.submit(self.user, self.quiz.id, answers)
+
+        self.assertEqual(result.score, 100)
+        self.assertEqual(Progress.objects.get(user=self.user, quiz=self.quiz).score, 100)
+
+    def test_unanswered_questions_count_as_wrong(self):
+        answers = self.correct_answers()
+        answers.popitem()
+        self.assertEqual(QuizEngine.grade(self.quiz.id, answers).score, 80)
+
+    def test_retake_updates_the_score_and_earns_xp_once(self):
+        answers = self.correct_answers()
+        with self.captureOnCommitCallbacks(execute=True):
+            QuizEngine.submit(self.user, self.quiz.id, answers)
+        with self.captureOnCommitCallbacks(execute=True):
+            QuizEngine.submit(self.user, self.quiz.id, {})
+
+        self.assertEqual(Progress.objects.get(user=self.user, quiz=self.quiz).score, 0)
+        self.assertEqual(GamificationService.get_user_xp(self.user), GamificationService.XP_REWARDS['complete_quiz'])
+
+    def test_editing_a_question_drops_the_compiled_quiz(self):
+        QuizEngine.payload(self.quiz.id)
+        question = self.quiz.questions.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            question.correct_answer = question.option2
+            question.save()
+
+        self.assertEqual(self.correct_answers()[str(question.id)], question.option2)
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import requests
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.models import BookmarkedInsight, KeyConcept, ScrapedContent, StudyMilestone, UserProgress
+from core.services.content_processor import ContentProcessor
+from core.services.content_scraper import ContentScraper
+from core.services.material_store import StudyMaterialStore
+from core.services.refresher import MaterialRefresher, RefreshResult
+from core.tests import CoreTestCase
+
+PARAGRAPHS = [
+    'Sorting algorithms arrange items in order. Merge sort: a divide and conquer sort. '
+    'It is important to know which sorts are stable.',
+    'Binary search halves the range at each step. Hash tables map keys to values in constant time.',
+    'Trees store hierarchical data and graphs model networks of nodes and edges. '
+    'Depth first search walks a branch to its end before backtracking. '
+    'Breadth first search visits every neighbour before going deeper.',
+]
+
+
+def page(paragraphs):
+    return {'title': 'Algorithms', 'content': '\n\n'.join(paragraphs), 'source_type': 'webpage'}
+
+
+class RefresherTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice')
+        self.scraped_content = ScrapedContent.objects.create(
+            url='https://www.geeksforgeeks.org/algorithms/', title='Algorithms',
+            raw_content=page(PARAGRAPHS)['content'], source_type='webpage'
+        )
+        processed = ContentProcessor.process_content(self.scraped_content.raw_content, 'Algorithms')
+        self.study_material = StudyMaterialStore.persist(processed, self.scraped_content)
+        self.milestones = list(self.study_material.milestones.order_by('order'))
+        for milestone in self.milestones:
+            UserProgress.objects.create(user=self.user, study_material=self.study_material, milestone=milestone,
+                                        completed=True, xp_earned=10)
+
+    def ids(self, model):
+        return sorted(model.objects.filter(study_material=self.study_material).values_list('id', flat=True))
+
+    def completed(self):
+        return sorted(UserProgress.objects.filter(user=self.user, completed=True).values_list('milestone_id', flat=True))
+
+    def test_change_deep_in_the_last_paragraph_keeps_every_row(self):
+        concepts, milestones, insights = self.ids(KeyConcept), self.ids(StudyMilestone), self.ids(BookmarkedInsight)
+        progress = self.completed()
+        edited = PARAGRAPHS[:2] + [PARAGRAPHS[2].replace('before going deeper', 'before moving a level down')]
+
+        with mock.patch.object(ContentProcessor, 'generate_study_milestones',
+                               wraps=ContentProcessor.generate_study_milestones) as milestones_stage, \
+                mock.patch.object(ContentProcessor, 'extract_bookmarked_insights',
+                                  wraps=ContentProcessor.extract_bookmarked_insights) as insights_stage, \
+                mock.patch.object(ContentProcessor, 'generate_summary',
+                                  wraps=ContentProcessor.generate_summary) as summary_stage:
+            result = MaterialRefresher.apply(self.scraped_content, page(edited))
+
+        self.assertEqual(result.status, RefreshResult.UPDATED)
+        self.assertEqual(result.stages, ['summary', 'quiz_questions', 'estimated_duration'])
+        summary_stage.assert_called_once()
+        milestones_stage.assert_not_called()
+        insights_stage.assert_not_called()
+        self.assertEqual(self.ids(KeyConcept), concepts)
+        self.assertEqual(self.ids(StudyMilestone), milestones)
+        self.assertEqual(self.ids(BookmarkedInsight), insights)
+        self.assertEqual(self.completed(), progress)
+        self.assertIn('a level down', ScrapedContent.objects.get(pk=self.scraped_content.pk).raw_content)
+
+    def test_unchanged_text_runs_no_stage(self):
+        result = MaterialRefresher.apply(self.scraped_content, page(PARAGRAPHS))
+
+        self.assertEqual(result.status, RefreshResult.UNCHANGED)
+        self.assertEqual(result.stages, [])
+
+    def test_milestone_edited_in_place_keeps_its_row_and_progress(self):
+        progress = self.completed()
+        edited = ['Sorting algorithms put items in order. ' + PARAGRAPHS[0].split('. ', 1)[1]] + PARAGRAPHS[1:]
+
+        result = MaterialRefresher.apply(self.scraped_content, page(edited))
+
+        self.assertIn('study_milestones', result.stages)
+        self.assertEqual(self.completed(), progress)
+        first = StudyMilestone.objects.get(pk=self.milestones[0].pk)
+        self.assertTrue(first.description.startswith('Sorting algorithms put items'))
+        self.assertEqual(result.rows['milestones'], [3, 0, 0])
+
+    def test_removed_paragraph_drops_only_its_milestone(self):
+        result = MaterialRefresher.apply(self.scraped_content, page([PARAGRAPHS[0], PARAGRAPHS[2]]))
+
+        self.assertEqual(result.rows['milestones'], [2, 0, 1])
+        self.assertEqual(self.completed(), sorted([self.milestones[0].pk, self.milestones[2].pk]))
+        self.assertEqual(StudyMilestone.objects.get(pk=self.milestones[2].pk).order, 2)
+
+
+class RefreshCommandTests(CoreTestCase):
+    def test_scrape_failure_is_reported_and_the_run_continues(self):
+        stale = timezone.now() - timedelta(days=30)
+        for name in ('first', 'second'):
+            scraped_content = ScrapedContent.objects.create(
+                url=f"https://www.geeksforgeeks.org/{name}/", title=name,
+                raw_content=' '.join(PARAGRAPHS), source_type='webpage'
+            )
+            StudyMaterialStore.persist(ContentProcessor.process_content(scraped_content.raw_content, name),
+                                       scraped_content)
+        ScrapedContent.objects.update(checked_at=stale)
+        unchanged = page([' '.join(PARAGRAPHS)])
+
+        stdout, stderr = StringIO(), StringIO()
+        with mock.patch.object(ContentScraper, 'scrape_webpage',
+                               side_effect=[requests.ConnectionError('connection reset'), unchanged]):
+            call_command('refresh_materials', stdout=stdout, stderr=stderr)
+
+        self.assertIn('connection reset', stderr.getvalue())
+        self.assertIn('Checked 2 pages: 0 updated, 1 unchanged, 0 not modified, 1 failed.', stdout.getvalue())
+        # The failed page keeps its old checked_at and is retried on the next run
+        self.assertEqual(MaterialRefresher.stale().count(), 1)
@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from core.models import KeyConcept, Note, PastPaper, SearchDocument
+from core.services.search import SearchIndex, SearchService
+from core.tests import CoreTestCase, make_material
+
+
+class SearchTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice', password='secret')
+        self.bob = User.objects.create_user('bob', password='secret')
+        self.note = Note.objects.create(user=self.alice, title='Thermodynamics revision',
+                                        content='Entropy always increases in an isolated system.')
+        Note.objects.create(user=self.bob, title='Thermodynamics diary', content='Private entropy notes.')
+        self.study_material = make_material(title='Heat engines', text='Carnot cycles and thermodynamics.')
+        self.paper = PastPaper.objects.create(title='Physics paper 2', subject='Physics', year=2021,
+                                              file_url='https://example.com/physics-2021.pdf')
+
+    def found(self, query, user=None, **kwargs):
+        return [(result.kind, result.object_id) for result in SearchService.search(query, user, **kwargs)]
+
+    def test_notes_only_match_for_their_owner(self):
+        found = self.found('entropy', self.alice)
+        self.assertEqual(found, [(SearchDocument.KIND_NOTE, self.note.pk)])
+        self.assertEqual(self.found('entropy'), [])
+
+        response = self.client.get(reverse('search'), {'q': 'thermodynamics'})
+        self.assertEqual([result['kind'] for result in response.json()['results']], [SearchDocument.KIND_MATERIAL])
+
+        self.client.login(username='alice', password='secret')
+        response = self.client.get(reverse('search'), {'q': 'thermodynamics'})
+        self.assertEqual(
+            sorted((result['kind'], result['id']) for result in response.json()['results']),
+            sorted([(SearchDocument.KIND_NOTE, self.note.pk), (SearchDocument.KIND_MATERIAL, self.study_material.pk)])
+        )
+
+    def test_terms_match_word_prefixes(self):
+        self.assertEqual(self.found('thermo cyc', kinds=[SearchDocument.KIND_MATERIAL]),
+                         [(SearchDocument.KIND_MATERIAL, self.study_material.pk)])
+        self.assertEqual(self.found('phys 2021'), [(SearchDocument.KIND_PAST_PAPER, self.paper.pk)])
+
+    def test_title_matches_rank_above_body_matches(self):
+        make_material(title='Glossary', text='Heat is mentioned once here.')
+        results = SearchService.search('heat')
+
+        self.assertEqual(results[0].object_id, self.study_material.pk)
+        self.assertGreater(results[0].score, results[1].score)
+
+    def test_edits_and_deletes_update_the_index(self):
+        self.note.title = 'Kinetics'
+        self.note.content = 'Rate equations.'
+        self.note.save()
+        self.assertEqual(self.found('entropy', self.alice), [])
+        self.assertEqual(self.found('kinetics', self.alice), [(SearchDocument.KIND_NOTE, self.note.pk)])
+
+        KeyConcept.objects.create(study_material=self.study_material, concept='Isotherm', definition='Constant T')
+        self.assertEqual(self.found('isotherm'), [(SearchDocument.KIND_MATERIAL, self.study_material.pk)])
+
+        self.note.delete()
+        self.paper.delete()
+        self.assertEqual(self.found('kinetics', self.alice), [])
+        self.assertEqual(self.found('physics'), [])
+
+    def test_fts_syntax_is_taken_literally(self):
+        for query in ('"entropy', 'entropy AND', '*', 'NOT entropy', 'entropy)', 'NEAR(a b)', '^ -'):
+            response = self.client.get(reverse('search'), {'q': query})
+            self.assertEqual(response.status_code, 200, query)
+        self.assertEqual(self.found('*'), [])
+        self.assertEqual(self.found('"entropy', self.alice), [(SearchDocument.KIND_NOTE, self.note.pk)])
+
+    def test_rebuild_recreates_every_document(self):
+        SearchDocument.objects.all().delete()
+        SearchService.get_backend().rebuild()
+
+        counts = SearchIndex.rebuild()
+
+        self.assertEqual(counts, {SearchDocument.KIND_NOTE: 2, SearchDocument.KIND_MATERIAL: 1,
+                                  SearchDocument.KIND_PAST_PAPER: 1})
+        self.assertEqual(self.found('carnot'), [(SearchDocument.KIND_MATERIAL, self.study_material.pk)])
@@ -0,0 +1,162 @@
+from django.shortcuts import render, redirect
+from django.views.generic import TemplateView, ListView
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth import login, authenticate
+from django.contrib.auth.forms import UserCreationForm
+from django.views import View
+from django.http import JsonResponse
+from ..models import PastPaper, Quiz, Progress, Note
+from ..forms import CustomUserCreationForm
+from ..services.catalogue import PastPaperCatalogue, QuizCatalogue
+from ..services.search import SearchService
+from .study_materials import StudyMaterialView, StudyMilestoneView, IngestionJobStatusView, LeaderboardView
+from .quizzes import QuizView, QuizSubmitView
+
+class HomeView(TemplateView):
+    template_name = 'core/home.html'
+
+def _positive_int(value):
+    if value in (None, ''):
+        return None
+    number = int(value)
+    if number < 1:
+        raise ValueError('Expected a positive number.')
+    return number
+
+class PastPaperListView(View):
+    template_name = 'core/past_papers.html'
+
+    def get(self, request):
+        subject = request.GET.get('subject') or None
+        try:
+            year = _positive_int(request.GET.get('year'))
+            page_size = _positive_int(request.GET.get('page_size'))
+            page = PastPaperCatalogue.page(subject, year, request.GET.get('cursor'), page_size)
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': str(e) or 'Invalid filter.'}, status=400)
+        facets = PastPaperCatalogue.facets(subject, year)
+
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'results': [
+                    {
+                        'id': paper.id,
+                        'title': paper.title,
+                        'subject': paper.subject,
+                        'year': paper.year,
+                        'file_url': paper.file_url
+                    }
+                    for paper in page.items
+                ],
+                'next_cursor': page.next_cursor,
+                'facets': facets
+            })
+
+        return render(request, self.template_name, {
+            'papers': page.items,
+            'next_cursor': page.next_cursor,
+            'facets': facets,
+            'subject': subject,
+            'year': year
+        })
+
+class QuizListView(View):
+    template_name = 'core/quizzes.html'
+
+    def get(self, request):
+        try:
+            page = QuizCatalogue.page(request.GET.get('cursor'), _positive_int(request.GET.get('page_size')))
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': str(e) or 'Invalid page.'}, status=400)
+
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'results': [
+                    {'id': quiz.id, 'title': quiz.title, 'description': quiz.description}
+                    for quiz in page.items
+                ],
+                'next_cursor': page.next_cursor
+            })
+
+        return render(request, self.template_name, {
+            'quizzes': page.items,
+            'next_cursor': page.next_cursor
+        })
+
+class ProgressView(LoginRequiredMixin, TemplateView):
+    template_name = 'core/progress.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['progress'] = Progress._default_manager.filter(user=self.request.user)
+        return context
+
+class NoteListView(LoginRequiredMixin, ListView):
+    model = Note
+    template_name = 'core/notes.html'
+    context_object_name = 'notes'
+    
+    def get_queryset(self):
+        query = self.request.GET.get('q', '').strip()
+        if not query:
+            return Note._default_manager.filter(user=self.request.user).order_by('-updated_at')
+
+        # Best match first
+        results = SearchService.search(query, self.request.user, kinds=['note'], limit=SearchService.MAX_LIMIT)
+        notes = Note._default_manager.filter(user=self.request.user).in_bulk([r.object_id for r in results])
+        return [notes[r.object_id] for r in results if r.object_id in notes]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+class SearchView(View):
+    def get(self, request):
+        kinds = request.GET.getlist('kind') or None
+        try:
+            limit = _positive_int(request.GET.get('limit')) or 20
+            results = SearchService.search(request.GET.get('q', ''), request.user, kinds, limit)
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': str(e) or 'Invalid search.'}, status=400)
+
+        return JsonResponse({
+            'results': [
+                {
+                    'kind': result.kind,
+                    'id': result.object_id,
+                    'title': result.title,
+                    'snippet': result.snippet,
+                    'url': result.url,
+                    'score': result.score
+                }
+                for result in results
+            ]
+        })
+
+class RegisterView(View):
+    def get(self, request):
+        form = CustomUserCreationForm()
+        return render(request, 'core/register.html', {'form': form})
+
+    def post(self, request):
+        form = CustomUserCreationForm(request.POST)
+        if form.is_valid():
+            user = form.save()
+            login(request, user)
+            return redirect('home')
+        return render(request, 'core/register.html', {'form': form})
+
+class LoginView(View):
+    def get(self, request):
+        return render(request, 'core/login.html')
+
+    def post(self, request):
+        username = request.POST.get('username')
+        password = request.POST.get('password')
+        user = authenticate(username=username, password=password)
+        if user is not None:
+            login(request, user)
+            return redirect('home')
+        return render(request, 'core/login.html', {'form': {'errors': True}})
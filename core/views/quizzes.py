@@ -0,0 +1,68 @@
+import json
+
+from django.views import View
+from django.http import Http404, HttpResponse, JsonResponse
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils.cache import patch_cache_control
+
+# Models
+from ..models import Quiz
+
+# Services
+from ..services.quiz_engine import QuizEngine
+
+
+class QuizView(View):
+    def get(self, request, quiz_id):
+        # Each user gets a stable option order unless the page asks for another seed
+        try:
+            seed = int(request.GET.get('seed', request.user.pk or 0))
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid seed.'}, status=400)
+
+        try:
+            payload = QuizEngine.payload(quiz_id, seed)
+        except Quiz.DoesNotExist:
+            raise Http404('No quiz matches the given query.')
+
+        response = HttpResponse(payload, content_type='application/json')
+        patch_cache_control(response, private=True, max_age=QuizEngine.CACHE_TTL)
+        return response
+
+
+class QuizSubmitView(LoginRequiredMixin, View):
+    def post(self, request, quiz_id):
+        try:
+            answers = json.loads(request.body or b'{}').get('answers', {})
+        except (ValueError, AttributeError):
+            answers = None
+        if not isinstance(answers, dict):
+            return JsonResponse({'status': 'error', 'message': 'Invalid submission.'}, status=400)
+
+        try:
+            result = QuizEngine.submit(request.user, quiz_id, {str(k): v for k, v in answers.items()})
+
+        except Quiz.DoesNotExist:
+            raise Http404('No quiz matches the given query.')
+
+        except ValueError as e:
+            return JsonResponse({
+                'status': 'error',
+                'message': str(e)
+            }, status=400)
+
+        except Exception as e:
+            print("[Error] QuizSubmitView POST:", str(e))
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Failed to grade quiz.'
+            }, status=500)
+
+        return JsonResponse({
+            'status': 'success',
+            'score': result.score,
+            'correct': result.correct,
+            'total': result.total,
+            'results': result.results,
+            'answers': result.answers
+        })
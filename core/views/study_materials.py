@@ -1,22 +1,22 @@
 from django.views import View
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ValidationError
 
 # Models
 from ..models.study_materials import (
-    ScrapedContent,
     StudyMaterial,
-    KeyConcept,
-    StudyMilestone,
-    BookmarkedInsight
+    StudyMilestone
 )
+from ..models.jobs import IngestionJob
 
 # Services
-from ..services.content_scraper import ContentScraper
-from ..services.content_processor import ContentProcessor
 from ..services.gamification import GamificationService
+from ..services.ingestion import IngestionPipeline
+from ..services.leaderboard import Leaderboard
+from ..services.material_loader import StudyMaterialLoader
 
 
 class StudyMaterialView(LoginRequiredMixin, View):
@@ -24,8 +24,11 @@ class StudyMaterialView(LoginRequiredMixin, View):
     
     def get(self, request, material_id=None):
         if material_id:
-            # Load specific study material and user progress
-            material = get_object_or_404(StudyMaterial, id=material_id)
+            # Load specific study material, its children and the user's progress
+            try:
+                material = StudyMaterialLoader.load(material_id, request.user)
+            except StudyMaterial.DoesNotExist:
+                raise Http404('No study material matches the given query.')
             progress_stats = GamificationService.get_progress_stats(request.user)
 
             return render(request, self.template_name, {
@@ -41,78 +44,21 @@ class StudyMaterialView(LoginRequiredMixin, View):
             # Get input from form: either URL or PDF
             url = request.POST.get('url')
             pdf_file = request.FILES.get('pdf_file')
-            
-            if not url and not pdf_file:
-                raise ValidationError('Please provide either a URL or a PDF file.')
-
-            # Scrape and extract content
-            if url:
-                raw_content = ContentScraper.process_content(url)
-            else:
-                raw_content = ContentScraper.process_content(pdf_file, is_pdf=True)
-            
-            # Save raw scraped content
-            scraped_content = ScrapedContent.objects.create(
-                url=url or '',
-                title=raw_content['title'],
-                raw_content=raw_content['content'],
-                source_type=raw_content['source_type']
-            )
-            
-            # Process content to extract structured study data
-            processed = ContentProcessor.process_content(
-                content=raw_content['content'],
-                title=raw_content['title']
-            )
-            
-            # Save StudyMaterial entry
-            study_material = StudyMaterial.objects.create(
-                scraped_content=scraped_content,
-                title=processed.title,
-                summary=processed.summary,
-                eli5_explanation=processed.eli5_explanation,
-                study_duration=processed.estimated_duration
-            )
-            
-            # Save Key Concepts
-            for concept in processed.key_concepts:
-                KeyConcept.objects.create(
-                    study_material=study_material,
-                    concept=concept['concept'],
-                    definition=concept['definition']
-                )
-            
-            # Save Milestones
-            for i, milestone in enumerate(processed.study_milestones, 1):
-                StudyMilestone.objects.create(
-                    study_material=study_material,
-                    title=milestone['title'],
-                    description=milestone['description'],
-                    order=i,
-                    xp_reward=milestone['xp_reward']
-                )
-            
-            # Save Bookmarked Insights
-            for insight in processed.bookmarked_insights:
-                BookmarkedInsight.objects.create(
-                    study_material=study_material,
-                    content=insight['content'],
-                    importance_level=insight['importance_level']
-                )
-            
-            # Award XP to user for creating material
-            GamificationService.award_xp(request.user, 'read_material')
-            
+
+            # Scraping, processing and persisting happen in the background
+            job = IngestionPipeline.enqueue(request.user, url=url, pdf_file=pdf_file)
+
             return JsonResponse({
-                'status': 'success',
-                'material_id': study_material.id,
-                'message': 'Study material created successfully.'
-            })
+                'status': 'queued',
+                'job_id': str(job.id),
+                'status_url': reverse('ingestion_job_status', args=[job.id]),
+                'message': 'Study material is being processed.'
+            }, status=202)
 
         except ValidationError as e:
             return JsonResponse({
                 'status': 'error',
-                'message': str(e)
+                'message': ' '.join(e.messages)
             }, status=400)
 
         except Exception as e:
@@ -123,12 +69,33 @@ class StudyMaterialView(LoginRequiredMixin, View):
             }, status=500)
 
 
+class IngestionJobStatusView(LoginRequiredMixin, View):
+    def get(self, request, job_id):
+        job = get_object_or_404(IngestionJob, id=job_id, user=request.user)
+
+        return JsonResponse({
+            'job_id': str(job.id),
+            'status': job.status,
+            'progress': job.progress,
+            'finished': job.is_finished,
+            'error': job.error or None,
+            'material_id': job.study_material_id,
+            'material_url': reverse('study_material_detail', args=[job.study_material_id])
+                if job.study_material_id else None
+        })
+
+
 class StudyMilestoneView(LoginRequiredMixin, View):
     def post(self, request, milestone_id):
         milestone = get_object_or_404(StudyMilestone, id=milestone_id)
 
         try:
-            result = GamificationService.complete_milestone(request.user, milestone)
+            # The page sends one key per milestone so double-clicks and retries collapse
+            result = GamificationService.complete_milestone(
+                request.user,
+                milestone,
+                idempotency_key=request.headers.get('Idempotency-Key') or None
+            )
 
             return JsonResponse({
                 'status': 'success',
@@ -136,9 +103,40 @@ class StudyMilestoneView(LoginRequiredMixin, View):
                 'new_badges': result['new_badges']
             })
 
+        except ValueError as e:
+            return JsonResponse({
+                'status': 'error',
+                'message': str(e)
+            }, status=409)
+
         except Exception as e:
             print("[Error] StudyMilestoneView POST:", str(e))
             return JsonResponse({
                 'status': 'error',
                 'message': 'Failed to complete milestone.'
             }, status=500)
+
+
+class LeaderboardView(LoginRequiredMixin, View):
+    MAX_ENTRIES = 100
+
+    def get(self, request):
+        # ?material=<id> for a study material's board, ?period=week for this week only,
+        # plus ?weeks_ago=<n> for one of the LEADERBOARD['WEEKS_KEPT'] weeks before it
+        material_id = request.GET.get('material')
+        weekly = request.GET.get('period') == 'week'
+        try:
+            material_id = int(material_id) if material_id else None
+            limit = min(int(request.GET.get('limit', 10)), self.MAX_ENTRIES)
+            weeks_ago = int(request.GET.get('weeks_ago', 0))
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid leaderboard parameters.'}, status=400)
+        if not 0 <= weeks_ago <= Leaderboard.get_settings()['WEEKS_KEPT'] or (weeks_ago and not weekly):
+            return JsonResponse({'status': 'error', 'message': 'Invalid leaderboard parameters.'}, status=400)
+        at = Leaderboard.week_start(weeks_ago=weeks_ago)
+
+        return JsonResponse({
+            'board': Leaderboard.board_name(material_id, weekly, at),
+            'top': Leaderboard.top(limit, study_material_id=material_id, weekly=weekly, at=at),
+            'me': Leaderboard.rank(request.user, study_material_id=material_id, weekly=weekly, at=at)
+        })
@@ -0,0 +1,16 @@
+"""
+Celery application for examprep.
+
+Workers are started with ``celery -A examprep worker``. Configuration is read
+from the ``CELERY_*`` entries in settings.py.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'examprep.settings')
+
+app = Celery('examprep')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,7 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'core',
+    'core.apps.CoreConfig',
 ]
 
 MIDDLEWARE = [
@@ -78,6 +79,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts so concurrent
+            # read-then-write transactions wait instead of failing with "database is locked".
+            # Django 5.1+ only; older versions pass it to sqlite3.connect() and fail
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # A file, not the default in-memory database: threads sharing an in-memory
+        # database fail with "table is locked" instead of waiting for the lock
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -122,3 +133,98 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Material detail, progress stats, compiled quizzes and catalogue facets are
+# cached here and invalidated by whichever process wrote the rows (a web worker,
+# an ingestion thread, a Celery task), so the cache must be shared between
+# processes. Set CACHE_BACKEND=locmem only for a single process, e.g. tests.
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/3')
+if os.environ.get('CACHE_BACKEND', 'redis') == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+
+
+# Background jobs
+# https://docs.celeryq.dev/en/stable/django/first-steps-with-django.html
+
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+# Job state lives on IngestionJob rows, so task results are not stored
+CELERY_TASK_IGNORE_RESULT = True
+
+# How study material ingestion jobs are executed:
+#   'celery' - hand the scrape/process/persist chain to the Celery broker
+#   'thread' - run jobs on an in-process thread pool (no broker needed)
+#   'eager'  - run jobs inline in the request, for tests and debugging
+INGESTION_BACKEND = os.environ.get('INGESTION_BACKEND', 'thread')
+INGESTION_THREAD_WORKERS = 2
+
+# How gamification (XP/badge) events are applied, see
+# core/services/gamification_events.py:
+#   'celery' - queue events in Redis and apply them from a Celery task
+#   'memory' - apply them in batches on a background thread of this process;
+#              events still queued when the process exits are lost
+#   'eager'  - apply each event as soon as it is published, for tests
+GAMIFICATION_EVENTS = {
+    'BACKEND': os.environ.get('GAMIFICATION_EVENTS_BACKEND', 'celery'),
+    'BATCH_SIZE': 500,
+    'BATCH_WINDOW': 0.5,
+    'REDIS_URL': CELERY_BROKER_URL,
+}
+
+# XP leaderboards, see core/services/leaderboard.py. BACKEND is 'redis'
+# (shared sorted sets) or 'locmem' (rebuilt from the ledger in each process
+# and then diverging, so only for a single process)
+LEADERBOARD = {
+    'BACKEND': os.environ.get('LEADERBOARD_BACKEND', 'redis'),
+    'REDIS_URL': os.environ.get('LEADERBOARD_REDIS_URL', 'redis://localhost:6379/2'),
+    'WEEKS_KEPT': 2,
+}
+
+# Cache of scraped pages/PDFs and their processed results, see
+# core/services/content_cache.py. BACKEND is 'locmem' or 'redis'.
+CONTENT_CACHE = {
+    'BACKEND': os.environ.get('CONTENT_CACHE_BACKEND', 'locmem'),
+    'TTL': 24 * 60 * 60,
+    'MAX_ENTRIES': 256,
+    'REVALIDATE_AFTER': 10 * 60,
+    'REDIS_URL': os.environ.get('CONTENT_CACHE_REDIS_URL', 'redis://localhost:6379/1'),
+}
+
+# Near-duplicate detection at ingest, see core/services/near_duplicates.py.
+# An upload whose estimated Jaccard similarity to an already processed
+# document reaches THRESHOLD reuses that document's StudyMaterial.
+NEAR_DUPLICATES = {
+    'THRESHOLD': float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', 0.9)),
+    'NUM_PERM': 128,
+    'BANDS': 16,
+    'SHINGLE_SIZE': 5,
+}
+
+# Incremental re-processing of web pages, see core/services/refresher.py.
+# Run ``manage.py refresh_materials`` from cron to re-check pages older than this.
+CONTENT_REFRESH = {
+    'STALE_AFTER_DAYS': int(os.environ.get('CONTENT_REFRESH_STALE_AFTER_DAYS', 7)),
+}
+
+# Scraped text is stored compressed and deduplicated, see core/models/content_blobs.py.
+# 'zstd' needs the zstandard package; existing blobs keep the codec they were written with.
+CONTENT_STORE = {
+    'CODEC': os.environ.get('CONTENT_STORE_CODEC', 'zlib'),
+    'LEVEL': 6,
+}
@@ -17,17 +17,27 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 from django.contrib.auth.views import LogoutView
-from core.views import HomeView, PastPaperListView, QuizListView, ProgressView, NoteListView, RegisterView, LoginView
+from core.views import HomeView, PastPaperListView, QuizListView, ProgressView, NoteListView, RegisterView, LoginView, SearchView
+from core.views import StudyMaterialView, StudyMilestoneView, IngestionJobStatusView, LeaderboardView
+from core.views import QuizView, QuizSubmitView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', HomeView.as_view(), name='home'),
     path('past-papers/', PastPaperListView.as_view(), name='past_papers'),
     path('quizzes/', QuizListView.as_view(), name='quizzes'),
+    path('quizzes/<int:quiz_id>/', QuizView.as_view(), name='quiz'),
+    path('quizzes/<int:quiz_id>/submit/', QuizSubmitView.as_view(), name='submit_quiz'),
     path('progress/', ProgressView.as_view(), name='progress'),
     path('notes/', NoteListView.as_view(), name='notes'),
+    path('search/', SearchView.as_view(), name='search'),
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(next_page='home'), name='logout'),
     path('logout/', LogoutView.as_view(next_page='home'), name='logout'),
+    path('study/', StudyMaterialView.as_view(), name='study_material'),
+    path('study/<int:material_id>/', StudyMaterialView.as_view(), name='study_material_detail'),
+    path('study/milestone/<int:milestone_id>', StudyMilestoneView.as_view(), name='complete_milestone'),
+    path('study/jobs/<uuid:job_id>/', IngestionJobStatusView.as_view(), name='ingestion_job_status'),
+    path('study/leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
 ]